@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+align_srt_to_content.py
+So từng block SRT với đoạn tương ứng trong content.txt và xuất báo cáo CSV
+(srt_line, content_line, similarity) – cùng định dạng với align_srt_to_content.js.
+
+Bản JS, với mỗi block, lowercase + bỏ dấu câu lại toàn bộ phần content còn lại trong mỗi
+vòng indexOf và chỉ tiến pos += 1 mỗi lần trúng (bậc hai theo độ dài content), rồi cắt
+text gốc bằng vị trí tính trên chuỗi đã chuẩn hoá (lệch khi có dấu câu). Ở đây:
+
+- content.txt được chuẩn hoá đúng một lần thành mảng token (text_match.word_spans) kèm
+  bảng offset token → [start, end) trong text gốc; đoạn xuất ra luôn là lát cắt text gốc.
+- Index trigram trên mảng token content (dict trigram → danh sách vị trí tăng dần).
+- Mỗi block được neo bằng vài trigram đầu của nó (tràn sang các block sau nếu block ngắn,
+  vd. SRT word-level): mỗi trigram lấy lần xuất hiện gần nhất sau con trỏ (bisect) và bỏ
+  phiếu cho vị trí bắt đầu; sau đó một DP nhỏ (khớp semi-global các token của block trong
+  cửa sổ quanh điểm neo, token gần giống tính bằng Levenshtein có chặn) chốt đầu / cuối đoạn.
+- Block không khớp (độ giống < 0.5) lấy phần content từ con trỏ tới điểm neo của block kế
+  tiếp, như bản JS.
+
+Mọi bước đều cục bộ quanh con trỏ, nên thời gian tuyến tính theo độ dài content + SRT.
+
+Usage:
+  python scripts/align_srt_to_content.py --srt transcript.srt --content content.txt \\
+      --out alignment_result.csv --threshold 0.85
+"""
+
+import argparse
+import sys
+import time
+from bisect import bisect_left
+
+from srt_model import SrtDocument
+from text_match import levenshtein, similarity, word_spans
+
+NGRAM = 3
+VOTE_GRAMS = 6       # số trigram (tính từ đầu block) bỏ phiếu cho điểm neo
+MIN_BLOCK_SIM = 0.5  # dưới ngưỡng này coi như không tìm thấy block (như bản JS)
+WORD_MIN_SIMILARITY = 0.5
+ANCHOR_DRIFT_COST = 0.1
+
+
+class ContentIndex:
+    """Token content đã chuẩn hoá, offset về text gốc và index trigram."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens, self.starts, self.ends = word_spans(text)
+        self.vocab: dict[str, int] = {}
+        self.ids = [self.vocab.setdefault(t, len(self.vocab)) for t in self.tokens]
+        self.grams: dict[tuple, list[int]] = {}
+        ids = self.ids
+        for i in range(len(ids) - NGRAM + 1):
+            self.grams.setdefault(tuple(ids[i:i + NGRAM]), []).append(i)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def encode(self, tokens: list[str]) -> list[int]:
+        """Id theo vocab của content; token không có trong content → -1 (không bao giờ khớp)."""
+        return [self.vocab.get(t, -1) for t in tokens]
+
+    def anchor(self, stream: list[int], q: int, cursor: int) -> int | None:
+        """Vị trí token content (>= cursor) nơi stream[q:] nhiều khả năng bắt đầu."""
+        votes: dict[int, int] = {}
+        for o in range(VOTE_GRAMS):
+            gram = tuple(stream[q + o:q + o + NGRAM])
+            if len(gram) < NGRAM:
+                break
+            positions = self.grams.get(gram)
+            if not positions:
+                continue
+            k = bisect_left(positions, cursor + o)
+            if k < len(positions):
+                s = positions[k] - o
+                votes[s] = votes.get(s, 0) + 1
+        if not votes:
+            return None
+        return max(votes, key=lambda s: (votes[s], -s))
+
+    def match(self, block: list[str], block_ids: list[int], lo: int, hi: int,
+              hint: int) -> tuple[int, int, float]:
+        """Khớp semi-global block trong content[lo:hi]: (start, end, chi phí edit theo token).
+
+        Mỗi token lệch khỏi hint (điểm neo) cộng ANCHOR_DRIFT_COST khi chọn đoạn, để một từ
+        Whisper viết sai không nhảy sang từ gần giống hơn ở vài token phía sau.
+        """
+        ids, tokens = self.ids, self.tokens
+        cols = hi - lo
+        prev = [0.0] * (cols + 1)          # bỏ qua token content phía trước miễn phí
+        prev_start = list(range(cols + 1))
+        for x, word in zip(block_ids, block):
+            cur, cur_start = [prev[0] + 1], [prev_start[0]]
+            for c in range(1, cols + 1):
+                y = ids[lo + c - 1]
+                d = prev[c - 1] + (0.0 if x == y else
+                                   1.0 - similarity(word, tokens[lo + c - 1], WORD_MIN_SIMILARITY))
+                st = prev_start[c - 1]
+                if prev[c] + 1 < d:
+                    d, st = prev[c] + 1, prev_start[c]
+                if cur[c - 1] + 1 < d:
+                    d, st = cur[c - 1] + 1, cur_start[c - 1]
+                cur.append(d)
+                cur_start.append(st)
+            prev, prev_start = cur, cur_start
+        best = min(range(cols + 1),
+                   key=lambda c: prev[c] + ANCHOR_DRIFT_COST * abs(lo + prev_start[c] - hint))
+        return lo + prev_start[best], lo + best, prev[best]
+
+    def segment(self, i: int, j: int) -> str:
+        """Text gốc phủ token [i, j)."""
+        return self.text[self.starts[i]:self.ends[j - 1]] if j > i else ""
+
+
+def split_content(content: str, blocks: list[str]) -> list[str]:
+    """Đoạn content tương ứng với từng block SRT ("" nếu không tìm thấy)."""
+    index = ContentIndex(content)
+    spans = [word_spans(b)[0] for b in blocks]
+    stream, firsts = [], []
+    for tokens in spans:
+        firsts.append(len(stream))
+        stream.extend(index.encode(tokens))
+    firsts.append(len(stream))
+
+    segments, cursor, n = [], 0, len(index)
+    for b, block in enumerate(spans):
+        q, k = firsts[b], len(block)
+        if not k:
+            segments.append("")
+            continue
+        s = index.anchor(stream, q, cursor)
+        hint = cursor if s is None else s
+        block_ids = stream[q:q + k]
+        d = max(2, k // 4)
+        lo, hi = max(cursor, hint - d), min(n, hint + k + d)
+        if index.ids[hint:hint + k] == block_ids:  # trường hợp thường gặp: khớp nguyên văn tại điểm neo
+            start, end, cost = hint, hint + k, 0
+        elif hi > lo:
+            start, end, cost = index.match(block, block_ids, lo, hi, hint)
+        else:
+            start, end, cost = lo, lo, k
+        if end > start and 1 - cost / k >= MIN_BLOCK_SIM:
+            segments.append(index.segment(start, end))
+            cursor = end
+            continue
+        # không khớp: lấy tới điểm bắt đầu của block kế tiếp (giới hạn để không nuốt cả chương)
+        nxt = index.anchor(stream, firsts[b + 1], cursor) if b + 1 < len(spans) else None
+        if nxt is not None and cursor < nxt <= cursor + 4 * k + 8:
+            segments.append(index.segment(cursor, nxt))
+            cursor = nxt
+        else:
+            print(f"⚠️ Không tìm thấy đoạn khớp cho block SRT #{b + 1}: {blocks[b]!r}", file=sys.stderr)
+            segments.append("")
+
+    if cursor < n:
+        left = len(content) - index.ends[cursor - 1] if cursor else len(content)
+        print(f"⚠️ Còn {left} ký tự trong content.txt không khớp block nào", file=sys.stderr)
+    return segments
+
+
+def text_similarity(a: str, b: str) -> float:
+    """Như similarity() của bản JS: Levenshtein theo ký tự trên text đã gộp khoảng trắng."""
+    a, b = " ".join(a.split()), " ".join(b.split())
+    if not a or not b:
+        return 0.0
+    return 1 - levenshtein(a, b) / max(len(a), len(b))
+
+
+def _csv_field(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def align_srt_to_content(srt_path: str, content_path: str, out_path: str = "alignment_result.csv",
+                         threshold: float = 0.85) -> dict:
+    t0 = time.monotonic()
+    doc = SrtDocument.load(srt_path)
+    blocks = [(cue.index, cue.text) for cue in doc if cue.text.strip()]
+    with open(content_path, encoding="utf-8") as f:
+        content = f.read().replace("\r", "").strip()
+    segments = split_content(content, [text for _, text in blocks])
+    print(f"📜 {len(blocks)} block SRT, {len(segments)} đoạn content")
+
+    rows, low = ["srt_line,content_line,similarity"], 0
+    for (cue_id, text), segment in zip(blocks, segments):
+        sim = text_similarity(text, segment)
+        rows.append(f"{_csv_field(text)},{_csv_field(segment)},{sim * 100:.2f}")
+        if sim < threshold:
+            low += 1
+            print(f"⚠️ Độ giống thấp ({sim * 100:.2f}%) ở block SRT {cue_id}: {text!r} vs {segment!r}",
+                  file=sys.stderr)
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(rows))
+
+    elapsed = time.monotonic() - t0
+    print(f"💾 Báo cáo CSV ➜ {out_path} ({elapsed:.2f}s)")
+    if low:
+        print(f"🔎 {low} block có độ giống dưới ngưỡng ({threshold * 100:g}%)")
+    else:
+        print("✅ Mọi block đều khớp trên ngưỡng!")
+    return {"blocks": len(blocks), "below_threshold": low, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Align SRT blocks with content.txt and export a CSV report.")
+    parser.add_argument("--srt", required=True)
+    parser.add_argument("--content", required=True)
+    parser.add_argument("--out", default="alignment_result.csv")
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+
+    align_srt_to_content(args.srt, args.content, args.out, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+audio_prep.py
+Chuẩn bị audio cho luồng MP3 (audio.zip) trong một lượt, không file trung gian:
+
+  audio.zip ──(đọc member theo thứ tự `sort -V`)──► stdin ffmpeg
+      ffmpeg: decode → atempo → volume ─┬─► libmp3lame → audio_adjusted.mp3
+                                        └─► PCM s16le 16 kHz mono → stdout (tuỳ chọn)
+
+- Thay cho unzip + `ffmpeg -f concat -c copy` + lượt encode atempo/volume riêng.
+- Các member MP3 được nối ở mức frame: bỏ tag ID3v2/ID3v1 và frame Xing/Info của từng
+  file (như demuxer concat), nên decoder thấy một luồng MP3 liên tục.
+- Bitrate giữ như trước: lấy từ frame đầu của member đầu tiên nếu là CBR, còn VBR hoặc
+  không đọc được thì dùng libmp3lame -q:a 0.
+- `--transcribe` tee PCM sang audio_shard.transcribe_stream: shard được cắt tại khoảng
+  lặng và transcribe ngay trong lúc ffmpeg vẫn đang encode phần sau. SRT được cache theo
+  nội dung các member + speed/volume + tham số Whisper; hit thì chỉ còn bước encode.
+
+Usage:
+  python scripts/audio_prep.py input/audio.zip --output adjusted/audio_adjusted.mp3 \\
+      --speed 0.9 --volume 1.2 --transcribe transcript.srt --model medium --workers 2
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+
+# ───────── MP3 frame ─────────
+_BITRATES_KBPS = {
+    True: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1 Layer III
+    False: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],  # MPEG-2/2.5 Layer III
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def natural_key(name: str) -> list:
+    """Khoá sắp xếp kiểu `sort -V`: so sánh các đoạn số theo giá trị."""
+    return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", name)]
+
+
+def mp3_members(zf: zipfile.ZipFile) -> list[str]:
+    """Các file *.mp3 ở gốc zip (như `find -maxdepth 1 -name '*.mp3'`), theo thứ tự tự nhiên."""
+    names = [n for n in zf.namelist() if "/" not in n and n.endswith(".mp3")]
+    return sorted(names, key=natural_key)
+
+
+def parse_frame_header(data: bytes, pos: int) -> dict | None:
+    """Header frame MPEG Layer III tại pos, hoặc None nếu không phải header hợp lệ."""
+    if pos + 4 > len(data):
+        return None
+    h = int.from_bytes(data[pos:pos + 4], "big")
+    version, layer = (h >> 19) & 3, (h >> 17) & 3
+    br_idx, sr_idx = (h >> 12) & 15, (h >> 10) & 3
+    if (h >> 21) != 0x7FF or version == 1 or layer != 1 or br_idx in (0, 15) or sr_idx == 3:
+        return None
+    mpeg1 = version == 3
+    mono = (h >> 6) & 3 == 3
+    bitrate = _BITRATES_KBPS[mpeg1][br_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version][sr_idx]
+    return {
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "length": (144 if mpeg1 else 72) * bitrate // sample_rate + ((h >> 9) & 1),
+        "side_info": (17 if mono else 32) if mpeg1 else (9 if mono else 17),
+    }
+
+
+def strip_mp3(data: bytes) -> tuple[memoryview, dict]:
+    """Bỏ tag ID3 và frame Xing/Info; trả về (các frame audio, info của frame đầu)."""
+    start, end = 0, len(data)
+    while data[start:start + 3] == b"ID3" and start + 10 <= end:
+        size = 0
+        for b in data[start + 6:start + 10]:
+            size = (size << 7) | (b & 0x7F)
+        start += 10 + size + (10 if data[start + 5] & 0x10 else 0)
+    if end - start >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    info = {"vbr": False}
+    header = parse_frame_header(data, start)
+    if header:
+        tag_pos = start + 4 + header["side_info"]
+        tag = data[tag_pos:tag_pos + 4]
+        info = {**header, "vbr": tag == b"Xing"}
+        if tag in (b"Xing", b"Info"):
+            start += header["length"]
+    return memoryview(data)[start:end], info
+
+
+# ───────── ffmpeg ─────────
+def encode_args(first: dict) -> list[str]:
+    if first.get("bitrate") and not first["vbr"]:
+        print(f"➡️ Mã hoá lại ở {first['bitrate']} bps (giữ nguyên như gốc).")
+        return ["-b:a", str(first["bitrate"])]
+    print("⚠️ Nguồn VBR hoặc không đọc được bitrate – dùng VBR chất lượng cao (q=0).")
+    return ["-q:a", "0"]
+
+
+def prep_cmd(output: str, speed: str, volume: str, encode: list[str], pcm: bool,
+             sample_rate: int = 16000) -> list[str]:
+    chain = f"atempo={speed},volume={volume}"
+    cmd = ["ffmpeg", "-y", "-nostdin", "-v", "error", "-f", "mp3", "-i", "pipe:0"]
+    if not pcm:
+        return cmd + ["-filter:a", chain, "-c:a", "libmp3lame", *encode, output]
+    return cmd + [
+        "-filter_complex", f"[0:a]{chain},asplit=2[enc][pcm]",
+        "-map", "[enc]", "-c:a", "libmp3lame", *encode, output,
+        "-map", "[pcm]", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1",
+    ]
+
+
+def _feed(zf: zipfile.ZipFile, names: list[str], first: memoryview, stdin):
+    try:
+        for k, name in enumerate(names):
+            stdin.write(first if k == 0 else strip_mp3(zf.read(name))[0])
+    except BrokenPipeError:
+        pass  # ffmpeg đã thoát; lỗi được báo qua returncode
+    finally:
+        stdin.close()
+
+
+def input_digest(zf: zipfile.ZipFile, names: list[str]) -> str:
+    """sha256 các frame audio của mọi member theo thứ tự (không tính tag)."""
+    h = hashlib.sha256()
+    for name in names:
+        h.update(strip_mp3(zf.read(name))[0])
+    return h.hexdigest()
+
+
+def prepare_audio(zip_path: str, output: str, speed: str = "1.0", volume: str = "1.0",
+                  pcm_consumer=None, chunk_size: int = 1 << 16) -> dict:
+    """Nối + atempo + volume trong một tiến trình ffmpeg.
+
+    pcm_consumer(chunks) nhận iterator các khối PCM s16le 16 kHz mono (stdout của ffmpeg)
+    và được gọi ở luồng chính trong lúc encode đang chạy.
+    """
+    t0 = time.monotonic()
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with zipfile.ZipFile(zip_path) as zf:
+        names = mp3_members(zf)
+        if not names:
+            raise ValueError(f"Không có file .mp3 nào trong {zip_path}")
+        print(f"🔗 {len(names)} file MP3 theo thứ tự: {', '.join(names)}")
+        first = strip_mp3(zf.read(names[0]))
+        cmd = prep_cmd(output, speed, volume, encode_args(first[1]), pcm_consumer is not None)
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE if pcm_consumer else None)
+        feeder = threading.Thread(target=_feed, args=(zf, names, first[0], proc.stdin), daemon=True)
+        feeder.start()
+        try:
+            if pcm_consumer:
+                pcm_consumer(iter(lambda: proc.stdout.read(chunk_size), b""))
+        finally:
+            if pcm_consumer:
+                proc.stdout.close()
+            proc.wait()
+            feeder.join()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    elapsed = time.monotonic() - t0
+    print(f"🐢 Đã tạo {output} (atempo={speed}, volume={volume}) trong {elapsed:.1f}s")
+    return {"files": len(names), "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concat MP3s from a zip, apply tempo and volume in one ffmpeg pass.")
+    parser.add_argument("zip")
+    parser.add_argument("--output", default="adjusted/audio_adjusted.mp3")
+    parser.add_argument("--speed", default=os.environ.get("SPEED", "1.0"))
+    parser.add_argument("--volume", default=os.environ.get("VOLUME", "1.0"))
+    parser.add_argument("--transcribe", metavar="SRT", help="Also transcribe the teed PCM into this SRT.")
+    parser.add_argument("--model", default=os.environ.get("WHISPER_MODEL", "medium"))
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--max-words-per-line", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("TRANSCRIBE_WORKERS", "2")))
+    parser.add_argument("--shard-seconds", type=float, default=300.0)
+    parser.add_argument("--min-silence-ms", type=int, default=300)
+    parser.add_argument("--cache-dir", default=None, help="Transcript cache directory (default .cache/transcripts).")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.zip):
+        print(f"❌ Không tìm thấy file: {args.zip}")
+        sys.exit(1)
+    if not args.transcribe:
+        prepare_audio(args.zip, args.output, args.speed, args.volume)
+        return
+
+    from audio_shard import transcribe_stream
+    from transcript_cache import open_transcript_cache, restore, transcript_key
+
+    cache, key = None, None
+    if not args.no_cache:
+        cache = open_transcript_cache(args.cache_dir)
+        with zipfile.ZipFile(args.zip) as zf:
+            digest = input_digest(zf, mp3_members(zf))
+        key = transcript_key(digest, args.model, args.language, args.speed, args.max_words_per_line,
+                             source="mp3-zip", volume=args.volume,
+                             sharded=[args.shard_seconds, args.min_silence_ms])
+        if restore(cache, key, args.transcribe):
+            print(f"♻️ Cache hit: {args.zip} → {args.transcribe} (bỏ qua Whisper)")
+            cache.report()
+            prepare_audio(args.zip, args.output, args.speed, args.volume)
+            return
+        print(f"🆕 Cache miss: {args.zip}")
+
+    if os.path.dirname(args.transcribe):
+        os.makedirs(os.path.dirname(args.transcribe), exist_ok=True)
+
+    def consume(chunks):
+        transcribe_stream(chunks, args.transcribe, args.model, args.language, args.max_words_per_line,
+                          args.workers, args.shard_seconds, args.min_silence_ms)
+
+    prepare_audio(args.zip, args.output, args.speed, args.volume, pcm_consumer=consume)
+    if cache:
+        cache.put_file(key, args.transcribe, {"audio": os.path.basename(args.zip), "model": args.model})
+        cache.report()
+
+
+if __name__ == "__main__":
+    main()
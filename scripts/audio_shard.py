@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+audio_shard.py
+Cắt một file audio dài tại các khoảng lặng thành nhiều shard có độ dài mục tiêu, rồi
+transcribe các shard song song trên worker pool của transcribe_worker.py và ghép các
+SRT word-level lại với offset chính xác.
+
+- Audio được decode một lần ra PCM 16 kHz mono (đúng định dạng Whisper dùng).
+- Năng lượng RMS theo frame 30 ms (NumPy); ngưỡng lặng thích ứng theo noise floor
+  của chính file. Điểm cắt là tâm khoảng lặng gần mốc mục tiêu nhất, nên không có từ
+  nào nằm vắt qua ranh giới shard.
+- Điểm cắt luôn rơi vào ranh giới frame (480 mẫu = 30 ms) ⇒ offset là số mili-giây
+  nguyên, không có sai số làm tròn khi dời SRT của shard.
+- SRT ghép xong được cache theo PCM + tham số (transcript_cache.py); hit thì không cắt,
+  không load model.
+- transcribe_stream nhận PCM đang được sinh ra (audio_prep.py tee từ ffmpeg) và cắt shard
+  ngay khi đủ 2 × shard, nên transcribe chồng lên thời gian encode.
+
+Usage:
+  python scripts/audio_shard.py adjusted/audio_adjusted.mp3 --output transcript.srt \\
+      --model medium --max-words-per-line 1 --shard-seconds 300 --workers 4
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from disk_cache import DiskCache
+from srt_model import SrtDocument
+from transcript_cache import open_transcript_cache, pcm_array_digest, restore, transcript_key
+from wav_writer import wav_header
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+
+def load_pcm(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode mọi định dạng ffmpeg đọc được thành float32 mono, như whisper.load_audio."""
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1",
+           "-ar", str(sample_rate), "-"]
+    raw = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+
+
+def frame_energy_db(pcm: np.ndarray, frame: int) -> np.ndarray:
+    """RMS (dBFS) của từng frame không chồng lấn; frame cuối thiếu được bỏ qua."""
+    n = len(pcm) // frame
+    frames = pcm[:n * frame].reshape(n, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1, dtype=np.float64))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def silence_threshold_db(db: np.ndarray, margin_db: float = 10.0, floor_db: float = -60.0) -> float:
+    """Noise floor (phân vị 10) + margin, không thấp hơn floor_db."""
+    if not len(db):
+        return floor_db
+    return max(float(np.percentile(db, 10)) + margin_db, floor_db)
+
+
+def find_silences(db: np.ndarray, threshold_db: float, min_frames: int) -> np.ndarray:
+    """Các đoạn [start, end) frame liên tiếp dưới ngưỡng, dài ≥ min_frames. Shape (k, 2)."""
+    quiet = np.concatenate(([False], db < threshold_db, [False]))
+    edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+    runs = edges.reshape(-1, 2)
+    return runs[(runs[:, 1] - runs[:, 0]) >= min_frames]
+
+
+def plan_cuts(pcm: np.ndarray, sample_rate: int = SAMPLE_RATE, shard_seconds: float = 300.0,
+              min_silence_ms: int = 300, frame_ms: int = FRAME_MS, margin_db: float = 10.0) -> list[int]:
+    """Danh sách điểm cắt (theo mẫu, luôn là bội của frame), gồm cả 0 và len(pcm).
+
+    Với mỗi mốc mục tiêu, chọn tâm khoảng lặng gần nhất trong cửa sổ ±50% shard; nếu
+    không có khoảng lặng nào thì cắt tại frame yên nhất trong cửa sổ đó.
+    """
+    frame = sample_rate * frame_ms // 1000
+    db = frame_energy_db(pcm, frame)
+    total_frames = len(db)
+    target = max(1, int(shard_seconds * 1000 / frame_ms))
+    if total_frames <= target * 1.5:
+        return [0, len(pcm)]
+    silences = find_silences(db, silence_threshold_db(db, margin_db), max(1, min_silence_ms // frame_ms))
+    centers = (silences[:, 0] + silences[:, 1]) // 2
+
+    cuts, pos = [0], 0
+    while total_frames - pos > target * 1.5:
+        goal = pos + target
+        lo, hi = pos + target // 2, min(pos + target * 3 // 2, total_frames - target // 2)
+        window = centers[(centers > lo) & (centers < hi)]
+        if len(window):
+            cut = int(window[np.argmin(np.abs(window - goal))])
+        else:
+            cut = lo + int(np.argmin(db[lo:hi]))
+        cuts.append(cut * frame)
+        pos = cut
+    cuts.append(len(pcm))
+    return cuts
+
+
+def write_wav(path: str, pcm: np.ndarray, sample_rate: int = SAMPLE_RATE) -> str:
+    data = (np.clip(pcm, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    with open(path, "wb") as f:
+        f.write(wav_header(len(data), sample_rate))
+        f.write(data)
+    return path
+
+
+def write_shards(pcm: np.ndarray, cuts: list[int], workdir: str, sample_rate: int = SAMPLE_RATE) -> list[str]:
+    """Ghi mỗi shard ra WAV PCM16 mono trong workdir."""
+    return [write_wav(os.path.join(workdir, f"shard_{k:04d}.wav"), pcm[a:b], sample_rate)
+            for k, (a, b) in enumerate(zip(cuts, cuts[1:]))]
+
+
+class StreamingSharder:
+    """Nhận PCM s16le mono theo từng khối và cắt shard ngay khi đủ dữ liệu.
+
+    Khi buffer đạt 2 × shard, plan_cuts trên buffer cho điểm cắt đầu tiên (chỉ phụ thuộc
+    vào ~1.5 shard đầu), shard đó được giao cho `on_shard(index, pcm)` và phần còn lại
+    giữ trong buffer. Điểm cắt là bội frame tính từ 0 nên offset vẫn là ms nguyên.
+    """
+
+    def __init__(self, on_shard, shard_seconds: float = 300.0, min_silence_ms: int = 300,
+                 sample_rate: int = SAMPLE_RATE):
+        self.on_shard = on_shard
+        self.shard_seconds = shard_seconds
+        self.min_silence_ms = min_silence_ms
+        self.sample_rate = sample_rate
+        self.cuts = [0]
+        self._buf = bytearray()
+        self._window = int(2 * shard_seconds * sample_rate) * 2  # byte
+
+    def _pcm(self) -> np.ndarray:
+        usable = len(self._buf) & ~1
+        return np.frombuffer(bytes(self._buf[:usable]), "<i2").astype(np.float32) / 32768.0
+
+    def _emit(self, pcm: np.ndarray):
+        self.cuts.append(self.cuts[-1] + len(pcm))
+        self.on_shard(len(self.cuts) - 2, pcm)
+
+    def feed(self, chunk: bytes):
+        self._buf += chunk
+        while len(self._buf) >= self._window:
+            pcm = self._pcm()
+            cut = plan_cuts(pcm, self.sample_rate, self.shard_seconds, self.min_silence_ms)[1]
+            self._emit(pcm[:cut])
+            del self._buf[:cut * 2]
+
+    def close(self):
+        pcm = self._pcm()
+        self._buf.clear()
+        if not len(pcm):
+            return
+        cuts = plan_cuts(pcm, self.sample_rate, self.shard_seconds, self.min_silence_ms)
+        for a, b in zip(cuts, cuts[1:]):
+            self._emit(pcm[a:b])
+
+
+def stitch(docs: list[SrtDocument], cuts: list[int], sample_rate: int = SAMPLE_RATE) -> SrtDocument:
+    """Kẹp cue của mỗi shard vào độ dài shard rồi dời theo offset của shard và nối lại."""
+    offsets = [a * 1000 // sample_rate for a in cuts[:-1]]
+    lengths = [(b - a) * 1000 // sample_rate for a, b in zip(cuts, cuts[1:])]
+    return SrtDocument.concat([d.clamped(n) for d, n in zip(docs, lengths)], offsets)
+
+
+def transcribe_sharded(audio_path: str, output_srt: str, model: str, language: str | None = None,
+                       max_words_per_line: int | None = None, workers: int = 2,
+                       shard_seconds: float = 300.0, min_silence_ms: int = 300,
+                       speed: float | str | None = None, cache: DiskCache | None = None) -> dict:
+    from transcribe_worker import run_batch
+
+    t0 = time.monotonic()
+    pcm = load_pcm(audio_path)
+    key = None
+    if cache:
+        key = transcript_key(pcm_array_digest(pcm), model, language, speed, max_words_per_line,
+                             sharded=[shard_seconds, min_silence_ms])
+        if restore(cache, key, output_srt):
+            print(f"♻️ Cache hit: {audio_path} → {output_srt} (bỏ qua Whisper)")
+            cache.report()
+            return {"shards": 0, "cached": True, "seconds": time.monotonic() - t0}
+        print(f"🆕 Cache miss: {audio_path}")
+    cuts = plan_cuts(pcm, SAMPLE_RATE, shard_seconds, min_silence_ms)
+    print(f"✂️ {audio_path}: {len(pcm) / SAMPLE_RATE:.0f}s audio → {len(cuts) - 1} shard "
+          f"(mục tiêu {shard_seconds:.0f}s, cắt tại {[round(c / SAMPLE_RATE, 1) for c in cuts[1:-1]]})")
+    workdir = tempfile.mkdtemp(prefix="shards_")
+    try:
+        shards = write_shards(pcm, cuts, workdir)
+        del pcm
+        jobs = [{"audio": p, "output_dir": workdir, "language": language,
+                 "max_words_per_line": max_words_per_line, "task": "transcribe"} for p in shards]
+        results = {r["audio"]: r for r in run_batch(jobs, model, workers)}
+        failed = [r for r in results.values() if r.get("error")]
+        if failed:
+            raise RuntimeError(f"{len(failed)} shard lỗi: {failed[0]['error']}")
+        docs = [SrtDocument.load(results[p]["srt"]) for p in shards]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    doc = stitch(docs, cuts)
+    doc.save(output_srt)
+    if cache:
+        cache.put_file(key, output_srt, {"audio": os.path.basename(audio_path), "model": model})
+        cache.report()
+    elapsed = time.monotonic() - t0
+    duration = cuts[-1] / SAMPLE_RATE
+    print(f"🧵 Đã ghép {len(doc)} cue → {output_srt} ({elapsed:.1f}s, RTF {elapsed / duration:.2f})")
+    return {"shards": len(cuts) - 1, "cues": len(doc), "seconds": elapsed, "rtf": elapsed / duration}
+
+
+def transcribe_stream(chunks, output_srt: str, model: str, language: str | None = None,
+                      max_words_per_line: int | None = None, workers: int = 2,
+                      shard_seconds: float = 300.0, min_silence_ms: int = 300) -> dict:
+    """Transcribe PCM s16le 16 kHz mono đang được sinh ra (vd. stdout của ffmpeg).
+
+    Pool được khởi động trước nên model load song song với việc decode/encode; mỗi shard
+    được transcribe ngay khi StreamingSharder cắt xong, rồi ghép lại như transcribe_sharded.
+    """
+    import multiprocessing as mp
+
+    from transcribe_worker import init_worker, safe_transcribe
+
+    t0 = time.monotonic()
+    workers = max(1, workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    workdir = tempfile.mkdtemp(prefix="shards_")
+    pending = []
+    try:
+        with mp.get_context("spawn").Pool(workers, initializer=init_worker, initargs=(model, threads)) as pool:
+            def on_shard(k, pcm):
+                path = write_wav(os.path.join(workdir, f"shard_{k:04d}.wav"), pcm)
+                job = {"audio": path, "output_dir": workdir, "language": language,
+                       "max_words_per_line": max_words_per_line, "task": "transcribe"}
+                print(f"✂️ Shard {k}: {len(pcm) / SAMPLE_RATE:.0f}s → worker "
+                      f"(sau {time.monotonic() - t0:.1f}s)")
+                pending.append(pool.apply_async(safe_transcribe, (job,)))
+
+            sharder = StreamingSharder(on_shard, shard_seconds, min_silence_ms)
+            for chunk in chunks:
+                sharder.feed(chunk)
+            sharder.close()
+            results = [r.get() for r in pending]
+        failed = [r for r in results if r.get("error")]
+        if failed:
+            raise RuntimeError(f"{len(failed)} shard lỗi: {failed[0]['error']}")
+        docs = [SrtDocument.load(r["srt"]) for r in results]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    doc = stitch(docs, sharder.cuts)
+    doc.save(output_srt)
+    elapsed = time.monotonic() - t0
+    duration = sharder.cuts[-1] / SAMPLE_RATE
+    print(f"🧵 Đã ghép {len(doc)} cue từ {len(results)} shard → {output_srt} "
+          f"({duration:.0f}s audio, {elapsed:.1f}s, RTF {elapsed / max(duration, 1e-6):.2f})")
+    return {"shards": len(results), "cues": len(doc), "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a long audio file in silence-aligned shards.")
+    parser.add_argument("audio")
+    parser.add_argument("--output", help="Output SRT (default: <output-dir>/<audio stem>.srt).")
+    parser.add_argument("--output-dir", default="output")
+    parser.add_argument("--model", default=os.environ.get("WHISPER_MODEL", "medium"))
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--max-words-per-line", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("TRANSCRIBE_WORKERS", "2")))
+    parser.add_argument("--shard-seconds", type=float, default=300.0)
+    parser.add_argument("--min-silence-ms", type=int, default=300)
+    parser.add_argument("--speed", default=None, help="atempo speed already applied to the audio (cache key only).")
+    parser.add_argument("--cache-dir", default=None, help="Transcript cache directory (default .cache/transcripts).")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.audio):
+        print(f"❌ Không tìm thấy file: {args.audio}")
+        sys.exit(1)
+    output = args.output or os.path.join(
+        args.output_dir, os.path.splitext(os.path.basename(args.audio))[0] + ".srt")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    cache = None if args.no_cache else open_transcript_cache(args.cache_dir)
+    transcribe_sharded(args.audio, output, args.model, args.language, args.max_words_per_line,
+                       args.workers, args.shard_seconds, args.min_silence_ms, args.speed, cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+bench_align_srt_to_content.py
+Benchmark align_srt_to_content.py's content splitting on synthetic content of growing
+size, to check it scales linearly.
+
+Content is random punctuated sentences split into paragraphs. The SRT blocks are those
+sentences cut into 4–12 word lines, lowercased and de-punctuated the way Whisper output
+often is, with a few misspellings.
+
+The baseline is a straight port of splitContent from align_srt_to_content.js: the
+remaining content is lowercased and stripped again for every indexOf hit, and the search
+advances one character at a time. It is quadratic in content size, so it only runs on
+sizes up to --baseline-kb.
+
+Usage:
+  python scripts/bench_align_srt_to_content.py --kb 50 200 800 --baseline-kb 50
+"""
+
+import argparse
+import random
+import re
+import time
+
+from align_srt_to_content import split_content, text_similarity
+
+WORDS = ("today we talk about everyday phrasal verbs and how native speakers really use them at work "
+         "at home and with friends so listen carefully and repeat after me because practice makes "
+         "perfect when you learn a language step by step every single day").split()
+
+
+def synthetic(kb: int, seed: int = 1) -> tuple[str, list[str]]:
+    rnd = random.Random(seed)
+    paragraphs, blocks, size = [], [], 0
+    while size < kb * 1024:
+        sentences = []
+        for _ in range(rnd.randint(2, 6)):
+            words = [rnd.choice(WORDS) for _ in range(rnd.randint(6, 24))]
+            sentence = " ".join(words).capitalize()
+            sentence = sentence.replace(" and ", ", and ", 1) + rnd.choice(".!?")
+            sentences.append(sentence)
+            i = 0
+            while i < len(words):
+                n = rnd.randint(4, 12)
+                line = [w if rnd.random() > 0.02 else w[:-1] + "e" for w in words[i:i + n]]
+                blocks.append(" ".join(line))
+                i += n
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs), blocks
+
+
+# ───────── baseline: port of splitContent (align_srt_to_content.js) ─────────
+_STRIP = re.compile(r"[^\w\s]|_")
+
+
+def _clean(s):
+    return " ".join(s.split())
+
+
+def baseline_split(raw: str, blocks: list[str]) -> list[str]:
+    txt = raw.replace("\r", "").strip()
+    segments, last_pos = [], 0
+    for i, text in enumerate(blocks):
+        s_clean = _STRIP.sub("", _clean(text)).lower().strip()
+        best_pos, best_sim, best_segment = -1, 0, ""
+        remaining = txt[last_pos:]
+        pos = 0
+        while True:
+            pos = _STRIP.sub("", remaining.lower()).find(s_clean, pos)
+            if pos == -1:
+                break
+            segment = remaining[pos:pos + len(text)].strip()
+            sim = text_similarity(s_clean, _STRIP.sub("", _clean(segment)).lower().strip())
+            if sim > best_sim:
+                best_sim, best_pos, best_segment = sim, last_pos + pos, segment
+            pos += 1
+        if best_sim < 0.5 and i + 1 < len(blocks):
+            next_clean = _STRIP.sub("", _clean(blocks[i + 1])).lower().strip()
+            pos = _STRIP.sub("", remaining.lower()).find(next_clean)
+            if pos != -1:
+                best_segment = remaining[:pos].strip()
+                best_pos = last_pos
+        if best_pos == -1:
+            segments.append("")
+        else:
+            segments.append(best_segment)
+            last_pos = best_pos + len(best_segment)
+    return segments
+
+
+def mean_similarity(blocks: list[str], segments: list[str]) -> float:
+    return sum(text_similarity(b, _STRIP.sub("", s).lower()) for b, s in zip(blocks, segments)) / len(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark indexed SRT/content alignment vs the JS splitContent.")
+    parser.add_argument("--kb", type=int, nargs="+", default=[50, 200, 800, 3200])
+    parser.add_argument("--baseline-kb", type=int, default=50, help="Run the baseline up to this size (0 = never).")
+    args = parser.parse_args()
+
+    print(f"{'engine':<26}{'content':>9}{'blocks':>8}{'wall':>9}{'µs/block':>10}  mean similarity")
+    for kb in args.kb:
+        content, blocks = synthetic(kb)
+        runs = [("align_srt_to_content.py", split_content)]
+        if kb <= args.baseline_kb:
+            runs.append(("JS splitContent port", baseline_split))
+        for name, fn in runs:
+            t0 = time.monotonic()
+            segments = fn(content, blocks)
+            elapsed = time.monotonic() - t0
+            print(f"{name:<26}{kb:>7}KB{len(blocks):>8}{elapsed:>8.2f}s{elapsed / len(blocks) * 1e6:>10.1f}"
+                  f"  {mean_similarity(blocks, segments) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+bench_audio_shard.py
+Benchmark audio_shard.py on synthetic speech-like audio: noise-burst "words" with
+short gaps, longer sentence pauses, and a low background noise floor.
+
+Whisper is replaced by a simulated transcriber so the benchmark runs anywhere. It
+detects words by energy, costs `--rtf` seconds per audio second plus a one-off model
+load per process, and, like whisper, reports a word cut in half at a shard edge as a
+(mis-timed) word in both shards.
+
+Three runs are compared against the known word timings:
+  single  – one process over the whole file
+  fixed   – fixed-length shards in parallel (no VAD)
+  silence – audio_shard.plan_cuts shards in parallel
+
+Usage:
+  python scripts/bench_audio_shard.py --minutes 20 --shard-seconds 120 --workers 4
+"""
+
+import argparse
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+from audio_shard import SAMPLE_RATE, frame_energy_db, plan_cuts, stitch
+from srt_model import Cue, SrtDocument
+
+_load_seconds = 0.0
+_rtf = 0.0
+
+
+def synthetic_speech(minutes: float, seed: int = 7) -> tuple[np.ndarray, list[tuple[int, int]]]:
+    """PCM float32 16 kHz và danh sách (start_ms, end_ms) của từng từ."""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    pcm = rng.normal(0, 0.002, total).astype(np.float32)
+    words, pos, in_sentence = [], int(0.5 * SAMPLE_RATE), 0
+    sentence_len = rng.integers(6, 16)
+    while True:
+        length = int(rng.uniform(0.15, 0.45) * SAMPLE_RATE)
+        if pos + length >= total - SAMPLE_RATE:
+            break
+        env = np.hanning(length) ** 0.3
+        burst = rng.normal(0, 1, length) * np.sin(2 * np.pi * rng.uniform(120, 300) * np.arange(length) / SAMPLE_RATE)
+        pcm[pos:pos + length] += (rng.uniform(0.1, 0.4) * env * burst).astype(np.float32)
+        words.append((pos * 1000 // SAMPLE_RATE, (pos + length) * 1000 // SAMPLE_RATE))
+        pos += length
+        in_sentence += 1
+        if in_sentence >= sentence_len:
+            pos += int(rng.uniform(0.4, 1.0) * SAMPLE_RATE)
+            in_sentence, sentence_len = 0, rng.integers(6, 16)
+        else:
+            pos += int(rng.uniform(0.06, 0.18) * SAMPLE_RATE)
+    return pcm, words
+
+
+def _init(load_seconds: float, rtf: float):
+    global _load_seconds, _rtf
+    _load_seconds, _rtf = load_seconds, rtf
+    time.sleep(load_seconds)  # "load model" một lần mỗi tiến trình
+
+
+def simulated_transcribe(pcm: np.ndarray) -> SrtDocument:
+    """Word-level SRT tương đối so với đầu shard, phát hiện bằng năng lượng frame 10 ms."""
+    time.sleep(len(pcm) / SAMPLE_RATE * _rtf)
+    db = frame_energy_db(pcm, SAMPLE_RATE // 100)
+    loud = np.concatenate(([False], db > -30, [False]))
+    runs = np.flatnonzero(np.diff(loud.astype(np.int8))).reshape(-1, 2)
+    merged = []
+    for a, b in runs:
+        if merged and a - merged[-1][1] <= 4:  # gộp khoảng hở < 40 ms trong cùng một từ
+            merged[-1][1] = b
+        elif b - a >= 3:
+            merged.append([a, b])
+    return SrtDocument.from_cues(Cue(i + 1, int(a) * 10, int(b) * 10, f"w{i + 1}") for i, (a, b) in enumerate(merged))
+
+
+def accuracy(doc: SrtDocument, words: list[tuple[int, int]]) -> dict:
+    """Ghép cue với từ gốc theo overlap > 50% độ dài từ."""
+    word_ends = np.array([w[1] for w in words])
+    hits = np.zeros(len(words), int)
+    errors, extra = [], 0
+    for s, e in zip(doc.starts, doc.ends):
+        best = None
+        lo = max(0, int(np.searchsorted(word_ends, s)) - 1)
+        for j in range(lo, min(len(words), lo + 3)):
+            ws, we = words[j]
+            if min(e, we) - max(s, ws) > 0.5 * (we - ws):
+                best = j
+                break
+        if best is None:
+            extra += 1
+        else:
+            hits[best] += 1
+            errors.append(abs(s - words[best][0]))
+    return {"missing": int((hits == 0).sum()), "duplicated": int((hits > 1).sum()), "extra": extra,
+            "mean_err_ms": float(np.mean(errors)) if errors else 0.0,
+            "max_err_ms": int(max(errors)) if errors else 0}
+
+
+def run_sharded(pcm: np.ndarray, cuts: list[int], workers: int, load_seconds: float, rtf: float):
+    t0 = time.monotonic()
+    shards = [pcm[a:b] for a, b in zip(cuts, cuts[1:])]
+    with get_context("spawn").Pool(min(workers, len(shards)), initializer=_init,
+                                   initargs=(load_seconds, rtf)) as pool:
+        docs = pool.map(simulated_transcribe, shards)
+    return stitch(docs, cuts), time.monotonic() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark silence-based audio sharding.")
+    parser.add_argument("--minutes", type=float, default=20)
+    parser.add_argument("--shard-seconds", type=float, default=120)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rtf", type=float, default=0.02, help="Simulated seconds of compute per audio second.")
+    parser.add_argument("--load-seconds", type=float, default=1.0, help="Simulated model load per process.")
+    args = parser.parse_args()
+
+    pcm, words = synthetic_speech(args.minutes)
+    print(f"Synthetic audio: {args.minutes:.0f} min, {len(words)} words")
+
+    rows = []
+    single, t_single = run_sharded(pcm, [0, len(pcm)], 1, args.load_seconds, args.rtf)
+    rows.append(("single", 1, t_single, accuracy(single, words)))
+
+    step = int(args.shard_seconds * SAMPLE_RATE)
+    fixed = list(range(0, len(pcm), step)) + [len(pcm)]
+    doc, t = run_sharded(pcm, fixed, args.workers, args.load_seconds, args.rtf)
+    rows.append(("fixed", len(fixed) - 1, t, accuracy(doc, words)))
+
+    t0 = time.monotonic()
+    cuts = plan_cuts(pcm, SAMPLE_RATE, args.shard_seconds)
+    t_plan = time.monotonic() - t0
+    doc, t = run_sharded(pcm, cuts, args.workers, args.load_seconds, args.rtf)
+    rows.append(("silence", len(cuts) - 1, t + t_plan, accuracy(doc, words)))
+
+    print(f"{'run':<9}{'shards':>7}{'wall':>9}{'speedup':>9}{'missing':>9}{'dup':>6}{'extra':>7}"
+          f"{'mean err':>10}{'max err':>9}")
+    for name, n, t, acc in rows:
+        print(f"{name:<9}{n:>7}{t:>8.2f}s{t_single / t:>8.1f}x{acc['missing']:>9}{acc['duplicated']:>6}"
+              f"{acc['extra']:>7}{acc['mean_err_ms']:>8.1f}ms{acc['max_err_ms']:>7}ms")
+    print(f"(plan_cuts took {t_plan * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
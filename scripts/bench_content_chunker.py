@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+bench_content_chunker.py
+Benchmark content_chunker.py on synthetic multi-megabyte content: sentence splitting plus
+two packers (TTS chunks ≤ 1500 chars, slides 200/100) in one streaming pass.
+
+The baseline is a straight port of processRawContent from
+generate_timing_json_with_parser_v2.js: greedy packing, then the forward and backward
+min-char passes that split/join every slide word by word and splice the slide array. It
+is fed by the same sentence splitter, because compromise has no Python equivalent. The
+compromise pass over the whole document, the main cost of the JS tools, is therefore not
+part of the comparison. The baseline only runs on sizes up to --baseline-mb.
+
+Each run also re-chunks the file with a different read block size and checks the output is
+identical, since TTS/slide caches are keyed on chunk text.
+
+Usage:
+  python scripts/bench_content_chunker.py --mb 1 4 16 --baseline-mb 1
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from content_chunker import ChunkPacker, chunk_sentences, iter_sentences, read_pieces
+
+WORDS = ("today we talk about everyday phrasal verbs and how native speakers really use them at work "
+         "at home and with friends so listen carefully and repeat after me because practice makes "
+         "perfect when you learn a language step by step every single day").split()
+
+
+def synthetic_content(path: str, mb: float, seed: int = 1):
+    rnd = random.Random(seed)
+    size, target = 0, int(mb * 1024 * 1024)
+    with open(path, "w", encoding="utf-8") as f:
+        while size < target:
+            sentences = []
+            for _ in range(rnd.randint(2, 8)):
+                n = rnd.choice((2, 3, 5, 8, 12, 20, 45))  # câu ngắn để pass min-char có việc làm
+                sentences.append(" ".join(rnd.choice(WORDS) for _ in range(n)).capitalize()
+                                 + rnd.choice((".", ".", "!", "?")))
+            paragraph = " ".join(sentences) + "\n\n"
+            f.write(paragraph)
+            size += len(paragraph)
+
+
+# ───────── baseline: port of processRawContent (generate_timing_json_with_parser_v2.js) ─────────
+def baseline_process(sentences: list[str], max_chars: int, min_chars: int) -> list[str]:
+    slides = []
+
+    def push(chunk):
+        chunk = chunk.strip()
+        if not chunk:
+            return
+        if len(chunk) <= max_chars:
+            slides.append(chunk)
+            return
+        piece = ""
+        tokens = chunk.split()
+        for idx, tok in enumerate(tokens):
+            sep = " " if idx < len(tokens) - 1 else ""
+            if len(piece + tok + sep) > max_chars:
+                slides.append(piece.strip())
+                piece = ""
+            piece += tok + sep
+        if piece.strip():
+            slides.append(piece.strip())
+
+    current = ""
+    for sent in sentences:
+        add = sent.strip() + " "
+        if len(current + add) <= max_chars:
+            current += add
+        else:
+            push(current)
+            current = add
+    push(current)
+
+    i = 0
+    while i < len(slides) - 1:
+        if len(slides[i]) < min_chars:
+            next_words = slides[i + 1].split()
+            while len(slides[i]) < min_chars and next_words and len(slides[i]) + 1 + len(next_words[0]) <= max_chars:
+                slides[i] += " " + next_words.pop(0)
+            slides[i + 1] = " ".join(next_words)
+            if not slides[i + 1]:
+                slides.pop(i + 1)
+                continue
+        i += 1
+    i = len(slides) - 1
+    while i > 0:
+        if len(slides[i]) < min_chars:
+            prev_words = slides[i - 1].split()
+            while len(slides[i]) < min_chars and prev_words and len(slides[i]) + 1 + len(prev_words[-1]) <= max_chars:
+                slides[i] = prev_words.pop() + " " + slides[i]
+            slides[i - 1] = " ".join(prev_words)
+            if not slides[i - 1]:
+                slides.pop(i - 1)
+                i += 1
+        i -= 1
+    return [s.strip() for s in slides if s.strip()]
+
+
+def stats(chunks: list[str], min_chars: int) -> str:
+    short = sum(len(c) < min_chars for c in chunks[:-1])
+    return f"{len(chunks)} chunks, max {max(map(len, chunks))}, {short} below min"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming content chunking vs processRawContent.")
+    parser.add_argument("--mb", type=float, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--baseline-mb", type=float, default=1, help="Run the baseline up to this size (0 = never).")
+    parser.add_argument("--max-char", type=int, default=200)
+    parser.add_argument("--min-char", type=int, default=100)
+    parser.add_argument("--chunk-max", type=int, default=1500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_chunker_") as tmp:
+        for mb in args.mb:
+            path = os.path.join(tmp, f"content_{mb}.txt")
+            synthetic_content(path, mb)
+
+            def run(block_size, tts=True):
+                packers = {"slides": ChunkPacker(args.max_char, args.min_char)}
+                if tts:
+                    packers["tts"] = ChunkPacker(args.chunk_max)
+                return chunk_sentences(iter_sentences(read_pieces(path, block_size)), packers)
+
+            print(f"\n{mb:g} MB content")
+            t0 = time.monotonic()
+            out = run(1 << 16, tts=False)
+            elapsed = time.monotonic() - t0
+            print(f"  {'content_chunker, slides':<34}{elapsed:7.2f}s {mb / elapsed:6.1f} MB/s  "
+                  f"{stats(out['slides'], args.min_char)}")
+            t0 = time.monotonic()
+            out = run(1 << 16)
+            elapsed = time.monotonic() - t0
+            stable = run(4093) == out
+            print(f"  {'content_chunker, slides + tts':<34}{elapsed:7.2f}s {mb / elapsed:6.1f} MB/s  "
+                  f"{len(out['tts'])} tts chunks; "
+                  f"{'same output for another block size' if stable else 'OUTPUT DEPENDS ON BLOCK SIZE'}")
+
+            if mb <= args.baseline_mb:
+                t0 = time.monotonic()
+                sentences = list(iter_sentences(read_pieces(path)))
+                base = baseline_process(sentences, args.max_char, args.min_char)
+                elapsed = time.monotonic() - t0
+                print(f"  {'processRawContent port, slides':<34}{elapsed:7.2f}s {mb / elapsed:6.1f} MB/s  "
+                      f"{stats(base, args.min_char)}")
+
+
+if __name__ == "__main__":
+    main()
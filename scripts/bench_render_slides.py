@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+bench_render_slides.py
+Benchmark render_slides.py against the legacy chain
+  node scripts/gen_slides.js → soffice --convert-to pdf → pdftoppm -png -r DPI
+
+Both runs use the same synthetic timings.json (sentences of varying length) and the
+same config. The legacy chain is skipped, with a note, when node/pptxgenjs, soffice
+or pdftoppm are not available.
+
+Usage:
+  python scripts/bench_render_slides.py --slides 200 --config-key anksEnglish --dpi 192
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from render_slides import render_slides
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORDS = ("today we talk about everyday phrasal verbs and how native speakers really use them "
+         "at work at home and with friends so listen carefully and repeat after me").split()
+
+
+def synthetic_timings(n: int) -> list[dict]:
+    return [{"text": " ".join(WORDS[i % 7:i % 7 + 8 + i % 17]).capitalize() + ".", "timing": 3.0}
+            for i in range(n)]
+
+
+def timed(cmd: list[str], cwd: str, env: dict | None = None) -> float:
+    t0 = time.monotonic()
+    subprocess.run(cmd, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.monotonic() - t0
+
+
+def legacy_chain(workdir: str, config_key: str, dpi: float) -> dict | None:
+    missing = [tool for tool in ("node", "soffice", "pdftoppm") if not shutil.which(tool)]
+    if missing:
+        print(f"(legacy chain skipped: {', '.join(missing)} not found)")
+        return None
+    os.symlink(os.path.join(REPO, "configs"), os.path.join(workdir, "configs"))
+    os.symlink(os.path.join(REPO, "assets"), os.path.join(workdir, "assets"))
+    env = {**os.environ, "CONFIG_KEY": config_key}
+    try:
+        t_pptx = timed(["node", os.path.join(REPO, "scripts", "gen_slides.js")], workdir, env)
+    except subprocess.CalledProcessError:
+        print("(legacy chain skipped: gen_slides.js failed – is pptxgenjs installed?)")
+        return None
+    t_pdf = timed(["soffice", "--headless", "--convert-to", "pdf", "--outdir", "slides_pdf", "slides.pptx"], workdir)
+    os.makedirs(os.path.join(workdir, "slides_png"), exist_ok=True)
+    t_png = timed(["pdftoppm", "-png", "-r", str(dpi), "slides_pdf/slides.pdf", "slides_png/slide"], workdir)
+    return {"pptx": t_pptx, "pdf": t_pdf, "png": t_png}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark direct slide rendering vs soffice/pdftoppm.")
+    parser.add_argument("--slides", type=int, default=100)
+    parser.add_argument("--config-key", default="anksEnglish")
+    parser.add_argument("--dpi", type=float, default=192)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    config = os.path.join(REPO, "configs", f"{args.config_key}.json")
+    with open(config, encoding="utf-8") as f:
+        background = os.path.join(REPO, json.load(f)["background"])
+    fonts = os.path.join(REPO, "assets", "fonts")
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench_slides_") as tmp:
+        timings = os.path.join(tmp, "timings.json")
+        with open(timings, "w", encoding="utf-8") as f:
+            json.dump(synthetic_timings(args.slides), f)
+
+        for workers in sorted({1, args.workers}):
+            out = os.path.join(tmp, f"direct_{workers}")
+            t0 = time.monotonic()
+            render_slides(config, timings, out, args.dpi, workers, background, fonts)
+            rows.append((f"render_slides ×{workers}", time.monotonic() - t0))
+
+        legacy = legacy_chain(tmp, args.config_key, args.dpi)
+        if legacy:
+            rows.append(("gen_slides.js", legacy["pptx"]))
+            rows.append(("soffice → pdf", legacy["pdf"]))
+            rows.append(("pdftoppm → png", legacy["png"]))
+            rows.append(("legacy total", sum(legacy.values())))
+
+    print(f"\n{args.slides} slides @ {args.dpi:.0f} dpi, config {args.config_key}")
+    print(f"{'stage':<22}{'wall':>9}{'per slide':>12}")
+    for name, t in rows:
+        print(f"{name:<22}{t:>8.2f}s{t / args.slides * 1000:>10.1f}ms")
+    if legacy:
+        best = min(t for name, t in rows if name.startswith("render_slides"))
+        print(f"speedup vs legacy: {sum(legacy.values()) / best:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+bench_slide_timing.py
+Benchmark slide_timing.py on a synthetic word-level transcript (one cue per word, the
+shape whisper produces with max_words_per_line 1).
+
+Slides are random sentences of 8–40 words. The transcript is the same words, optionally
+with whisper-like noise: misspellings, dropped words and inserted fillers. Slide
+boundaries are checked against the known ground truth.
+
+Every case runs at --match-threshold (default 90, the workflow value) and reports how
+many slides fall below it. The "dropped" case (misspellings and dropped words, no fillers)
+is the usual Whisper output and should have none; inserted fillers lower the confidence
+the same way they do in the JS fuzzyMatchAverage.
+
+The baseline is a straight port of generateTimings from
+generate_timing_json_with_parser_v2.js: the SRT is re-normalized per slide, every slide
+word is compared with every SRT word using a full Levenshtein matrix, and the SRT list is
+spliced after each slide. It is quadratic per slide, so it only runs on the first
+--baseline-words words and the clean transcript (it throws on noise beyond maxOffset).
+
+Usage:
+  python scripts/bench_slide_timing.py --words 50000 --noise 0.03
+"""
+
+import argparse
+import random
+import time
+
+from slide_timing import SlideTimingError, slide_timings
+from srt_model import SrtDocument, format_time
+from text_match import normalize_tokens
+
+STEMS = ("speak listen answer travel order pay book check call meet work learn teach open close "
+         "start finish help need want like love hate enjoy visit cook clean drive ride walk run "
+         "phrase verb idiom sentence question meeting office station airport hotel ticket coffee "
+         "weather weekend holiday family friend teacher doctor manager customer problem answer").split()
+ENDINGS = ("", "s", "ed", "ing", "er", "ly", "ment", "ful")
+FILLERS = ("um", "uh", "so", "well")
+
+
+def synthetic_script(words: int, seed: int) -> list[str]:
+    rnd = random.Random(seed)
+    vocab = [s + e for s in STEMS for e in ENDINGS]
+    slides, total = [], 0
+    while total < words:
+        n = min(rnd.randint(8, 40), words - total)
+        slides.append(" ".join(rnd.choice(vocab) for _ in range(n)).capitalize() + ".")
+        total += n
+    return slides
+
+
+def misspell(word: str, rnd: random.Random) -> str:
+    i = rnd.randrange(len(word))
+    return word[:i] + rnd.choice("aeiou") + word[i + 1:]
+
+
+def synthetic_transcript(slides: list[str], noise: float, seed: int,
+                         fillers: bool = True) -> tuple[SrtDocument, list[list[int]]]:
+    """Word-level SRT và, cho mỗi slide, [cuối từ cuối còn trong SRT, đầu cue kế tiếp] (ms)."""
+    rnd = random.Random(seed)
+    blocks, truth, t, last_word_end = [], [], 0, 0
+
+    def cue(word):
+        nonlocal t
+        start = t + rnd.randint(20, 120)
+        if truth and len(truth[-1]) == 1:
+            truth[-1].append(start)
+        t = start + rnd.randint(120, 500)
+        blocks.append(f"{len(blocks) + 1}\n{format_time(start)} --> {format_time(t)}\n{word}")
+
+    for slide in slides:
+        for word in normalize_tokens(slide):
+            roll = rnd.random()
+            if roll < noise / 3:
+                t += rnd.randint(120, 500)  # Whisper bỏ sót từ
+                continue
+            cue(misspell(word, rnd) if roll < 2 * noise / 3 and len(word) > 4 else word)
+            last_word_end = t
+            if fillers and roll > 1 - noise / 3:
+                cue(rnd.choice(FILLERS))
+        truth.append([last_word_end])
+        t += rnd.randint(200, 900)  # ngắt giữa hai câu
+    return SrtDocument.parse("\n\n".join(blocks) + "\n"), truth
+
+
+# ───────── baseline: port of generateTimings (generate_timing_json_with_parser_v2.js) ─────────
+def _normalize_text(text):
+    return " ".join(normalize_tokens(text))
+
+
+def _levenshtein(s1, s2):
+    matrix = [[i] + [0] * len(s2) for i in range(len(s1) + 1)]
+    matrix[0] = list(range(len(s2) + 1))
+    for i in range(1, len(s1) + 1):
+        for j in range(1, len(s2) + 1):
+            matrix[i][j] = min(matrix[i - 1][j] + 1, matrix[i][j - 1] + 1,
+                               matrix[i - 1][j - 1] + (s1[i - 1] != s2[j - 1]))
+    return matrix[-1][-1]
+
+
+def _fuzzy_match_average(arr1, arr2):
+    total = 0.0
+    for a in arr1:
+        total += max((1 - _levenshtein(a, b) / max(len(a), len(b), 1) for b in arr2), default=0)
+    return total / len(arr1) * 100
+
+
+def baseline_timings(cues: list[dict], slides: list[str], match_threshold=90, max_offset=3) -> list[dict]:
+    available = list(cues)
+    timings, last_end = [], 0
+    for slide in slides:
+        slide_split = _normalize_text(slide).split()
+        if not slide_split:
+            continue
+        srt_split = [_normalize_text(c["text"]) for c in available[:len(slide_split)]]
+        if slide_split[-1] != srt_split[-1]:
+            pop = next((i + 1 for i in range(max_offset) if i < len(srt_split)
+                        and srt_split[-1 - i] == slide_split[-1]), 0)
+            while pop > 1:
+                srt_split.pop()
+                pop -= 1
+            push = next((i + 1 for i in range(max_offset) if len(slide_split) + i < len(available)
+                         and _normalize_text(available[len(slide_split) + i]["text"]) == slide_split[-1]), 0)
+            srt_split += [_normalize_text(c["text"]) for c in available[len(slide_split):len(slide_split) + push]]
+        if _fuzzy_match_average(srt_split, slide_split) < match_threshold:
+            raise ValueError("not equalWithPercentage")
+        end_index = len(srt_split) - 1
+        if end_index == len(available) - 1:
+            end = available[end_index]["end"]
+        else:
+            end = (available[end_index + 1]["start"] + available[end_index]["end"]) * 0.5
+        timings.append({"text": slide, "timing": round((end - last_end) / 1000, 2)})
+        last_end = end
+        del available[:end_index + 1]
+    return timings
+
+
+def boundary_error(timings: list[dict], truth: list[list[int]]) -> float:
+    """Sai số lớn nhất (ms) của ranh giới slide so với khoảng lặng thật giữa hai slide."""
+    t, worst = 0.0, 0.0
+    for row, (gap_start, gap_end) in zip(timings[:-1], truth[:-1]):
+        t += row["timing"] * 1000
+        worst = max(worst, gap_start - t, t - gap_end)
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark slide_timing.py vs a port of the JS generateTimings.")
+    parser.add_argument("--words", type=int, default=50000)
+    parser.add_argument("--noise", type=float, default=0.03, help="Fraction of words misspelled/dropped/padded.")
+    parser.add_argument("--band", type=int, default=32)
+    parser.add_argument("--match-threshold", type=float, default=90)
+    parser.add_argument("--baseline-words", type=int, default=3000, help="0 = skip the baseline.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    slides = synthetic_script(args.words, args.seed)
+    rows = []
+    cases = (("clean", 0.0, False), (f"dropped {args.noise:.0%}", args.noise, False),
+             (f"noise {args.noise:.0%}", args.noise, True))
+    for label, noise, fillers in cases:
+        doc, truth = synthetic_transcript(slides, noise, args.seed, fillers)
+        t0 = time.monotonic()
+        try:
+            timings, flagged = slide_timings(doc, slides, match_threshold=args.match_threshold, band=args.band), 0
+        except SlideTimingError as e:
+            timings, flagged = None, len(e.problems)
+        elapsed = time.monotonic() - t0
+        if timings is None:  # chạy lại không ngưỡng chỉ để đo ranh giới
+            timings = slide_timings(doc, slides, match_threshold=0, band=args.band)
+        low = min(t["confidence"] for t in timings)
+        rows.append((f"slide_timing ({label})", args.words, elapsed,
+                     f"{flagged} below {args.match_threshold:g}%, min conf {low:.1f}%, "
+                     f"max boundary err {boundary_error(timings, truth):.0f} ms"))
+
+    if args.baseline_words:
+        head, total = [], 0
+        for slide in slides:
+            head.append(slide)
+            total += len(normalize_tokens(slide))
+            if total >= args.baseline_words:
+                break
+        doc, truth = synthetic_transcript(head, 0.0, args.seed)
+        cues = [c._asdict() for c in doc]
+        t0 = time.monotonic()
+        base = baseline_timings(cues, head)
+        elapsed = time.monotonic() - t0
+        same = base == [{"text": t["text"], "timing": t["timing"]} for t in slide_timings(doc, head)]
+        rows.append(("JS generateTimings port", total, elapsed, "same output" if same else "OUTPUT DIFFERS"))
+
+    print(f"\n{len(slides)} slides, {args.words} words, band {args.band}")
+    print(f"{'engine':<32}{'words':>8}{'wall':>9}{'µs/word':>10}  notes")
+    for name, words, t, note in rows:
+        print(f"{name:<32}{words:>8}{t:>8.2f}s{t / words * 1e6:>10.1f}  {note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+bench_srt_model.py
+Parse/serialize benchmark for srt_model.SrtDocument on a synthetic word-level
+transcript (the shape whisper produces with max_words_per_line 1).
+
+The baseline is a straight port of the per-cue parseSRT used by the JS tools:
+one regex match and one dict per cue, and string formatting per cue on output.
+
+Usage:
+  python scripts/bench_srt_model.py --cues 50000 --repeat 3
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+from srt_model import SrtDocument, format_time
+
+WORDS = ("the of and to in is you that it he was for on are as with his they at be this "
+         "have from or one had by word but not what all were we when your can said").split()
+
+
+def synthetic_srt(n: int, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    t = 0
+    blocks = []
+    for i in range(1, n + 1):
+        start = t + rnd.randint(0, 120)
+        end = start + rnd.randint(80, 600)
+        t = end
+        blocks.append(f"{i}\n{format_time(start)} --> {format_time(end)}\n{rnd.choice(WORDS)}")
+    return "\n\n".join(blocks) + "\n"
+
+
+# ───────── baseline: one object per cue (port of parseSRT in the JS tools) ─────────
+BASE_RE = re.compile(r"(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?)(?=\n{2}|$)")
+
+
+def _to_ms(ts):
+    h, m, rest = ts.split(":")
+    s, ms = rest.split(",")
+    return int(h) * 3600000 + int(m) * 60000 + int(s) * 1000 + int(ms)
+
+
+def baseline_parse(raw):
+    return [{"id": int(m.group(1)), "start": _to_ms(m.group(2)), "end": _to_ms(m.group(3)),
+             "text": m.group(4).replace("\n", " ").strip()}
+            for m in BASE_RE.finditer(raw.replace("\r", ""))]
+
+
+def baseline_serialize(cues):
+    out = ""
+    for c in cues:
+        out += f"{c['id']}\n{format_time(c['start'])} --> {format_time(c['end'])}\n{c['text']}\n\n"
+    return out
+
+
+def baseline_shift(cues, ms):
+    return [{**c, "start": c["start"] + ms, "end": c["end"] + ms} for c in cues]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    keep = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del keep
+    return peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark srt_model parse/serialize.")
+    parser.add_argument("--cues", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    raw = synthetic_srt(args.cues)
+    print(f"Synthetic SRT: {args.cues} cues, {len(raw) / 1e6:.1f} MB")
+
+    doc = SrtDocument.parse(raw)
+    base = baseline_parse(raw)
+    if len(doc) != len(base) or doc.texts()[:100] != [c["text"] for c in base[:100]]:
+        sys.exit("❌ srt_model and baseline disagree")
+    if doc.serialize() != raw:
+        sys.exit("❌ round-trip mismatch")
+
+    rows = [
+        ("parse", lambda: SrtDocument.parse(raw), lambda: baseline_parse(raw)),
+        ("serialize", doc.serialize, lambda: baseline_serialize(base)),
+        ("shift", lambda: doc.shifted(1500), lambda: baseline_shift(base, 1500)),
+        ("scale (atempo)", lambda: doc.scaled(1 / 0.8), None),
+        ("validate", doc.validate, None),
+    ]
+    print(f"{'operation':<16}{'srt_model':>12}{'baseline':>12}{'speedup':>10}")
+    for name, fast, slow in rows:
+        t_fast, _ = timed(fast, args.repeat)
+        if slow:
+            t_slow, _ = timed(slow, args.repeat)
+            print(f"{name:<16}{t_fast * 1000:>10.1f}ms{t_slow * 1000:>10.1f}ms{t_slow / t_fast:>9.1f}x")
+        else:
+            print(f"{name:<16}{t_fast * 1000:>10.1f}ms{'-':>12}{'-':>10}")
+
+    print(f"{'peak memory':<16}{peak_mb(lambda: SrtDocument.parse(raw)):>10.1f}MB"
+          f"{peak_mb(lambda: baseline_parse(raw)):>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
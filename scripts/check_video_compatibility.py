@@ -1,37 +1,120 @@
+"""
+check_video_compatibility.py
+Probe video bằng một lệnh `ffprobe -show_streams -show_format` (JSON) cho mỗi file,
+probe nhiều file song song, cache kết quả theo path+size+mtime (intro.mp4 được probe
+ở mọi run), và kiểm tra N file có concat bằng stream copy được hay không.
+
+Usage:
+  python scripts/check_video_compatibility.py intro.mp4 output.mp4 [more.mp4 ...] [--json verdict.json]
+
+Env:
+  FFPROBE_CACHE_DIR   thư mục cache kết quả probe (mặc định .cache/ffprobe, rỗng = tắt)
+"""
+
+import argparse
+import json
+import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
 
-def get_video_info(filename):
-    cmd = [
-        "ffprobe", "-v", "error",
-        "-select_streams", "v:0",
-        "-show_entries", "stream=width,height,r_frame_rate",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        filename
-    ]
-    width, height, r_frame_rate = subprocess.check_output(cmd).decode().strip().split('\n')
-    fps = eval(r_frame_rate)
-
-    cmd_audio = [
-        "ffprobe", "-v", "error",
-        "-select_streams", "a:0",
-        "-show_entries", "stream=sample_rate,channels",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        filename
-    ]
-    try:
-        sample_rate, channels = subprocess.check_output(cmd_audio).decode().strip().split('\n')
-    except subprocess.CalledProcessError:
-        sample_rate, channels = "none", "none"  # no audio track
+from disk_cache import DiskCache, make_key
+
+CACHE_DIR = os.environ.get("FFPROBE_CACHE_DIR", ".cache/ffprobe")
+
+# Tham số phải trùng nhau để concat demuxer + `-c copy` cho ra file hợp lệ
+VIDEO_PARAMS = ("codec_name", "profile", "width", "height", "pix_fmt", "r_frame_rate",
+                "time_base", "sample_aspect_ratio", "field_order")
+AUDIO_PARAMS = ("codec_name", "profile", "sample_rate", "channels", "channel_layout", "sample_fmt")
+
+_cache = None
+
+
+def _probe_cache() -> DiskCache | None:
+    global _cache
+    if _cache is None and CACHE_DIR:
+        _cache = DiskCache(CACHE_DIR, 64 * 1024 * 1024, name="ffprobe cache")
+    return _cache
+
+
+def probe(filename, use_cache=True):
+    """Toàn bộ output JSON của ffprobe (streams + format) cho một file."""
+    st = os.stat(filename)
+    cache = _probe_cache() if use_cache else None
+    key = make_key("ffprobe-v1", os.path.abspath(filename), st.st_size, st.st_mtime_ns)
+    if cache:
+        found = cache.get_bytes(key)
+        if found:
+            return json.loads(found[0])
+    cmd = ["ffprobe", "-v", "error", "-print_format", "json", "-show_streams", "-show_format", filename]
+    out = subprocess.check_output(cmd)
+    if cache:
+        cache.put_bytes(key, out, {"file": filename})
+    return json.loads(out)
+
+
+def probe_many(filenames, workers=8, use_cache=True):
+    """Probe song song; trả về dict {filename: probe} theo đúng thứ tự đầu vào."""
+    unique = list(dict.fromkeys(filenames))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(unique)))) as pool:
+        results = pool.map(lambda f: probe(f, use_cache), unique)
+        return dict(zip(unique, results))
+
+
+def _first_stream(info, codec_type):
+    return next((s for s in info.get("streams", []) if s.get("codec_type") == codec_type), None)
 
+
+def stream_params(info):
+    """Các tham số ảnh hưởng tới concat stream copy, dạng {"video.width": 1920, ...}."""
+    params = {}
+    for codec_type, names in (("video", VIDEO_PARAMS), ("audio", AUDIO_PARAMS)):
+        stream = _first_stream(info, codec_type)
+        if stream is None:
+            params[codec_type] = "none"
+            continue
+        for name in names:
+            value = stream.get(name)
+            if name in ("r_frame_rate", "time_base") and value:
+                value = str(Fraction(value))
+            params[f"{codec_type}.{name}"] = value
+    return params
+
+
+def check_concat(filenames, workers=8, use_cache=True):
+    """Verdict N-way: stream copy được không, và nếu không thì khác nhau ở tham số nào."""
+    infos = probe_many(filenames, workers, use_cache)
+    params = {f: stream_params(info) for f, info in infos.items()}
+    keys = sorted({k for p in params.values() for k in p})
+    differences = {}
+    for key in keys:
+        values = {f: p.get(key) for f, p in params.items()}
+        if len({json.dumps(v) for v in values.values()}) > 1:
+            differences[key] = values
+    stream_copy = not differences
+    return {
+        "files": list(infos),
+        "stream_copy": stream_copy,
+        "verdict": "stream-copy concat possible" if stream_copy else "re-encode needed",
+        "differences": differences,
+        "params": params,
+    }
+
+
+def get_video_info(filename):
+    info = probe(filename)
+    video = _first_stream(info, "video")
+    audio = _first_stream(info, "audio")
     return {
-        "width": int(width),
-        "height": int(height),
-        "fps": float(fps),
-        "sample_rate": sample_rate,
-        "channels": channels
+        "width": int(video["width"]),
+        "height": int(video["height"]),
+        "fps": float(Fraction(video["r_frame_rate"])),
+        "sample_rate": audio["sample_rate"] if audio else "none",  # no audio track
+        "channels": str(audio["channels"]) if audio else "none"
     }
 
+
 def compare_videos(file1, file2):
     info1 = get_video_info(file1)
     info2 = get_video_info(file2)
@@ -50,10 +133,37 @@ def compare_videos(file1, file2):
         print("✅ Files are compatible for concat.")
     else:
         print("❌ Files are NOT compatible. Consider normalizing before concat.")
+    return compatible
+
+
+def print_verdict(verdict):
+    for f, p in verdict["params"].items():
+        print(f"Info for {f}: {p}")
+    for key, values in verdict["differences"].items():
+        shown = ", ".join(f"{f}({v})" for f, v in values.items())
+        print(f"⚠️ Mismatch in {key}: {shown}")
+    if verdict["stream_copy"]:
+        print("✅ Files are compatible for stream-copy concat.")
+    else:
+        print("❌ Files are NOT compatible. Re-encode needed for the params above.")
+
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
+    parser = argparse.ArgumentParser(description="Check whether videos can be concatenated with -c copy.")
+    parser.add_argument("files", nargs="+", help="Two or more media files, e.g. intro.mp4 output.mp4")
+    parser.add_argument("--json", help="Write the machine-readable verdict to this file ('-' for stdout).")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+    if len(args.files) < 2:
         print("Usage: python check_video_compatibility.py intro.mp4 output.mp4")
         sys.exit(1)
 
-    compare_videos(sys.argv[1], sys.argv[2])
+    verdict = check_concat(args.files, args.workers, not args.no_cache)
+    if args.json == "-":
+        print(json.dumps(verdict, indent=2))
+    else:
+        print_verdict(verdict)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(verdict, f, indent=2)
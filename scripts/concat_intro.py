@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+concat_intro.py
+Ghép intro.mp4 vào trước video chính mà không encode lại video chính.
+
+1. Probe video chính → "profile" đích (codec, kích thước, fps, time base, pix_fmt, SAR,
+   audio codec / sample rate / channels).
+2. Normalize intro về đúng profile đó một lần, cache theo sha256(intro) + profile
+   (.cache/intro, CI cache giữ lại giữa các run).
+3. Nếu check_video_compatibility báo stream copy được → concat demuxer + `-c copy`;
+   ngược lại mới fallback về concat filter và encode lại.
+
+Usage:
+  python scripts/concat_intro.py intro.mp4 output.mp4 final_output.mp4 [--verdict verdict.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from fractions import Fraction
+
+from check_video_compatibility import check_concat, probe, stream_params
+from disk_cache import DiskCache, make_key
+
+CACHE_DIR = os.environ.get("INTRO_CACHE_DIR", ".cache/intro")
+CACHE_MAX_MB = int(os.environ.get("INTRO_CACHE_MAX_MB", "1024"))
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def target_profile(main_video: str) -> dict:
+    """Tham số của video chính mà intro phải khớp để concat stream copy."""
+    params = stream_params(probe(main_video))
+    if params.get("video") == "none":
+        raise ValueError(f"{main_video} không có video stream")
+    return params
+
+
+def normalize_cmd(intro: str, profile: dict, output: str) -> list[str]:
+    w, h = profile["video.width"], profile["video.height"]
+    sar = (profile.get("video.sample_aspect_ratio") or "1:1").replace(":", "/")
+    vf = (f"scale={w}:{h}:force_original_aspect_ratio=decrease,"
+          f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar={sar},format={profile['video.pix_fmt']}")
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", intro]
+    has_audio = profile.get("audio") != "none"
+    intro_has_audio = stream_params(probe(intro)).get("audio") != "none"
+    if has_audio and not intro_has_audio:
+        # Intro câm → thêm track im lặng để số stream khớp với video chính
+        cmd += ["-f", "lavfi", "-i",
+                f"anullsrc=r={profile['audio.sample_rate']}:cl={profile.get('audio.channel_layout') or 'mono'}",
+                "-shortest"]
+    cmd += ["-map", "0:v:0", "-vf", vf, "-r", profile["video.r_frame_rate"],
+            "-c:v", "libx264" if profile["video.codec_name"] == "h264" else profile["video.codec_name"],
+            "-preset", "slow", "-crf", "18"]
+    time_base = profile.get("video.time_base")
+    if time_base:
+        cmd += ["-video_track_timescale", str(Fraction(time_base).denominator)]
+    if has_audio:
+        cmd += ["-map", "1:a:0" if not intro_has_audio else "0:a:0",
+                "-c:a", profile["audio.codec_name"], "-b:a", "192k",
+                "-ar", str(profile["audio.sample_rate"]), "-ac", str(profile["audio.channels"])]
+    else:
+        cmd += ["-an"]
+    return cmd + ["-movflags", "+faststart", output]
+
+
+def normalized_intro(intro: str, profile: dict, cache: DiskCache | None, workdir: str) -> str:
+    """Đường dẫn intro đã normalize theo profile (lấy từ cache nếu có)."""
+    key = make_key("intro-v1", file_sha256(intro), profile)
+    dest = os.path.join(workdir, "intro_normalized.mp4")
+    if cache and cache.link_to(key, dest) is not None:
+        print(f"♻️ Dùng intro đã normalize từ cache ({key[:12]})")
+        return dest
+    print("🛠 Normalize intro theo profile của video chính...")
+    subprocess.run(normalize_cmd(intro, profile, dest), check=True)
+    if cache:
+        cache.put_file(key, dest, {"intro": os.path.basename(intro), "profile": profile})
+    return dest
+
+
+def concat_copy(parts: list[str], output: str, workdir: str):
+    list_file = os.path.join(workdir, "concat_list.txt")
+    with open(list_file, "w", encoding="utf-8") as f:
+        for p in parts:
+            escaped = os.path.abspath(p).replace("'", r"'\''")
+            f.write(f"file '{escaped}'\n")
+    subprocess.run(["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_file,
+                    "-map", "0", "-c", "copy", "-movflags", "+faststart", output], check=True)
+
+
+def concat_reencode(intro: str, main_video: str, output: str, has_audio: bool):
+    streams = "[0:v:0][0:a:0][1:v:0][1:a:0]" if has_audio else "[0:v:0][1:v:0]"
+    maps = ["-map", "[outv]"] + (["-map", "[outa]"] if has_audio else [])
+    subprocess.run(["ffmpeg", "-y", "-v", "error", "-i", intro, "-i", main_video,
+                    "-filter_complex", f"{streams}concat=n=2:v=1:a={int(has_audio)}[outv]" + ("[outa]" if has_audio else ""),
+                    *maps, "-c:v", "libx264", "-preset", "slow", "-crf", "18",
+                    "-c:a", "aac", "-b:a", "320k", output], check=True)
+
+
+def concat_intro(intro: str, main_video: str, output: str, cache: DiskCache | None = None) -> dict:
+    profile = target_profile(main_video)
+    workdir = tempfile.mkdtemp(prefix="intro_")
+    try:
+        try:
+            norm = normalized_intro(intro, profile, cache, workdir)
+            verdict = check_concat([norm, main_video])
+        except subprocess.CalledProcessError as e:
+            print(f"⚠️ Không normalize được intro ({e}); sẽ encode lại toàn bộ.")
+            norm, verdict = intro, {"stream_copy": False, "verdict": "re-encode needed",
+                                    "differences": {"normalize": str(e)}}
+        if verdict["stream_copy"]:
+            print("✅ Intro khớp profile → concat bằng stream copy (-c copy)")
+            concat_copy([norm, main_video], output, workdir)
+            verdict["method"] = "stream_copy"
+        else:
+            for key, values in verdict["differences"].items():
+                print(f"⚠️ Khác {key}: {values}")
+            print("❌ Không stream copy được → concat filter + encode lại")
+            concat_reencode(norm, main_video, output, profile.get("audio") != "none")
+            verdict["method"] = "reencode"
+        return verdict
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepend an intro without re-encoding the main video.")
+    parser.add_argument("intro")
+    parser.add_argument("main_video")
+    parser.add_argument("output")
+    parser.add_argument("--verdict", help="Write the compatibility verdict and method used to this JSON file.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Cache for normalized intros.")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.intro):
+        print(f"❌ Không tìm thấy intro: {args.intro}")
+        sys.exit(1)
+    cache = None if args.no_cache else DiskCache(args.cache_dir, CACHE_MAX_MB * 1024 * 1024, name="Intro cache")
+    verdict = concat_intro(args.intro, args.main_video, args.output, cache)
+    if args.verdict:
+        with open(args.verdict, "w", encoding="utf-8") as f:
+            json.dump(verdict, f, indent=2)
+    if cache:
+        cache.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+content_chunker.py
+Chia content.txt thành chunk TTS (chunks.json) và text slide trong một lượt đọc, thay cho
+processRawContent (generate_timing_json_with_parser_v2.js), splitText
+(gen_slide_from_content.js) và split_text.js.
+
+Các bản JS chạy compromise tách câu trên cả tài liệu (split_text.js còn parse lại từng câu),
+rồi khử slide ngắn bằng split / join / splice theo từng từ – bậc hai theo số slide. Ở đây:
+
+- iter_sentences đọc content theo block và tách câu theo luồng: dấu kết câu (. ! ? …, kèm
+  ngoặc / nháy đóng) theo sau là khoảng trắng, hoặc dòng trống giữa hai đoạn; bỏ qua viết
+  tắt thường gặp (Mr. Dr. e.g. …) và chữ cái viết tắt (J. K.). Khoảng trắng trong câu được
+  gộp thành một dấu cách. Kết quả không phụ thuộc kích thước block đọc.
+- ChunkPacker gom câu tham lam vào chunk ≤ max_chars (câu dài hơn được cắt theo từ, từ dài
+  hơn nữa cắt theo ký tự), rồi xử lý chunk < min_chars với cửa sổ nhìn trước cố định hai
+  chunk: mượn từ đầu chunk kế tiếp (như pass thuận của bản JS), nếu vẫn ngắn thì mượn từ cuối
+  chunk trước, miễn chunk trước vẫn ≥ min_chars (thay cho pass ngược lan ngược vô hạn).
+  Mỗi lần mượn chỉ đụng tới chuỗi ≤ max_chars nên tổng thời gian tuyến tính.
+- Nhiều packer (vd. chunk TTS 1500 ký tự và slide 200/100) được nuôi từ cùng một luồng câu.
+
+Kết quả chỉ phụ thuộc text và tham số, nên cache theo text chunk (tts_cache, slide_cache)
+vẫn trúng giữa các lần chạy.
+
+Usage:
+  python scripts/content_chunker.py content.txt --chunks chunks.json --chunk-max 1500 \\
+      --slides slides.json --max-char 200 --min-char 100
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from collections.abc import Iterable, Iterator
+
+READ_BLOCK = 1 << 16
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "cf", "no",
+    "fig", "approx", "inc", "ltd", "co", "mt", "u.s", "u.k", "a.m", "p.m",
+}
+
+_BOUNDARY_RE = re.compile(r"[.!?…]+[\"'”’)\]]*(?=\s)|\n[ \t]*\n")
+_LAST_WORD_RE = re.compile(r"[\"'“‘(\[]*(\S+)$")
+
+
+# ───────── sentences ─────────
+def _is_abbreviation(buf: str, start: int, end: int) -> bool:
+    """Dấu chấm ở buf[start:end] thuộc một từ viết tắt chứ không kết câu."""
+    if buf[start:end] != ".":
+        return False
+    m = _LAST_WORD_RE.search(buf, max(0, start - 24), start)
+    if not m:
+        return False
+    word = m.group(1).lower()
+    return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+def iter_sentences(pieces: Iterable[str]) -> Iterator[str]:
+    """Câu (đã gộp khoảng trắng) từ luồng text, đọc theo từng mảnh bất kỳ."""
+    buf, start, scan = "", 0, 0
+    for piece in pieces:
+        buf = buf[start:] + piece
+        scan = max(0, scan - start - 8)  # quét lại vài ký tự: ranh giới có thể vắt qua hai mảnh
+        start = 0
+        for m in _BOUNDARY_RE.finditer(buf, scan):
+            if m.group()[0] != "\n" and _is_abbreviation(buf, m.start(), m.end()):
+                continue
+            sentence = " ".join(buf[start:m.end()].split())
+            if sentence:
+                yield sentence
+            start = m.end()
+        scan = len(buf)
+    sentence = " ".join(buf[start:].split())
+    if sentence:
+        yield sentence
+
+
+def read_pieces(path: str, block_size: int = READ_BLOCK) -> Iterator[str]:
+    with open(path, encoding="utf-8") as f:
+        while piece := f.read(block_size):
+            yield piece
+
+
+# ───────── packing ─────────
+def split_long(text: str, max_chars: int) -> Iterator[str]:
+    """Cắt text > max_chars theo từ (từ dài hơn max_chars cắt theo ký tự); text đã gộp khoảng trắng."""
+    pos = 0
+    while len(text) - pos > max_chars:
+        cut = text.rfind(" ", pos, pos + max_chars + 1)
+        if cut > pos:
+            yield text[pos:cut]
+        else:  # từ đầu dài hơn max_chars
+            cut = text.find(" ", pos)
+            cut = len(text) if cut < 0 else cut
+            for i in range(pos, cut, max_chars):
+                yield text[i:min(i + max_chars, cut)]
+        pos = cut + 1
+    if pos < len(text):
+        yield text[pos:]
+
+
+class ChunkPacker:
+    """Gom câu thành chunk ≤ max_chars; chunk < min_chars mượn từ chunk kế / chunk trước."""
+
+    def __init__(self, max_chars: int, min_chars: int = 0):
+        if max_chars <= 0 or min_chars > max_chars:
+            raise ValueError(f"Cần 0 <= min_chars <= max_chars và max_chars > 0 (được {min_chars}, {max_chars})")
+        self.max_chars, self.min_chars = max_chars, min_chars
+        self.current = ""    # câu đang gom
+        self.window = []     # tối đa hai chunk chưa chốt: [chunk trước, chunk đang thiếu]
+
+    def feed(self, sentence: str) -> Iterator[str]:
+        if not self.current:
+            self.current = sentence
+        elif len(self.current) + 1 + len(sentence) <= self.max_chars:
+            self.current += " " + sentence
+        else:
+            yield from self._flush()
+            self.current = sentence
+
+    def close(self) -> Iterator[str]:
+        yield from self._flush()
+        if len(self.window) == 2:
+            self.window[0], self.window[1] = self._borrow_back(*self.window)
+        yield from self.window
+        self.window = []
+
+    def _flush(self) -> Iterator[str]:
+        current, self.current = self.current, ""
+        if not current:
+            return
+        pieces = [current] if len(current) <= self.max_chars else split_long(current, self.max_chars)
+        for chunk in pieces:
+            yield from self._push(chunk)
+
+    def _push(self, chunk: str) -> Iterator[str]:
+        window = self.window
+        if not window:
+            window.append(chunk)
+            return
+        short = window[-1]
+        if len(short) < self.min_chars:
+            short, chunk = self._borrow_forward(short, chunk)
+            window[-1] = short
+            if not chunk:
+                return
+            if len(short) < self.min_chars and len(window) == 2:
+                window[0], window[1] = self._borrow_back(window[0], short)
+        if len(window) == 2:
+            yield window.pop(0)
+        window.append(chunk)
+
+    def _borrow_forward(self, short: str, nxt: str) -> tuple[str, str]:
+        while len(short) < self.min_chars and nxt:
+            word, _, rest = nxt.partition(" ")
+            if len(short) + 1 + len(word) > self.max_chars:
+                break
+            short, nxt = short + " " + word, rest
+        return short, nxt
+
+    def _borrow_back(self, prev: str, short: str) -> tuple[str, str]:
+        while len(short) < self.min_chars:
+            head, _, word = prev.rpartition(" ")
+            if not head or len(head) < self.min_chars or len(short) + 1 + len(word) > self.max_chars:
+                break
+            prev, short = head, word + " " + short
+        return prev, short
+
+
+def chunk_sentences(sentences: Iterable[str], packers: dict[str, ChunkPacker]) -> dict[str, list[str]]:
+    """Nuôi mọi packer từ cùng một luồng câu; trả {tên: danh sách chunk}."""
+    out = {name: [] for name in packers}
+    for sentence in sentences:
+        for name, packer in packers.items():
+            out[name].extend(packer.feed(sentence))
+    for name, packer in packers.items():
+        out[name].extend(packer.close())
+    return out
+
+
+def chunk_text(text: str, max_chars: int, min_chars: int = 0) -> list[str]:
+    return chunk_sentences(iter_sentences([text]), {"chunks": ChunkPacker(max_chars, min_chars)})["chunks"]
+
+
+def chunk_file(path: str, packers: dict[str, ChunkPacker]) -> dict[str, list[str]]:
+    return chunk_sentences(iter_sentences(read_pieces(path)), packers)
+
+
+def _write_json(path: str, data):
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".part", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split content into TTS chunks and slide texts in one pass.")
+    parser.add_argument("content", nargs="?", default="content.txt")
+    parser.add_argument("--chunks", help="Write TTS chunks (JSON array of strings) here.")
+    parser.add_argument("--chunk-max", type=int, default=1500, help="Max characters per TTS chunk.")
+    parser.add_argument("--slides", help="Write slide texts (JSON array of strings) here.")
+    parser.add_argument("--max-char", "--maxChar", type=int, default=200, help="Max characters per slide.")
+    parser.add_argument("--min-char", "--minChar", type=int, default=100, help="Min characters per slide.")
+    args = parser.parse_args()
+    if not args.chunks and not args.slides:
+        parser.error("nothing to do: pass --chunks and/or --slides")
+
+    packers = {}
+    if args.chunks:
+        packers[args.chunks] = ChunkPacker(args.chunk_max)
+    if args.slides:
+        packers[args.slides] = ChunkPacker(args.max_char, args.min_char)
+    t0 = time.monotonic()
+    results = chunk_file(args.content, packers)
+    for path, chunks in results.items():
+        _write_json(path, chunks)
+        print(f"📝 {path}: {len(chunks)} chunk")
+    print(f"✂️ Chia {args.content} xong trong {time.monotonic() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,24 +27,38 @@ python create_tts.py \
 
 import os
 import argparse
-import struct
-import mimetypes
+import shutil
 from typing import Dict, List, Optional
 
 from google import genai
 from google.genai import types
 from google.api_core import exceptions
 
+from disk_cache import DiskCache
+from tts_cache import open_tts_cache, tts_cache_key
+from wav_writer import StreamingWavWriter, parse_audio_mime_type
+
 def generate_multi_speaker_tts(
     api_key: str,
     text_to_speak: str,
     speaker_voices: Dict[str, str],
     output_filename: str,
-    model: str = "gemini-2.5-pro-preview-tts" # Bạn có thể dùng model cũ hơn nếu cần
+    model: str = "gemini-2.5-pro-preview-tts", # Bạn có thể dùng model cũ hơn nếu cần
+    cache: Optional[DiskCache] = None,
 ):
     """
     Tạo một file âm thanh từ văn bản sử dụng nhiều giọng nói.
+    Nếu có `cache` và cùng (text, speaker map, model) đã từng được sinh, dùng lại audio đã lưu.
     """
+    cache_key = tts_cache_key(text_to_speak, speaker_voices, None, model) if cache else None
+    if cache:
+        hit = cache.get(cache_key)
+        if hit:
+            print(f"♻️  Cache hit ({cache_key[:12]}) – dùng lại audio, không gọi Gemini.")
+            shutil.copyfile(hit[0], output_filename)
+            print(f"✅ Đã lưu file âm thanh thành công vào: {output_filename}")
+            return
+
     print("1. Khởi tạo client kết nối tới Gemini API...")
     try:
         # ----- ĐÂY LÀ PHẦN SỬA LỖI -----
@@ -98,25 +112,32 @@ def generate_multi_speaker_tts(
         )
         # --------------------------------
 
-        audio_chunks = []
-        first_mime_type = None
-
-        print("4. Nhận và xử lý luồng âm thanh...")
-        for chunk in response_stream:
-            # Logic xử lý chunk giữ nguyên như phiên bản đầu tiên của bạn
-            if (
-                chunk.candidates is not None
-                and chunk.candidates[0].content is not None
-                and chunk.candidates[0].content.parts is not None
-                and chunk.candidates[0].content.parts[0].inline_data
-                and chunk.candidates[0].content.parts[0].inline_data.data
-            ):
-                inline_data = chunk.candidates[0].content.parts[0].inline_data
-                if not first_mime_type:
-                    first_mime_type = inline_data.mime_type
-                audio_chunks.append(inline_data.data)
-
-        if not audio_chunks:
+        writer = None
+
+        print("4. Nhận và ghi luồng âm thanh xuống file...")
+        try:
+            for chunk in response_stream:
+                # Logic xử lý chunk giữ nguyên như phiên bản đầu tiên của bạn
+                if (
+                    chunk.candidates is not None
+                    and chunk.candidates[0].content is not None
+                    and chunk.candidates[0].content.parts is not None
+                    and chunk.candidates[0].content.parts[0].inline_data
+                    and chunk.candidates[0].content.parts[0].inline_data.data
+                ):
+                    inline_data = chunk.candidates[0].content.parts[0].inline_data
+                    if writer is None:
+                        # Mở file theo mime của chunk đầu tiên, các chunk sau ghi nối tiếp
+                        params = parse_audio_mime_type(inline_data.mime_type)
+                        writer = StreamingWavWriter(output_filename, params["rate"],
+                                                    params["bits_per_sample"])
+                    writer.write(inline_data.data)
+        except BaseException:
+            if writer:
+                writer.abort()
+            raise
+
+        if writer is None:
             print("Không nhận được dữ liệu âm thanh từ API.")
             # In ra văn bản phản hồi nếu có, để debug
             for chunk in response_stream:
@@ -124,12 +145,13 @@ def generate_multi_speaker_tts(
                     print(f"API Response Text: {chunk.text}")
             return
 
-        print("5. Gộp các đoạn âm thanh và lưu file...")
-        full_audio_data = b"".join(audio_chunks)
-        wav_data = _convert_to_wav(full_audio_data, first_mime_type)
-
-        with open(output_filename, "wb") as f:
-            f.write(wav_data)
+        print("5. Hoàn tất header WAV...")
+        writer.close()
+        if cache:
+            cache.put_file(cache_key, output_filename, {
+                "mime_type": writer.mime_type, "ext": ".wav",
+                "speakers": speaker_voices, "model": model,
+            })
         print(f"✅ Đã lưu file âm thanh thành công vào: {output_filename}")
 
     except exceptions.PermissionDenied as e:
@@ -138,45 +160,6 @@ def generate_multi_speaker_tts(
         print(f"Đã xảy ra lỗi không mong muốn: {e}")
 
 
-def _convert_to_wav(audio_data: bytes, mime_type: str) -> bytes:
-    """Tạo header cho file WAV và ghép nó với dữ liệu âm thanh thô."""
-    parameters = _parse_audio_mime_type(mime_type)
-    bits_per_sample = parameters.get("bits_per_sample", 16)
-    sample_rate = parameters.get("rate", 24000)
-    num_channels = 1
-    data_size = len(audio_data)
-    bytes_per_sample = bits_per_sample // 8
-    block_align = num_channels * bytes_per_sample
-    byte_rate = sample_rate * block_align
-    chunk_size = 36 + data_size
-
-    header = struct.pack(
-        "<4sI4s4sIHHIIHH4sI",
-        b"RIFF", chunk_size, b"WAVE", b"fmt ",
-        16, 1, num_channels, sample_rate,
-        byte_rate, block_align, bits_per_sample,
-        b"data", data_size
-    )
-    return header + audio_data
-
-def _parse_audio_mime_type(mime_type: str) -> Dict[str, int]:
-    """Phân tích mime_type để lấy các thông số âm thanh."""
-    params = {"bits_per_sample": 16, "rate": 24000} # Giá trị mặc định
-    parts = mime_type.split(";")
-    for param in parts:
-        param = param.strip()
-        if param.lower().startswith("rate="):
-            try:
-                params["rate"] = int(param.split("=", 1)[1])
-            except (ValueError, IndexError):
-                pass
-        elif param.startswith("audio/L"):
-            try:
-                params["bits_per_sample"] = int(param.split("L", 1)[1])
-            except (ValueError, IndexError):
-                pass
-    return params
-
 def main():
     """Hàm chính để phân tích tham số dòng lệnh và chạy quá trình tạo TTS."""
     parser = argparse.ArgumentParser(
@@ -205,6 +188,23 @@ def main():
         help="API Key của Gemini. Mặc định sẽ đọc từ biến môi trường GEMINI_API_KEY."
     )
 
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Thư mục TTS cache. Mặc định $TTS_CACHE_DIR hoặc .cache/tts."
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=None,
+        help="Dung lượng tối đa của TTS cache (MB). Mặc định $TTS_CACHE_MAX_MB hoặc 2048."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Luôn gọi Gemini, không đọc/ghi TTS cache."
+    )
+
     args = parser.parse_args()
 
     if not args.api_key:
@@ -218,12 +218,16 @@ def main():
         print("Lỗi: Định dạng --speaker không hợp lệ. Vui lòng sử dụng định dạng 'Label:VoiceName'.")
         return
 
+    cache = None if args.no_cache else open_tts_cache(args.cache_dir, args.cache_max_mb)
     generate_multi_speaker_tts(
         api_key=args.api_key,
         text_to_speak=args.text,
         speaker_voices=speaker_voices,
-        output_filename=args.output
+        output_filename=args.output,
+        cache=cache,
     )
+    if cache:
+        cache.report()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
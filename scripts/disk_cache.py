@@ -0,0 +1,192 @@
+"""
+disk_cache.py
+Small content-addressed on-disk cache with size-bounded LRU eviction.
+
+Layout:
+  <root>/<key[:2]>/<key>.bin   – cached payload
+  <root>/<key[:2]>/<key>.json  – metadata (mime type, params, …)
+
+The mtime of the .bin file is the "last used" timestamp: it is bumped on every
+hit, and eviction removes the oldest entries until the cache fits `max_bytes`.
+No central index is kept, so several processes can share the same directory.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+
+def make_key(*parts) -> str:
+    """sha256 over a canonical JSON encoding of `parts`."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    def __init__(self, root: str, max_bytes: int, name: str = "cache"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._total = sum(size for _, size, _ in self._entries())
+
+    # ───────── paths ─────────
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.root, key[:2], key)
+        return base + ".bin", base + ".json"
+
+    def _entries(self):
+        """(bin_path, size, mtime) cho mọi entry trong cache."""
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                if e.name.endswith(".bin"):
+                    try:
+                        st = e.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield e.path, st.st_size, st.st_mtime
+
+    # ───────── read ─────────
+    def __contains__(self, key: str) -> bool:
+        """Kiểm tra nhanh, không tính vào thống kê hit/miss."""
+        bin_path, meta_path = self._paths(key)
+        return os.path.exists(bin_path) and os.path.exists(meta_path)
+
+    def get(self, key: str) -> tuple[str, dict] | None:
+        """Trả về (đường dẫn payload, metadata) nếu có trong cache, ngược lại None."""
+        bin_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            size = os.path.getsize(bin_path)
+            os.utime(bin_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_served += size
+        return bin_path, meta
+
+    def link_to(self, key: str, dest: str, size: int | None = None) -> dict | None:
+        """Hard-link payload ra `dest` (copy nếu khác filesystem); trả về metadata hoặc None.
+
+        Nếu `size` được truyền mà payload lệch kích thước (bị sửa tại chỗ qua một link cũ),
+        entry bị coi là miss.
+        """
+        bin_path, _ = self._paths(key)
+        if size is not None and os.path.exists(bin_path) and os.path.getsize(bin_path) != size:
+            with self._lock:
+                self.misses += 1
+            return None
+        found = self.get(key)
+        if not found:
+            return None
+        if os.path.exists(dest) and os.path.samefile(found[0], dest):
+            return found[1]  # rename() lên chính inode đó là no-op, .part sẽ bị bỏ lại
+        tmp = dest + ".part"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        try:
+            os.link(found[0], tmp)
+        except OSError:
+            shutil.copyfile(found[0], tmp)
+        os.replace(tmp, dest)
+        return found[1]
+
+    def get_bytes(self, key: str) -> tuple[bytes, dict] | None:
+        found = self.get(key)
+        if not found:
+            return None
+        with open(found[0], "rb") as f:
+            return f.read(), found[1]
+
+    # ───────── write ─────────
+    def put_bytes(self, key: str, data: bytes, meta: dict | None = None) -> str:
+        return self._commit(key, meta, lambda f: f.write(data))
+
+    def put_file(self, key: str, src_path: str, meta: dict | None = None, link: bool = False) -> str:
+        """Lưu file vào cache; `link=True` thử hard-link thay vì copy (không tốn thêm dung lượng)."""
+        def copy(f):
+            with open(src_path, "rb") as src:
+                shutil.copyfileobj(src, f, 1 << 20)
+        return self._commit(key, meta, copy, link_from=src_path if link else None)
+
+    def _commit(self, key: str, meta: dict | None, write, link_from: str | None = None) -> str:
+        bin_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(bin_path), exist_ok=True)
+        # Ghi ra file tạm rồi rename để tiến trình khác không đọc phải file dở dang
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(bin_path), suffix=".tmp")
+        try:
+            linked = False
+            if link_from:
+                os.close(fd)
+                os.remove(tmp)
+                try:
+                    os.link(link_from, tmp)
+                    linked = True
+                except OSError:
+                    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            if not linked:
+                with os.fdopen(fd, "wb") as f:
+                    write(f)
+            old_size = os.path.getsize(bin_path) if os.path.exists(bin_path) else 0
+            size = os.path.getsize(tmp)
+            os.replace(tmp, bin_path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({**(meta or {}), "stored_at": time.time()}, f, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+        with self._lock:
+            self._total += size - old_size
+            if self._total > self.max_bytes:
+                self._evict(keep=bin_path)
+        return bin_path
+
+    def _evict(self, keep: str):
+        """Xoá entry ít được dùng nhất cho tới khi tổng dung lượng ≤ max_bytes."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        self._total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            for p in (path, path[:-4] + ".json"):
+                try:
+                    os.remove(p)
+                except FileNotFoundError:
+                    pass
+            self._total -= size
+
+    # ───────── stats ─────────
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "bytes_served": self.bytes_served,
+            "size_bytes": self._total,
+            "max_bytes": self.max_bytes,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"🗄️  {self.name}: {s['hits']} hit / {s['misses']} miss "
+              f"({s['hit_rate'] * 100:.0f}%), phục vụ {s['bytes_served'] / 1e6:.1f} MB từ cache, "
+              f"dung lượng {s['size_bytes'] / 1e6:.1f}/{s['max_bytes'] / 1e6:.0f} MB")
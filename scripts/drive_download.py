@@ -0,0 +1,176 @@
+"""
+drive_download.py
+Tải file từ một folder Google Drive: liệt kê đủ mọi trang (nextPageToken), tải song
+song trên ThreadPool, chunk lớn, ghi atomic (<file>.part rồi rename) và in một báo
+cáo throughput tổng thay vì % từng file.
+
+File có md5Checksum được giữ trong cache content-addressed (.cache/drive, CI cache
+lưu lại giữa các run): file không đổi được hard-link vào input/ thay vì tải lại.
+
+Dùng bởi download_drive_folder_files.py và download_drive_folder_files_all.py.
+
+Env:
+  FOLDER_URL               link folder Google Drive
+  DRIVE_DOWNLOAD_WORKERS   số file tải song song (mặc định 4)
+  DRIVE_CHUNK_MB           kích thước mỗi chunk tải (mặc định 32 MB)
+  DRIVE_CACHE_DIR          thư mục cache (mặc định .cache/drive, rỗng = tắt cache)
+  DRIVE_CACHE_MAX_MB       dung lượng cache tối đa trước khi evict LRU (mặc định 4096)
+"""
+
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from googleapiclient.http import MediaIoBaseDownload
+
+from disk_cache import DiskCache, make_key
+from drive_utils import ThreadLocalHttp, build_drive, folder_id_from_url, get_credentials
+
+DEFAULT_WORKERS = int(os.environ.get("DRIVE_DOWNLOAD_WORKERS", "4"))
+DEFAULT_CHUNK_MB = int(os.environ.get("DRIVE_CHUNK_MB", "32"))
+DEFAULT_CACHE_DIR = os.environ.get("DRIVE_CACHE_DIR", ".cache/drive")
+DEFAULT_CACHE_MAX_MB = int(os.environ.get("DRIVE_CACHE_MAX_MB", "4096"))
+LIST_FIELDS = "id, name, size, mimeType, md5Checksum, modifiedTime"
+
+
+def open_drive_cache(path: str | None = DEFAULT_CACHE_DIR, max_mb: int = DEFAULT_CACHE_MAX_MB) -> DiskCache | None:
+    return DiskCache(path, max_mb * 1024 * 1024, name="Drive cache") if path else None
+
+
+def drive_cache_key(item: dict) -> str | None:
+    """Key theo nội dung (md5 Drive). Google Docs/Sheets không có md5 ⇒ không cache."""
+    md5 = item.get("md5Checksum")
+    return make_key("drive-v1", md5) if md5 else None
+
+
+def list_folder(drive, folder_id: str, fields: str = LIST_FIELDS) -> list[dict]:
+    """Liệt kê toàn bộ file (không nằm trong thùng rác) của folder, theo mọi trang kết quả."""
+    query = f"'{folder_id}' in parents and trashed = false"
+    items, page_token = [], None
+    while True:
+        resp = drive.files().list(
+            q=query,
+            fields=f"nextPageToken, files({fields})",
+            pageSize=1000,
+            orderBy="modifiedTime desc",
+            pageToken=page_token,
+        ).execute()
+        items.extend(resp.get("files", []))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return items
+
+
+def unique_by_name(items: list[dict]) -> list[dict]:
+    """Drive cho phép trùng tên; giữ bản sửa gần nhất (list đã sort modifiedTime desc)."""
+    seen, out = set(), []
+    for item in items:
+        if item["name"] in seen:
+            print(f"⚠️ Bỏ qua bản cũ hơn của file trùng tên: {item['name']} ({item['id']})")
+            continue
+        seen.add(item["name"])
+        out.append(item)
+    return out
+
+
+def download_one(drive, http, file_id: str, dest: str, chunk_size: int) -> int:
+    """Tải 1 file vào dest.part rồi os.replace → dest. Trả về số byte đã tải."""
+    tmp = dest + ".part"
+    request = drive.files().get_media(fileId=file_id)
+    request.http = http
+    try:
+        with io.FileIO(tmp, "wb") as fh:
+            downloader = MediaIoBaseDownload(fh, request, chunksize=chunk_size)
+            done = False
+            while not done:
+                _, done = downloader.next_chunk(num_retries=3)
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return os.path.getsize(dest)
+
+
+def download_items(drive, creds, items: list[dict], dest_dir: str = "input",
+                   workers: int = DEFAULT_WORKERS, chunk_mb: int = DEFAULT_CHUNK_MB,
+                   cache: DiskCache | None = None) -> dict:
+    """Tải song song các file trong `items` vào dest_dir; raise nếu có file lỗi."""
+    os.makedirs(dest_dir, exist_ok=True)
+    https = ThreadLocalHttp(creds)
+    chunk_size = chunk_mb * 1024 * 1024
+    started = time.monotonic()
+    total_bytes, saved_bytes, cached_files, failed = 0, 0, 0, []
+
+    def run(item):
+        dest = os.path.join(dest_dir, item["name"])
+        key = drive_cache_key(item) if cache else None
+        size = int(item["size"]) if "size" in item else None
+        if key and cache.link_to(key, dest, size) is not None:
+            print(f"♻️ Dùng lại từ cache: {dest} (md5 {item['md5Checksum'][:8]}, sửa lúc {item.get('modifiedTime')})")
+            return True, os.path.getsize(dest)
+        t0 = time.monotonic()
+        size = download_one(drive, https.get(), item["id"], dest, chunk_size)
+        print(f"✅ Đã lưu: {dest} ({size / 1e6:.1f} MB, {time.monotonic() - t0:.1f}s)")
+        if key:
+            cache.put_file(key, dest, {"name": item["name"], "md5": item["md5Checksum"], "size": size,
+                                       "modifiedTime": item.get("modifiedTime")}, link=True)
+        return False, size
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run, item): item for item in items}
+        for fut in as_completed(futures):
+            try:
+                from_cache, size = fut.result()
+            except Exception as e:
+                print(f"❌ Lỗi khi tải {futures[fut]['name']}: {e}")
+                failed.append(futures[fut]["name"])
+                continue
+            if from_cache:
+                saved_bytes += size
+                cached_files += 1
+            else:
+                total_bytes += size
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    downloaded = len(items) - len(failed) - cached_files
+    report = {"files": downloaded, "bytes": total_bytes, "seconds": elapsed,
+              "cached_files": cached_files, "saved_bytes": saved_bytes, "failed": failed}
+    print(f"📊 Đã tải {downloaded}/{len(items)} file, {total_bytes / 1e6:.1f} MB "
+          f"trong {elapsed:.1f}s ({total_bytes / 1e6 / elapsed:.1f} MB/s, {workers} luồng, chunk {chunk_mb} MB)")
+    if cache:
+        print(f"💾 Cache: {cached_files} file không đổi được link từ cache, tiết kiệm {saved_bytes / 1e6:.1f} MB tải về")
+    if failed:
+        raise RuntimeError(f"Không tải được {len(failed)} file: {', '.join(failed)}")
+    return report
+
+
+def download_folder(names: set[str] | None = None, dest_dir: str = "input",
+                    workers: int = DEFAULT_WORKERS, chunk_mb: int = DEFAULT_CHUNK_MB,
+                    cache_dir: str | None = DEFAULT_CACHE_DIR) -> list[dict] | None:
+    """Tải các file có tên trong `names` (None = tất cả) từ folder FOLDER_URL.
+
+    Trả về danh sách item đã chọn, hoặc None nếu folder rỗng.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    folder_id = folder_id_from_url(os.environ["FOLDER_URL"])
+    print(f"📂 Folder ID: {folder_id}")
+
+    creds = get_credentials()
+    drive = build_drive(creds)
+    items = list_folder(drive, folder_id)
+    if not items:
+        return None
+    print(f"🔎 Tìm thấy {len(items)} file trong thư mục.")
+
+    items = unique_by_name(items)
+    if names is not None:
+        missing = names - {item["name"] for item in items}
+        for name in sorted(missing):
+            print(f"⚠️ Không tìm thấy file trong folder: {name}")
+        items = [item for item in items if item["name"] in names]
+
+    print(f"⬇️ Bắt đầu tải {len(items)} file...")
+    download_items(drive, creds, items, dest_dir, workers, chunk_mb, cache=open_drive_cache(cache_dir))
+    return items
@@ -0,0 +1,50 @@
+"""
+drive_utils.py
+Helper dùng chung cho các script Google Drive: lấy folder_id từ FOLDER_URL và xác thực.
+"""
+
+import os
+import re
+import sys
+import threading
+
+import google_auth_httplib2
+import httplib2
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+
+def folder_id_from_url(folder_url: str) -> str:
+    match = re.search(r"/folders/([a-zA-Z0-9_-]+)", folder_url)
+    if not match:
+        print("❌ Không thể lấy folder_id từ FOLDER_URL.")
+        sys.exit(1)
+    return match.group(1)
+
+
+def get_credentials() -> Credentials:
+    return Credentials(
+        None,
+        refresh_token=os.environ["GG_REFRESH_TOKEN"],
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id=os.environ["YT_CLIENT_ID"],
+        client_secret=os.environ["YT_CLIENT_SECRET"]
+    )
+
+
+def build_drive(creds: Credentials | None = None):
+    return build("drive", "v3", credentials=creds or get_credentials())
+
+
+class ThreadLocalHttp:
+    """httplib2.Http không thread-safe ⇒ mỗi thread một kết nối, dùng chung credentials."""
+
+    def __init__(self, creds: Credentials):
+        self._creds = creds
+        self._local = threading.local()
+
+    def get(self):
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = google_auth_httplib2.AuthorizedHttp(self._creds, http=httplib2.Http())
+        return http
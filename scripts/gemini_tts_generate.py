@@ -1,58 +1,44 @@
 # pip install google-genai
-import os, mimetypes, struct
+import os, shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google import genai
 from google.genai import types
 import json
 
+from disk_cache import DiskCache
+from rate_limiter import TokenBucket, call_with_retry
+from tts_cache import open_tts_cache, tts_cache_key
+from wav_writer import open_audio_writer
 
-def save_binary_file(file_name: str, data: bytes):
-    with open(file_name, "wb") as f:
-        f.write(data)
-    print(f"✅ File saved: {file_name}")
-
-
-# ──────── Google sample helpers ────────
-def convert_to_wav(audio_data: bytes, mime_type: str) -> bytes:
-    parameters       = parse_audio_mime_type(mime_type)
-    bits_per_sample  = parameters["bits_per_sample"]
-    sample_rate      = parameters["rate"]
-    num_channels     = 1
-    data_size        = len(audio_data)
-    byte_rate        = sample_rate * num_channels * bits_per_sample // 8
-    block_align      = num_channels * bits_per_sample // 8
-    chunk_size       = 36 + data_size
-
-    header = struct.pack(
-        "<4sI4s4sIHHIIHH4sI",
-        b"RIFF", chunk_size, b"WAVE",
-        b"fmt ", 16, 1, num_channels, sample_rate,
-        byte_rate, block_align, bits_per_sample,
-        b"data", data_size
-    )
-    return header + audio_data
+MODEL = "gemini-2.5-flash-preview-tts"
 
 
-def parse_audio_mime_type(mime_type: str) -> dict[str, int | None]:
-    bits_per_sample, rate = 16, 24000
-    for p in mime_type.split(";"):
-        p = p.strip()
-        if p.lower().startswith("rate="):
-            try:
-                rate = int(p.split("=")[1])
-            except ValueError:
-                pass
-        elif p.startswith("audio/L"):
-            try:
-                bits_per_sample = int(p.split("L")[1])
-            except ValueError:
-                pass
-    return {"bits_per_sample": bits_per_sample, "rate": rate}
+# ───────────────────────────────────────
+def make_client() -> genai.Client:
+    return genai.Client(api_key=os.environ["GEMINI_API_KEY"])
 
 
-# ───────────────────────────────────────
-def generate(text: str, voice_name: str = "Zephyr", temperature: float = 1.0):
-    client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
-    model  = "gemini-2.5-flash-preview-tts"
+def restore_cached(hit: tuple[str, dict], key: str, output_name: str = "output") -> str:
+    """Copy audio từ một entry cache (kết quả của cache.get) ra output_name + đuôi file gốc."""
+    filename = f"{output_name}{hit[1]['ext']}"
+    shutil.copyfile(hit[0], filename)
+    print(f"♻️  Cache hit ({key[:12]}) – bỏ qua Gemini → {filename}")
+    return filename
+
+
+def generate(text: str, voice_name: str = "Zephyr", temperature: float = 1.0,
+             client: genai.Client | None = None, output_name: str = "output",
+             cache: DiskCache | None = None, lookup: bool = True):
+    """lookup=False: caller đã tra cache (và miss) – chỉ ghi kết quả vào cache."""
+    model  = MODEL
+
+    key = tts_cache_key(text, voice_name, temperature, model) if cache else None
+    if cache and lookup:
+        hit = cache.get(key)
+        if hit:
+            return restore_cached(hit, key, output_name)
+
+    client = client or make_client()
 
     contents = [types.Content(role="user",
                               parts=[types.Part.from_text(text=text)])]
@@ -70,53 +56,104 @@ def generate(text: str, voice_name: str = "Zephyr", temperature: float = 1.0):
     )
 
     print("⏳ Generating audio…")
-    raw_audio   = bytearray()
-    mime_type   = None
-    for chunk in client.models.generate_content_stream(
-        model=model, contents=contents, config=cfg
-    ):
-        if (chunk.candidates and chunk.candidates[0].content and
-                chunk.candidates[0].content.parts):
-            part = chunk.candidates[0].content.parts[0]
-            if part.inline_data and part.inline_data.data:
-                raw_audio.extend(part.inline_data.data)
-                mime_type = part.inline_data.mime_type
-            elif part.text:
-                # Optional: print partial transcripts if you also request text
-                print(part.text, end="", flush=True)
-
-    if not raw_audio:
+    # Writer được mở khi nhận chunk đầu tiên (cần mime để biết PCM hay wav/mp3),
+    # sau đó mỗi chunk được ghi thẳng xuống đĩa, không giữ lại trong RAM.
+    writer = None
+    try:
+        for chunk in client.models.generate_content_stream(
+            model=model, contents=contents, config=cfg
+        ):
+            if (chunk.candidates and chunk.candidates[0].content and
+                    chunk.candidates[0].content.parts):
+                part = chunk.candidates[0].content.parts[0]
+                if part.inline_data and part.inline_data.data:
+                    if writer is None:
+                        writer = open_audio_writer(output_name, part.inline_data.mime_type)
+                    writer.write(part.inline_data.data)
+                elif part.text:
+                    # Optional: print partial transcripts if you also request text
+                    print(part.text, end="", flush=True)
+    except BaseException:
+        if writer:
+            writer.abort()
+        raise
+
+    if writer is None or not writer.bytes_written:
+        if writer:
+            writer.abort()
         raise RuntimeError("❌ No audio was generated.")
 
-    # Nếu Gemini đã trả về đuôi chuẩn (.wav, .mp3, .ogg)
-    ext = mimetypes.guess_extension(mime_type or "")
-    if ext and ext != ".raw" and not ext.startswith(".bin"):
-        filename = f"output{ext}"
-        save_binary_file(filename, raw_audio)
-        return filename
-
-    # Ngược lại là raw PCM ⇒ gói WAV
-    filename = "output.wav"
-    wav_bytes = convert_to_wav(bytes(raw_audio), mime_type or "audio/L16;rate=24000")
-    save_binary_file(filename, wav_bytes)
+    filename = writer.close()
+    print(f"✅ File saved: {filename}")
+    if cache:
+        cache.put_file(key, filename, {"mime_type": writer.mime_type,
+                                       "ext": os.path.splitext(filename)[1],
+                                       "voice": voice_name,
+                                       "temperature": temperature, "model": model})
     return filename
 
 # ────────────── helper sinh 1 file ──────────────
-def generate_one(text: str, idx: int, voice: str, temp: float) -> str:
+def generate_one(text: str, idx: int, voice: str, temp: float,
+                 client: genai.Client | None = None,
+                 cache: DiskCache | None = None, lookup: bool = True) -> str:
     chunk_tag = f"#{idx+1:02d}"
     print(f"🎙️  Bắt đầu TTS {chunk_tag} – {len(text)} ký tự, voice {voice}")
-    fname = f"output_{idx}.wav"
-    generate(text, voice_name=voice, temperature=temp)   # Tái dùng hàm cũ (đã tự save)
+    fname = generate(text, voice_name=voice, temperature=temp,
+                     client=client, output_name=f"output_{idx}", cache=cache, lookup=lookup)
     print(f"✅ Hoàn thành TTS {chunk_tag} → {fname}\n")
     return fname
 
 
 # ────────────── chia & sinh nhiều file ──────────────
-def generate_multi_from_json(json_path: str, voice: str, temp: float):
+def generate_multi_from_json(json_path: str, voice: str, temp: float,
+                             workers: int = 1, rpm: float = 0, retries: int = 3,
+                             cache: DiskCache | None = None, on_done=None):
+    """Sinh TTS cho từng chunk trong chunks.json → output_{idx}.wav.
+
+    workers > 1: chạy song song trên một ThreadPool, dùng chung 1 genai.Client.
+    rpm: giới hạn số request / phút (token bucket, 0 = không giới hạn).
+    cache: chunk đã có trong TTS cache được lấy lại từ đĩa, không gọi Gemini.
+    on_done(idx, filename): gọi ngay khi một chunk xong (từ thread của pool), vd. để
+    đẩy chunk sang transcribe trong lúc các chunk sau vẫn đang sinh.
+    Danh sách file trả về luôn theo đúng thứ tự index của chunk.
+    """
     chunks = json.loads(open(json_path, encoding="utf-8").read())
-    files = []
-    for i, chunk in enumerate(chunks):
-        files.append(generate_one(chunk, i, voice, temp))
+    client  = make_client()
+    limiter = TokenBucket(rpm, burst=workers) if rpm > 0 else None
+
+    def run(i: int, chunk: str) -> str:
+        # Tra cache đúng một lần rồi rẽ nhánh theo kết quả: entry có thể bị evict ngay sau
+        # một lần kiểm tra riêng. Cache hit không tốn request ⇒ không lấy token của limiter.
+        key = tts_cache_key(chunk, voice, temp, MODEL) if cache else None
+        hit = cache.get(key) if cache else None
+        if hit:
+            fname = restore_cached(hit, key, f"output_{i}")
+            print(f"✅ Hoàn thành TTS #{i+1:02d} → {fname}\n")
+        else:
+            fname = call_with_retry(generate_one, chunk, i, voice, temp, client, cache,
+                                    retries=retries, limiter=limiter,
+                                    label=f"TTS #{i+1:02d}", lookup=False)
+        if on_done:
+            on_done(i, fname)
+        return fname
+
+    files: list[str | None] = [None] * len(chunks)
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run, i, chunk): i for i, chunk in enumerate(chunks)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                files[i] = fut.result()
+            except Exception as e:
+                print(f"❌ TTS #{i+1:02d} thất bại sau {retries} lần thử lại: {e}")
+                failed.append(i)
+
+    if cache:
+        cache.report()
+    if failed:
+        raise RuntimeError(f"❌ {len(failed)}/{len(chunks)} chunk TTS thất bại: "
+                           f"{sorted(i + 1 for i in failed)}")
     return files
 
 
@@ -130,6 +167,13 @@ if __name__ == "__main__":
     p.add_argument("--voice", default="Zephyr", help="Voice name, e.g. Zephyr, Aoede…")
     p.add_argument("--temp",  type=float, default=1.0, help="Temperature (speed / style)")
     p.add_argument("--input", default="content.txt", help="Input text file")
+    p.add_argument("--chunks", default="chunks.json", help="JSON array of text chunks")
+    p.add_argument("--workers", type=int, default=4, help="Số chunk TTS chạy song song")
+    p.add_argument("--rpm", type=float, default=0, help="Giới hạn request/phút (0 = không giới hạn)")
+    p.add_argument("--retries", type=int, default=3, help="Số lần thử lại cho mỗi chunk")
+    p.add_argument("--cache-dir", default=None, help="Thư mục TTS cache (mặc định $TTS_CACHE_DIR hoặc .cache/tts)")
+    p.add_argument("--cache-max-mb", type=int, default=None, help="Dung lượng tối đa của TTS cache (MB)")
+    p.add_argument("--no-cache", action="store_true", help="Luôn gọi Gemini, không đọc/ghi cache")
 
     args = p.parse_args()
 
@@ -139,8 +183,11 @@ if __name__ == "__main__":
     with open(args.input, "r", encoding="utf-8") as f:
         text_in = f.read().strip()
 
-    chunks_json = "chunks.json"
-    out_files = generate_multi_from_json(chunks_json, args.voice, args.temp)
+    out_files = generate_multi_from_json(args.chunks, args.voice, args.temp,
+                                         workers=args.workers, rpm=args.rpm,
+                                         retries=args.retries,
+                                         cache=None if args.no_cache else
+                                         open_tts_cache(args.cache_dir, args.cache_max_mb))
     print("🎧 Files:", " ".join(out_files))
 
 
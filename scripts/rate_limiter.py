@@ -0,0 +1,63 @@
+"""
+rate_limiter.py
+Shared helpers for calling the Gemini API from several threads at once.
+
+- TokenBucket: thread-safe token bucket, caps requests per minute across workers.
+- call_with_retry: runs a callable with exponential backoff + jitter.
+"""
+
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket: `rate_per_minute` tokens are refilled per minute, up to `burst`.
+
+    rate_per_minute <= 0 disables limiting (acquire() returns immediately).
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int | None = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst if burst else max(1, int(rate_per_minute // 60) or 1))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def call_with_retry(fn, *args, retries: int = 3, base_delay: float = 2.0,
+                    max_delay: float = 60.0, limiter: TokenBucket | None = None,
+                    label: str = "", **kwargs):
+    """Gọi fn(*args, **kwargs), thử lại tối đa `retries` lần với backoff luỹ thừa.
+
+    Mỗi lần thử đều lấy 1 token từ `limiter` (nếu có) trước khi gọi API.
+    Lỗi của lần thử cuối cùng được raise lại nguyên vẹn.
+    """
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            delay *= 0.5 + random.random() / 2
+            attempt += 1
+            print(f"⚠️  {label or fn.__name__}: lỗi '{e}' – thử lại lần {attempt}/{retries} sau {delay:.1f}s")
+            time.sleep(delay)
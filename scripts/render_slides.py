@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+render_slides.py
+Render slide-NNN.png trực tiếp từ configs/<CONFIG_KEY>.json + timings.json, thay cho
+chuỗi gen_slides.js → soffice --convert-to pdf → pdftoppm -r $DPI.
+
+- Cùng layout với slides.pptx của gen_slides.js: trang 10 × 5.625 inch, ảnh nền kéo giãn
+  toàn trang (background.jpg nếu có, không thì `background` của config), text box
+  `textOptions` (x/y/w/h inch, fontSize pt, fontFace, color, align, valign, wrap) với
+  lề trong mặc định của PowerPoint (0.1 inch trái/phải, 0.05 inch trên/dưới).
+- Font lấy từ assets/fonts theo tên family (font biến thiên dùng instance Regular).
+- Ảnh nền được decode + resize một lần ở tiến trình chính rồi gửi cho mỗi worker một
+  lần (initializer); các slide render song song trên process pool.
+- Tên file giống pdftoppm (slide-1 / slide-01 / slide-001 tuỳ số trang) nên
+  build_input_list.js và render_slides_video.py dùng được ngay.
+- PNG được cache theo (text, textOptions, ảnh nền, DPI) trong slide_cache.py: chạy lại sau
+  khi sửa vài slide chỉ render các slide đó, phần còn lại hard-link từ cache. manifest.json
+  ghi sha256 từng PNG cho bước encode clip.
+
+Usage:
+  CONFIG_KEY=anksEnglish python scripts/render_slides.py --timings timings.json \\
+      --output-dir slides_png --dpi 192 --workers 4
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import re
+import sys
+import time
+import unicodedata
+
+from PIL import Image, ImageDraw, ImageFont
+
+from disk_cache import DiskCache
+from render_slides_video import file_sha256
+from slide_cache import manifest_entry, open_slide_cache, png_key, save_manifest
+
+SLIDE_W_IN, SLIDE_H_IN = 10.0, 5.625  # layout WIDESCREEN_HD của gen_slides.js
+INSET_X_IN, INSET_Y_IN = 0.1, 0.05  # bodyPr mặc định của PowerPoint
+FONTS_DIR = "assets/fonts"
+
+_background = None
+_fonts = {}
+
+
+# ───────── font ─────────
+def _norm(name: str) -> str:
+    return re.sub(r"\s+", "", name).lower()
+
+
+def find_font(face: str, fonts_dir: str = FONTS_DIR) -> str | None:
+    """File .ttf/.otf có family trùng face (bỏ khoảng trắng, không phân biệt hoa thường), ưu tiên bản không nghiêng."""
+    best = None
+    for path in sorted(glob.glob(os.path.join(fonts_dir, "*.[ot]tf"))):
+        try:
+            family, style = ImageFont.truetype(path, 12).getname()
+        except OSError:
+            continue
+        if _norm(family or "") != _norm(face):
+            continue
+        rank = (1 if "italic" in (style or "").lower() else 0, 0 if style in ("Regular", "Book") else 1)
+        if best is None or rank < best[0]:
+            best = (rank, path)
+    return best[1] if best else None
+
+
+def load_font(face: str, size_px: int, fonts_dir: str = FONTS_DIR) -> ImageFont.FreeTypeFont:
+    key = (face, size_px)
+    if key not in _fonts:
+        path = find_font(face, fonts_dir)
+        if path is None:
+            print(f"⚠️ Không tìm thấy font '{face}' trong {fonts_dir} – dùng font mặc định")
+            _fonts[key] = ImageFont.load_default(size_px)
+        else:
+            font = ImageFont.truetype(path, size_px)
+            try:
+                if b"Regular" in font.get_variation_names():
+                    font.set_variation_by_name("Regular")
+            except OSError:
+                pass  # không phải font biến thiên
+            _fonts[key] = font
+    return _fonts[key]
+
+
+# ───────── text ─────────
+def clean_text(raw: str) -> str:
+    """Như cleanText() của gen_slides.js: chuẩn hoá unicode, bỏ dấu câu và ký tự ngoài \\w ASCII."""
+    text = unicodedata.normalize("NFKD", raw)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]|_", "", text, flags=re.ASCII)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def wrap_lines(text: str, font, max_width: float, wrap: bool = True) -> list[tuple[list[str], bool]]:
+    """Chia text thành dòng: (các từ, là dòng cuối đoạn). Từ dài hơn max_width đứng riêng một dòng."""
+    lines = []
+    for paragraph in text.split("\n"):
+        words = paragraph.split()
+        if not words:
+            lines.append(([], True))
+            continue
+        if not wrap:
+            lines.append((words, True))
+            continue
+        current = [words[0]]
+        for word in words[1:]:
+            if font.getlength(" ".join(current + [word])) <= max_width:
+                current.append(word)
+            else:
+                lines.append((current, False))
+                current = [word]
+        lines.append((current, True))
+    return lines
+
+
+def parse_color(value: str | None) -> str:
+    value = (value or "000000").lstrip("#")
+    return f"#{value}"
+
+
+def draw_text_box(img: Image.Image, text: str, options: dict, dpi: float, fonts_dir: str = FONTS_DIR):
+    px = dpi  # pixel / inch
+    x = (options.get("x", 0) + INSET_X_IN) * px
+    y = (options.get("y", 0) + INSET_Y_IN) * px
+    w = (options.get("w", SLIDE_W_IN) - 2 * INSET_X_IN) * px
+    h = (options.get("h", SLIDE_H_IN) - 2 * INSET_Y_IN) * px
+    font = load_font(options.get("fontFace", "Arial"), round(options.get("fontSize", 18) * dpi / 72), fonts_dir)
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent
+    align = options.get("align", "left")
+    lines = wrap_lines(text, font, w, options.get("wrap", True))
+
+    block = line_height * len(lines)
+    valign = options.get("valign", "top")
+    top = y + (h - block) / 2 if valign in ("middle", "ctr") else y + h - block if valign in ("bottom", "b") else y
+
+    draw = ImageDraw.Draw(img)
+    color = parse_color(options.get("color"))
+    space = font.getlength(" ")
+    for n, (words, last) in enumerate(lines):
+        if not words:
+            continue
+        baseline_top = top + n * line_height
+        widths = [font.getlength(word) for word in words]
+        natural = sum(widths) + space * (len(words) - 1)
+        if align == "justify" and not last and len(words) > 1:
+            gap = (w - sum(widths)) / (len(words) - 1)
+            cx = x
+            for word, width in zip(words, widths):
+                draw.text((cx, baseline_top), word, font=font, fill=color)
+                cx += width + gap
+            continue
+        if align in ("center", "ctr"):
+            left = x + (w - natural) / 2
+        elif align in ("right", "r"):
+            left = x + w - natural
+        else:
+            left = x
+        draw.text((left, baseline_top), " ".join(words), font=font, fill=color)
+
+
+# ───────── render ─────────
+def slide_size(dpi: float) -> tuple[int, int]:
+    """Kích thước pixel như pdftoppm -r dpi."""
+    return round(SLIDE_W_IN * dpi), round(SLIDE_H_IN * dpi)
+
+
+def load_background(path: str, dpi: float) -> Image.Image:
+    with Image.open(path) as im:
+        return im.convert("RGB").resize(slide_size(dpi), Image.LANCZOS)
+
+
+def _init_worker(size: tuple[int, int], background: bytes):
+    global _background
+    _background = Image.frombytes("RGB", size, background)
+
+
+def render_one(job: dict) -> str:
+    img = _background.copy()
+    draw_text_box(img, job["text"], job["options"], job["dpi"], job["fonts_dir"])
+    # Ghi ra .part rồi rename: file cũ có thể là hard-link vào cache, không được ghi đè tại chỗ
+    img.save(job["path"] + ".part", format="PNG", compress_level=job.get("compress_level", 1))
+    os.replace(job["path"] + ".part", job["path"])
+    return job["path"]
+
+
+def slide_name(index: int, count: int) -> str:
+    """slide-N.png với số chữ số như pdftoppm (theo số trang)."""
+    return f"slide-{index:0{len(str(count))}d}.png"
+
+
+def resolve_background(config: dict) -> str:
+    if os.path.exists("background.jpg"):
+        print("✅ Using downloaded background.jpg for slide background.")
+        return "background.jpg"
+    print("ℹ️ Using default background from config.")
+    return config["background"]
+
+
+def make_jobs(config: dict, timings: list[dict], output_dir: str, dpi: float,
+              fonts_dir: str = FONTS_DIR) -> list[dict]:
+    only_subtitle = config.get("isOnlySubtitle", False)
+    return [{"index": i + 1,
+             "text": clean_text(item["text"]) if only_subtitle else item["text"],
+             "options": config["textOptions"], "dpi": dpi, "fonts_dir": fonts_dir,
+             "path": os.path.join(output_dir, slide_name(i + 1, len(timings)))}
+            for i, item in enumerate(timings)]
+
+
+def render_jobs(jobs: list[dict], background: Image.Image, workers: int) -> list[str]:
+    if not jobs:
+        return []
+    workers = max(1, min(workers, len(jobs)))
+    if workers == 1:
+        _init_worker(background.size, background.tobytes())
+        return [render_one(job) for job in jobs]
+    with mp.get_context("spawn").Pool(workers, initializer=_init_worker,
+                                      initargs=(background.size, background.tobytes())) as pool:
+        return pool.map(render_one, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+
+
+def render_slides(config_path: str, timings_path: str, output_dir: str = "slides_png", dpi: float = 192,
+                  workers: int | None = None, background_path: str | None = None,
+                  fonts_dir: str = FONTS_DIR, cache: DiskCache | None = None) -> list[str]:
+    t0 = time.monotonic()
+    with open(config_path, encoding="utf-8") as f:
+        config = json.load(f)
+    with open(timings_path, encoding="utf-8") as f:
+        timings = json.load(f)
+    os.makedirs(output_dir, exist_ok=True)
+    background_path = background_path or resolve_background(config)
+    background_digest = file_sha256(background_path)
+    jobs = make_jobs(config, timings, output_dir, dpi, fonts_dir)
+
+    todo, digests = jobs, {}
+    if cache:
+        todo = []
+        for job in jobs:
+            job["key"] = png_key(job["text"], job["options"], background_digest, dpi)
+            meta = cache.link_to(job["key"], job["path"])
+            if meta:
+                digests[job["path"]] = meta["sha256"]
+            else:
+                todo.append(job)
+        print(f"♻️ {len(jobs) - len(todo)}/{len(jobs)} slide lấy lại từ cache, render {len(todo)} slide")
+
+    size = (0, 0)
+    if todo:
+        background = load_background(background_path, dpi)
+        size = background.size
+        render_jobs(todo, background, workers or os.cpu_count() or 1)
+    rendered = {job["path"] for job in todo}
+    for job in todo:
+        digests[job["path"]] = file_sha256(job["path"])
+        if cache:
+            cache.put_file(job["key"], job["path"], {"sha256": digests[job["path"]], "dpi": dpi}, link=True)
+
+    save_manifest(output_dir, {
+        "config": os.path.basename(config_path), "background": background_digest, "dpi": dpi,
+        "slides": [{"index": job["index"], "file": os.path.basename(job["path"]), "key": job.get("key"),
+                    "sha256": digests[job["path"]], **manifest_entry(job["path"]),
+                    "rendered": job["path"] in rendered} for job in jobs],
+    })
+    if cache:
+        cache.report()
+    elapsed = time.monotonic() - t0
+    print(f"🖼 Đã render {len(todo)}/{len(jobs)} slide {'%d×%d ' % size if todo else ''}→ {output_dir} "
+          f"trong {elapsed:.1f}s")
+    return [job["path"] for job in jobs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render slide PNGs directly from config + timings.json.")
+    parser.add_argument("--config", help="Config JSON (default: configs/$CONFIG_KEY.json).")
+    parser.add_argument("--timings", default="timings.json")
+    parser.add_argument("--output-dir", default="slides_png")
+    parser.add_argument("--dpi", type=float, default=float(os.environ.get("DPI") or 192))
+    parser.add_argument("--workers", type=int, default=None, help="Default: CPU count.")
+    parser.add_argument("--background", default=None, help="Override background image.")
+    parser.add_argument("--fonts-dir", default=FONTS_DIR)
+    parser.add_argument("--cache-dir", default=None, help="Slide cache directory (default .cache/slides).")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    config_path = args.config
+    if not config_path:
+        key = os.environ.get("CONFIG_KEY")
+        if not key:
+            print("❌ CONFIG_KEY not set")
+            sys.exit(1)
+        config_path = f"configs/{key}.json"
+    render_slides(config_path, args.timings, args.output_dir, args.dpi, args.workers, args.background,
+                  args.fonts_dir, None if args.no_cache else open_slide_cache(args.cache_dir))
+
+
+if __name__ == "__main__":
+    main()
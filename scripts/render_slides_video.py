@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+render_slides_video.py
+Render video slide từ timings.json (cùng input với build_input_list.js) bằng nhiều
+tiến trình ffmpeg song song.
+
+- Timeline được cắt thành N segment tại ranh giới slide, cân bằng theo thời lượng.
+- Ranh giới tính theo frame với làm tròn luỹ kế, nên tổng số frame bằng đúng số frame
+  mà một lệnh ffmpeg duy nhất (concat demuxer, CFR) sinh ra.
+- Mọi segment dùng chung cấu hình encoder (GOP cố định, không cắt scene) để concat
+  demuxer ghép lại bằng `-c copy`; audio chỉ được mux (encode AAC) một lần ở cuối.
+
+--mode stills: slide là ảnh tĩnh, nên mỗi ảnh khác nhau (theo sha256 nội dung) chỉ
+được encode một lần thành clip ngắn (1 GOP, không B-frame); timeline được dựng bằng
+cách lặp clip và cắt clip cuối bằng `outpoint`, tất cả stream copy. Thời gian render
+tỉ lệ với số slide khác nhau thay vì độ dài video. Clip được cache theo sha256 ảnh +
+tham số encode (slide_cache.py; digest lấy từ manifest.json của render_slides.py khi
+được truyền qua --manifest, ngược lại hash ảnh), nên chạy lại sau khi sửa một slide chỉ
+encode lại clip của slide đó.
+
+Usage:
+  python scripts/render_slides_video.py --timings timings.json --images slides_png \\
+      --audio audio_adjusted.mp3 --resolution 1080p --output output.mp4 \
+      [--mode stills --manifest slides_png/manifest.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_cache import DiskCache
+from slide_cache import clip_key, manifest_digests, open_slide_cache
+
+RESOLUTIONS = {"720p": "1280:720", "1080p": "1920:1080"}
+DEFAULT_SIZE = "854:480"
+
+
+def find_slide_image(images_dir: str, index: int) -> str:
+    """slide-001.png / slide-01.png / slide-1.png như build_input_list.js."""
+    base = str(index)
+    for name in (base.zfill(3), base.zfill(2), base):
+        path = os.path.join(images_dir, f"slide-{name}.png")
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"❌ Không tìm thấy ảnh cho index {index}")
+
+
+def load_timeline(timings_path: str, images_dir: str) -> list[tuple[str, float]]:
+    with open(timings_path, encoding="utf-8") as f:
+        timings = json.load(f)
+    return [(find_slide_image(images_dir, i + 1), float(item["timing"])) for i, item in enumerate(timings)]
+
+
+def frame_bounds(durations: list[float], fps: int) -> list[int]:
+    """Frame bắt đầu của mỗi slide (+ tổng ở cuối), làm tròn trên thời gian luỹ kế."""
+    bounds, t = [0], 0.0
+    for d in durations:
+        t += d
+        bounds.append(round(t * fps))
+    return bounds
+
+
+def split_segments(bounds: list[int], n: int) -> list[tuple[int, int]]:
+    """Chia slide [0, len) thành ≤ n khoảng liên tiếp có số frame xấp xỉ nhau."""
+    slides = len(bounds) - 1
+    n = max(1, min(n, slides))
+    total = bounds[-1]
+    cuts, j = [0], 0
+    for k in range(1, n):
+        target = total * k / n
+        while j < slides and bounds[j] < target:
+            j += 1
+        cut = j - 1 if j > 0 and target - bounds[j - 1] < bounds[j] - target else j
+        if cuts[-1] < cut < slides:
+            cuts.append(cut)
+    cuts.append(slides)
+    return list(zip(cuts, cuts[1:]))
+
+
+def encoder_args(fps: int, gop_seconds: float, crf: int, preset: str, threads: int,
+                 bframes: int | None = None) -> list[str]:
+    """Cấu hình encoder dùng chung cho mọi segment (bắt buộc giống nhau để -c copy concat)."""
+    gop = max(1, round(fps * gop_seconds))
+    args = ["-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p",
+            "-r", str(fps), "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0",
+            "-threads", str(threads), "-video_track_timescale", str(fps * 1000)]
+    if bframes is not None:
+        args += ["-bf", str(bframes)]
+    return args
+
+
+def write_concat_list(path: str, entries: list[tuple]):
+    """entries: (file, duration | None[, outpoint | None]) theo cú pháp concat demuxer."""
+    with open(path, "w", encoding="utf-8") as f:
+        for file, duration, *rest in entries:
+            escaped = os.path.abspath(file).replace("'", r"'\''")
+            f.write(f"file '{escaped}'\n")
+            if duration is not None:
+                f.write(f"duration {duration:.6f}\n")
+            if rest and rest[0] is not None:
+                f.write(f"outpoint {rest[0]:.6f}\n")
+
+
+def encode_segment(images: list[str], frames: list[int], fps: int, size: str,
+                   enc: list[str], list_path: str, out_path: str):
+    # Lặp lại ảnh cuối như build_input_list.js để concat demuxer giữ duration của nó
+    entries = [(img, n / fps) for img, n in zip(images, frames)] + [(images[-1], None)]
+    write_concat_list(list_path, entries)
+    subprocess.run(["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path,
+                    "-vf", f"scale={size},format=yuv420p", *enc,
+                    "-frames:v", str(sum(frames)), "-an", out_path], check=True)
+
+
+def mux(entries: list[tuple], audio: str | None, output: str, workdir: str, audio_bitrate: str):
+    """Stream copy các clip theo concat list `entries`, encode audio một lần."""
+    list_path = os.path.join(workdir, "timeline.txt")
+    write_concat_list(list_path, entries)
+    cmd = ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio:
+        cmd += ["-i", audio, "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy",
+                "-c:a", "aac", "-b:a", audio_bitrate, "-shortest"]
+    else:
+        cmd += ["-c", "copy"]
+    subprocess.run(cmd + ["-movflags", "+faststart", output], check=True)
+
+
+def render(timeline: list[tuple[str, float]], output: str, audio: str | None = None,
+           size: str = DEFAULT_SIZE, fps: int = 25, segments: int | None = None,
+           crf: int = 18, preset: str = "slow", gop_seconds: float = 2.0,
+           audio_bitrate: str = "320k") -> dict:
+    cpus = os.cpu_count() or 1
+    segments = segments or cpus
+    images = [img for img, _ in timeline]
+    bounds = frame_bounds([d for _, d in timeline], fps)
+    frames = [b - a for a, b in zip(bounds, bounds[1:])]
+    if bounds[-1] == 0:
+        raise ValueError("Tổng thời lượng timeline < 1 frame")
+    ranges = [(a, b) for a, b in split_segments(bounds, segments) if sum(frames[a:b]) > 0]
+    enc = encoder_args(fps, gop_seconds, crf, preset, threads=max(1, cpus // len(ranges)))
+
+    workdir = tempfile.mkdtemp(prefix="slides_")
+    started = time.monotonic()
+    try:
+        def run(i_range):
+            i, (a, b) = i_range
+            # Slide 0 frame (timing quá nhỏ) bị bỏ, giống kết quả CFR của một lệnh duy nhất
+            keep = [(img, n) for img, n in zip(images[a:b], frames[a:b]) if n > 0]
+            out = os.path.join(workdir, f"seg_{i:04d}.mp4")
+            encode_segment([k[0] for k in keep], [k[1] for k in keep], fps, size, enc,
+                           os.path.join(workdir, f"seg_{i:04d}.txt"), out)
+            return out
+
+        print(f"🎞 Encode {len(ranges)} segment song song ({bounds[-1]} frame, {fps} fps, "
+              f"{len(timeline)} slide)...")
+        with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+            parts = list(pool.map(run, enumerate(ranges)))
+        encoded = time.monotonic() - started
+        mux([(p, None) for p in parts], audio, output, workdir, audio_bitrate)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    elapsed = time.monotonic() - started
+    video_seconds = bounds[-1] / fps
+    print(f"✅ Đã render {output}: {video_seconds:.1f}s video trong {elapsed:.1f}s "
+          f"(encode {encoded:.1f}s, {video_seconds / max(elapsed, 1e-6):.1f}x realtime)")
+    return {"segments": len(ranges), "frames": bounds[-1], "seconds": elapsed}
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def still_entries(clip: str, frames: int, clip_frames: int, fps: int) -> list[tuple]:
+    """Lặp clip đủ `frames` frame; clip cuối bị cắt bằng outpoint.
+
+    Clip không có B-frame nên pts tăng theo thứ tự decode và bỏ các packet ≥ outpoint
+    vẫn decode được. outpoint đặt giữa hai frame để tránh lỗi làm tròn micro giây;
+    `duration` (ưu tiên hơn outpoint khi concat tính offset) giữ ranh giới đúng frame.
+    """
+    full, rem = divmod(frames, clip_frames)
+    entries = [(clip, clip_frames / fps)] * full
+    if rem:
+        entries.append((clip, rem / fps, (rem - 0.5) / fps))
+    return entries
+
+
+def render_stills(timeline: list[tuple[str, float]], output: str, audio: str | None = None,
+                  size: str = DEFAULT_SIZE, fps: int = 25, crf: int = 18, preset: str = "slow",
+                  clip_seconds: float = 2.0, audio_bitrate: str = "320k",
+                  cache: DiskCache | None = None, manifest: str | None = None) -> dict:
+    cpus = os.cpu_count() or 1
+    bounds = frame_bounds([d for _, d in timeline], fps)
+    frames = [b - a for a, b in zip(bounds, bounds[1:])]
+    if bounds[-1] == 0:
+        raise ValueError("Tổng thời lượng timeline < 1 frame")
+    clip_frames = max(1, round(fps * clip_seconds))
+
+    images = list(dict.fromkeys(img for img, _ in timeline))
+    known = manifest_digests(manifest) if manifest else {}
+    digests = {img: known.get(img) or file_sha256(img) for img in images}
+    unique = {}
+    for img, n in zip((img for img, _ in timeline), frames):
+        if n > 0:
+            unique.setdefault(digests[img], img)
+    enc = encoder_args(fps, clip_seconds, crf, preset, threads=max(1, cpus // max(1, min(cpus, len(unique)))),
+                       bframes=0)
+
+    workdir = tempfile.mkdtemp(prefix="stills_")
+    started = time.monotonic()
+    try:
+        clips, todo = {}, {}
+        for digest, img in unique.items():
+            out = os.path.join(workdir, f"{digest[:16]}.mp4")
+            if cache and cache.link_to(clip_key(digest, size, fps, crf, preset, clip_frames), out):
+                clips[digest] = out
+            else:
+                todo[digest] = img
+
+        def encode_clip(item):
+            digest, img = item
+            out = os.path.join(workdir, f"{digest[:16]}.mp4")
+            subprocess.run(["ffmpeg", "-y", "-v", "error", "-loop", "1", "-framerate", str(fps), "-i", img,
+                            "-vf", f"scale={size},format=yuv420p", *enc,
+                            "-frames:v", str(clip_frames), "-an", out], check=True)
+            if cache:
+                cache.put_file(clip_key(digest, size, fps, crf, preset, clip_frames), out,
+                               {"image": os.path.basename(img), "size": size, "fps": fps}, link=True)
+            return digest, out
+
+        print(f"🖼 Encode {len(todo)} ảnh khác nhau / {len(timeline)} slide "
+              f"({len(clips)} clip lấy lại từ cache, clip {clip_frames} frame, {fps} fps)...")
+        if todo:
+            with ThreadPoolExecutor(max_workers=max(1, min(cpus, len(todo)))) as pool:
+                clips.update(pool.map(encode_clip, todo.items()))
+        if cache:
+            cache.report()
+        encoded = time.monotonic() - started
+
+        entries = []
+        for (img, _), n in zip(timeline, frames):
+            if n > 0:
+                entries += still_entries(clips[digests[img]], n, clip_frames, fps)
+        mux(entries, audio, output, workdir, audio_bitrate)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    elapsed = time.monotonic() - started
+    video_seconds = bounds[-1] / fps
+    print(f"✅ Đã render {output}: {video_seconds:.1f}s video trong {elapsed:.1f}s "
+          f"(encode {len(todo)}/{len(unique)} clip {encoded:.1f}s, {video_seconds / max(elapsed, 1e-6):.1f}x realtime)")
+    return {"clips": len(unique), "encoded": len(todo), "frames": bounds[-1], "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a slide video in parallel segments.")
+    parser.add_argument("--timings", default=os.environ.get("TIMING_FILE", "timings.json"))
+    parser.add_argument("--images", default="slides_png")
+    parser.add_argument("--audio", help="Audio track to mux once at the end (e.g. audio_adjusted.mp3).")
+    parser.add_argument("--output", default="output.mp4")
+    parser.add_argument("--resolution", default=os.environ.get("RESOLUTION", ""),
+                        help="720p, 1080p or anything else for 854x480 (same as the workflows).")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--segments", type=int, default=None, help="Default: number of CPUs.")
+    parser.add_argument("--crf", type=int, default=18)
+    parser.add_argument("--preset", default="slow")
+    parser.add_argument("--gop", type=float, default=2.0, help="GOP length in seconds (clip length in stills mode).")
+    parser.add_argument("--mode", choices=["segments", "stills"], default="segments",
+                        help="segments: parallel full encode; stills: encode each distinct slide once.")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Stills mode: slide clip cache directory (default .cache/slides).")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--manifest", default=None,
+                        help="Stills mode: manifest.json written by render_slides.py in this run "
+                             "(reuse its PNG digests instead of hashing the images).")
+    args = parser.parse_args()
+
+    try:
+        timeline = load_timeline(args.timings, args.images)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    if not timeline:
+        print(f"❌ {args.timings} không có slide nào.")
+        sys.exit(1)
+    size = RESOLUTIONS.get(args.resolution, DEFAULT_SIZE)
+    if args.mode == "stills":
+        render_stills(timeline, args.output, args.audio, size, args.fps, args.crf, args.preset, args.gop,
+                      cache=None if args.no_cache else open_slide_cache(args.cache_dir),
+                      manifest=args.manifest)
+    else:
+        render(timeline, args.output, args.audio, size, args.fps, args.segments, args.crf, args.preset, args.gop)
+
+
+if __name__ == "__main__":
+    main()
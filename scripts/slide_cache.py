@@ -0,0 +1,72 @@
+"""
+slide_cache.py
+Cache slide trên đĩa, dùng chung cho render_slides.py (PNG) và render_slides_video.py
+(clip H.264 của từng ảnh tĩnh), để sửa một slide rồi chạy lại chỉ render/encode đúng
+slide đó.
+
+- PNG: key = sha256(text, textOptions, sha256 ảnh nền, DPI); metadata giữ sha256 của PNG.
+- Clip: key = sha256(sha256 PNG, kích thước, fps, crf, preset, số frame của clip).
+- render_slides.py ghi manifest.json cạnh các PNG (index → file, key, sha256, size,
+  mtime_ns) để render_slides_video.py --manifest lấy digest mà không phải hash lại ảnh.
+  Entry chỉ được tin khi PNG còn đúng size và mtime_ns đã ghi: công cụ khác (vd. pdftoppm)
+  ghi đè PNG cùng kích thước trong thư mục đó thì ảnh bị hash lại.
+
+Env:
+  SLIDE_CACHE_DIR     thư mục cache (mặc định .cache/slides)
+  SLIDE_CACHE_MAX_MB  dung lượng tối đa trước khi evict LRU (mặc định 2048)
+"""
+
+import json
+import os
+
+from disk_cache import DiskCache, make_key
+
+DEFAULT_DIR = os.environ.get("SLIDE_CACHE_DIR", ".cache/slides")
+DEFAULT_MAX_MB = int(os.environ.get("SLIDE_CACHE_MAX_MB", "2048"))
+MANIFEST_NAME = "manifest.json"
+
+
+def png_key(text: str, options: dict, background_digest: str, dpi: float) -> str:
+    return make_key("slide-png-v1", text, options, background_digest, dpi)
+
+
+def clip_key(png_digest: str, size: str, fps: int, crf: int, preset: str, clip_frames: int) -> str:
+    return make_key("slide-clip-v1", png_digest, size, fps, crf, preset, clip_frames)
+
+
+def save_manifest(images_dir: str, manifest: dict):
+    path = os.path.join(images_dir, MANIFEST_NAME)
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".part", path)
+
+
+def manifest_entry(path: str) -> dict:
+    """size + mtime_ns của một PNG, ghi vào manifest để phát hiện file bị ghi đè sau đó."""
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def manifest_digests(manifest_path: str) -> dict[str, str]:
+    """{đường dẫn PNG: sha256} từ manifest, chỉ giữ file còn đúng size và mtime_ns đã ghi."""
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            slides = json.load(f)["slides"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return {}
+    images_dir = os.path.dirname(manifest_path)
+    digests = {}
+    for slide in slides:
+        path = os.path.join(images_dir, slide["file"])
+        try:
+            current = manifest_entry(path)
+        except FileNotFoundError:
+            continue
+        if current == {"size": slide.get("size"), "mtime_ns": slide.get("mtime_ns")}:
+            digests[path] = slide["sha256"]
+    return digests
+
+
+def open_slide_cache(path: str | None = None, max_mb: int | None = None) -> DiskCache:
+    max_mb = DEFAULT_MAX_MB if max_mb is None else max_mb
+    return DiskCache(path or DEFAULT_DIR, max_mb * 1024 * 1024, name="Slide cache")
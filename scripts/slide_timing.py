@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+slide_timing.py
+Tính slides-timing.json (thời lượng mỗi slide) từ transcript SRT word-level, thay cho
+generateTimings của generate_timing_json_with_parser(_v2).js.
+
+Bản JS chuẩn hoá lại cùng một từ SRT nhiều lần, so mọi từ slide với mọi từ SRT bằng một
+ma trận Levenshtein mới cấp phát, và splice mảng SRT sau mỗi slide: O(từ² × ký tự²) mỗi
+slide, và chỉ throw khi tới đúng slide lệch. Ở đây:
+
+- SRT và slide được chuẩn hoá đúng một lần thành mảng token (text_match.normalize_tokens),
+  token được intern thành số nguyên nên so khớp chính xác là so sánh int.
+- Toàn bộ chuỗi token của mọi slide được căn với chuỗi token SRT trong một lượt quy hoạch
+  động đơn điệu có dải (band): mỗi hàng chỉ tính 2·band+1 ô quanh ô tốt nhất của hàng trước,
+  nên chi phí O(số từ × band) và chịu được lệch tích luỹ bất kỳ, miễn mỗi đoạn thừa / thiếu
+  liên tiếp không vượt band. Chi phí ô là số nguyên (khớp 0, thay / thừa / thiếu 1), hàng
+  DP lưu bằng array('i') và lần ngược từ đó, nên vòng trong không cấp phát gì thêm.
+- Ranh giới slide giữ đúng quy tắc của bản JS: slide đầu bắt đầu ở 0, slide kết thúc ở
+  trung điểm giữa cuối từ khớp cuối cùng và đầu từ SRT kế tiếp (hoặc cuối từ đó nếu là từ
+  cuối transcript); slide sau bắt đầu ở ranh giới slide trước.
+- Mỗi slide có confidence (0–100) tính như fuzzyMatchAverage của bản JS, nên
+  --match-threshold giữ nguyên ý nghĩa: trung bình, trên các token SRT thuộc slide, độ giống
+  cao nhất với một từ bất kỳ của slide. Từ Whisper bỏ sót không bị trừ điểm, từ chèn thêm
+  thì có. Token có trong slide được 1 điểm nhờ tra set; chỉ token lệch mới được so bằng
+  Levenshtein có chặn, dừng sớm (text_match.similarity). Mọi slide dưới --match-threshold
+  được liệt kê cùng lúc sau một lượt căn, thay vì throw ở slide đầu tiên lệch.
+
+Output giữ đúng định dạng của bản JS – [{"text", "timing"}] với timing là giây làm tròn 2
+chữ số – và thêm trường "confidence" cho từng slide.
+
+Slide lấy từ --slides (JSON) hoặc chia thẳng từ content.txt bằng content_chunker (--content,
+--max-char, --min-char – cùng vai trò processRawContent của bản JS).
+
+Usage:
+  python scripts/slide_timing.py --srt transcript.srt --content content.txt \\
+      --max-char 200 --min-char 100 --match-threshold 90 --max-offset 3
+  python scripts/slide_timing.py --srt transcript.srt --slides slides.json --output slides-timing.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from array import array
+
+from content_chunker import ChunkPacker, chunk_file
+from srt_model import SrtDocument
+from text_match import normalize_tokens, similarity
+
+class SlideTimingError(ValueError):
+    def __init__(self, problems: list[str]):
+        super().__init__(f"{len(problems)} slide không khớp transcript:\n  " + "\n  ".join(problems))
+        self.problems = problems
+
+
+# ───────── tokens ─────────
+def srt_tokens(doc: SrtDocument) -> tuple[list[str], list[int], list[int]]:
+    """Token của transcript cùng thời điểm bắt đầu / kết thúc (ms) của từng token.
+
+    Với SRT word-level (max_words_per_line 1) mỗi cue là đúng một token và giữ nguyên thời
+    gian cue như bản JS; cue nhiều từ được chia đều thời lượng cho các token của nó.
+    """
+    tokens, starts, ends = [], [], []
+    for i, text in enumerate(doc.texts()):
+        words = normalize_tokens(text)
+        s, e = doc.starts[i], doc.ends[i]
+        n = len(words)
+        for k, word in enumerate(words):
+            tokens.append(word)
+            starts.append(s + (e - s) * k // n)
+            ends.append(s + (e - s) * (k + 1) // n)
+    return tokens, starts, ends
+
+
+def load_slides(path: str) -> list[str]:
+    """Slide text từ JSON: list chuỗi, hoặc list {"text": …} (vd. slides-timing.json / timings.json cũ)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [s["text"] if isinstance(s, dict) else s for s in data]
+
+
+# ───────── alignment ─────────
+def align(slide_ids: list[int], srt_ids: list[int], band: int) -> list[int]:
+    """Căn chuỗi token slide với chuỗi token SRT (đều là id int) trong một lượt DP có dải.
+
+    Chi phí: khớp 0, thay 1, thừa / thiếu một token 1. Trả về, cho mỗi token slide, vị trí
+    token SRT được căn với nó (khớp hoặc thay) hoặc -1. Token SRT thừa ở cuối transcript
+    không bị tính phí (outro, lời chào…).
+    """
+    n, m = len(slide_ids), len(srt_ids)
+    width = min(2 * band + 1, m + 1)
+    big = n + m + 1
+    pad = [big] * (band + 2)
+    srt_pad = [-1] + srt_ids  # srt_pad[j] = token SRT thứ j (1-based); ô j = 0 không có token
+
+    # hàng 0: bỏ qua j token SRT đầu tiên tốn j
+    los = [0]
+    rows = [array("i", range(width))]
+    prev, prev_lo = list(range(width)), 0
+    for x in slide_ids:
+        # dải hàng i đặt quanh ô tốt nhất của hàng trước, lệch một bước theo đường chéo; khi hoà
+        # lấy ô phải nhất – trong đoạn lệch, đi chéo (thay) và đi dọc (bỏ token slide) cùng giá,
+        # chọn ô trái nhất làm dải đứng yên trong khi đường đúng vẫn đi chéo và trượt khỏi dải
+        best = len(prev) - 1 - prev[::-1].index(min(prev))
+        lo = max(prev_lo, min(prev_lo + best + 1 - band, m + 1 - width))
+        s = lo - prev_lo
+        ext = [big] + prev + pad
+        cur = []
+        append = cur.append
+        left = big
+        for d, u, y in zip(ext[s:s + width], ext[s + 1:s + 1 + width], srt_pad[lo:lo + width]):
+            if y != x:
+                d += 1
+            u += 1
+            if u < d:
+                d = u
+            left += 1
+            if left < d:
+                d = left
+            append(d)
+            left = d
+        los.append(lo)
+        rows.append(array("i", cur))
+        prev, prev_lo = cur, lo
+
+    # kết thúc ở ô tốt nhất của hàng cuối (token SRT thừa phía sau miễn phí), rồi lần ngược
+    pairs = [-1] * n
+    i = n
+    j = los[n] + prev.index(min(prev))
+    while i > 0:
+        lo, plo = los[i], los[i - 1]
+        d = rows[i][j - lo]
+        if j > plo and j - 1 - plo < len(rows[i - 1]) and \
+                rows[i - 1][j - 1 - plo] + (srt_pad[j] != slide_ids[i - 1]) == d:
+            pairs[i - 1] = j - 1
+            i, j = i - 1, j - 1
+        elif plo <= j < plo + len(rows[i - 1]) and rows[i - 1][j - plo] + 1 == d:
+            i -= 1
+        else:
+            j -= 1
+    return pairs
+
+
+# ───────── timings ─────────
+def fuzzy_match_average(heard: list[str], words: list[str]) -> float:
+    """Như fuzzyMatchAverage của bản JS: trung bình độ giống cao nhất của mỗi token SRT với từ slide (0–100)."""
+    if not heard:
+        return 0.0
+    vocab = set(words)
+    total = 0.0
+    for token in heard:
+        if token in vocab:
+            total += 1
+            continue
+        best = 0.0
+        for word in vocab:
+            best = max(best, similarity(token, word, best))  # dưới best thì dừng sớm, trả 0
+        total += best
+    return 100 * total / len(heard)
+
+
+def slide_timings(doc: SrtDocument, slides: list[str], match_threshold: float = 90,
+                  band: int = 32) -> list[dict]:
+    """[{"text", "timing", "confidence"}] cho các slide có chữ (slide rỗng sau chuẩn hoá bị bỏ như bản JS)."""
+    tokens, starts, ends = srt_tokens(doc)
+    if not tokens:
+        raise SlideTimingError(["transcript không có từ nào"])
+    vocab_ids: dict[str, int] = {}
+    srt_ids = [vocab_ids.setdefault(t, len(vocab_ids)) for t in tokens]
+    kept, slide_words, slide_ids, bounds = [], [], [], []
+    for text in slides:
+        words = normalize_tokens(text)
+        if not words:
+            continue
+        kept.append(text)
+        slide_words.append(words)
+        slide_ids.extend(vocab_ids.setdefault(w, len(vocab_ids)) for w in words)
+        bounds.append(len(slide_ids))
+
+    pairs = align(slide_ids, srt_ids, band)
+
+    out, problems = [], []
+    last_ms, last_j, first = 0, -1, 0
+    for s, (text, words, stop) in enumerate(zip(kept, slide_words, bounds)):
+        prev_j = last_j
+        for i in range(first, stop):
+            if pairs[i] >= 0:
+                last_j = pairs[i]
+        confidence = round(fuzzy_match_average(tokens[prev_j + 1:last_j + 1], words), 2)
+        if last_j < 0:
+            end_ms = 0
+        elif last_j == len(tokens) - 1:
+            end_ms = ends[last_j]
+        else:
+            end_ms = (ends[last_j] + starts[last_j + 1]) * 0.5
+        out.append({"text": text, "timing": round((end_ms - last_ms) / 1000, 2), "confidence": confidence})
+        if confidence < match_threshold:
+            heard = " ".join(tokens[prev_j + 1:last_j + 1])
+            problems.append(f"#{s + 1} ({confidence:.1f}%): slide «{text.strip()[:80]}» ↔ SRT «{heard[:80]}»")
+        last_ms, first = end_ms, stop
+    if problems:
+        raise SlideTimingError(problems)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute slides-timing.json from a word-level SRT.")
+    parser.add_argument("--srt", required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--slides", help="JSON list of slide texts (strings or objects with a 'text' field).")
+    source.add_argument("--content", help="content.txt, split into slides with content_chunker.")
+    parser.add_argument("--max-char", "--maxChar", type=int, default=200, help="Max characters per slide (--content).")
+    parser.add_argument("--min-char", "--minChar", type=int, default=100, help="Min characters per slide (--content).")
+    parser.add_argument("--match-threshold", "--matchThreshold", type=float, default=90,
+                        help="Minimum per-slide confidence (0-100), as in the JS tool.")
+    parser.add_argument("--max-offset", "--maxOffset", type=int, default=3,
+                        help="Kept for JS compatibility; the alignment band is at least 8× this.")
+    parser.add_argument("--band", type=int, default=32,
+                        help="Max run of extra/missing words tolerated in one place.")
+    parser.add_argument("--output", default="slides-timing.json")
+    args = parser.parse_args()
+
+    t0 = time.monotonic()
+    doc = SrtDocument.load(args.srt)
+    if args.content:
+        slides = chunk_file(args.content, {"slides": ChunkPacker(args.max_char, args.min_char)})["slides"]
+    else:
+        slides = load_slides(args.slides)
+    try:
+        timings = slide_timings(doc, slides, args.match_threshold, max(args.band, 8 * args.max_offset))
+    except SlideTimingError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(timings, f, ensure_ascii=False, indent=2)
+    low = min(t["confidence"] for t in timings) if timings else 100
+    print(f"💾 {args.output}: {len(timings)} slide, {len(doc)} cue, confidence thấp nhất {low:.1f}% "
+          f"({time.monotonic() - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
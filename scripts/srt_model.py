@@ -0,0 +1,312 @@
+"""
+srt_model.py
+Shared, compact SRT model for the Python tools (translate_srt, transcription
+stitching, slide timing, content alignment).
+
+SrtDocument stores a whole subtitle file column-wise instead of one object per cue:
+  ids     array('q')  – cue numbers as written in the file
+  starts  array('q')  – start times in milliseconds
+  ends    array('q')  – end times in milliseconds
+  text    str         – all cue texts concatenated into one buffer
+  offsets array('q')  – len(doc) + 1 offsets into `text`
+
+With word-level whisper output (max_words_per_line 1) an episode has tens of
+thousands of cues; this layout keeps parsing/serializing linear, memory small,
+and makes time operations (shift, atempo scale, concat) bulk operations over
+two integer arrays. NumPy is used for those when it is installed.
+
+Usage:
+  from srt_model import SrtDocument
+  doc = SrtDocument.load("transcript.srt")
+  doc.validate()                    # list of problems (empty = valid)
+  doc.scaled(1 / 0.8).save("out.srt")
+"""
+
+import re
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as _np
+except ImportError:  # NumPy là tuỳ chọn, không có thì dùng vòng lặp thuần Python
+    _np = None
+
+Cue = namedtuple("Cue", "index start end text")
+
+TIME = r"(\d{1,2}):(\d{2}):(\d{2})[,.](\d{3})"
+# Trong BLOCK_RE phần HH:MM:SS được bắt nguyên cụm để tra cache (_hms_ms), tránh 4 lần int() mỗi mốc
+_BLOCK_TIME = r"(\d{1,2}:\d{2}:\d{2})[,.](\d{3})"
+BLOCK_RE = re.compile(
+    r"[ \t]*(\d+)[ \t]*\n[ \t]*" + _BLOCK_TIME + r"[ \t]*-->[ \t]*" + _BLOCK_TIME + r"[^\n]*"
+    # cue rỗng (dòng trống ngay sau timecode) phải được thử trước, nếu không (.*?) sẽ nuốt cue kế tiếp
+    r"(?:\n[ \t]*\n|\n?\Z|\n(.*?)(?:\n[ \t]*\n|\n?\Z))",
+    re.DOTALL,
+)
+TIME_RE = re.compile(TIME)
+
+
+class SrtValidationError(ValueError):
+    pass
+
+
+_HMS_CACHE: dict[int, str] = {}
+_MS_CACHE: dict[str, int] = {}
+
+
+def _hms(seconds: int) -> str:
+    hms = _HMS_CACHE.get(seconds)
+    if hms is None:
+        h, rem = divmod(seconds, 3600)
+        m, s = divmod(rem, 60)
+        hms = _HMS_CACHE[seconds] = f"{h:02d}:{m:02d}:{s:02d}"
+    return hms
+
+
+def _hms_ms(hms: str) -> int:
+    ms = _MS_CACHE.get(hms)
+    if ms is None:
+        h, m, s = hms.split(":")
+        ms = _MS_CACHE[hms] = ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000
+    return ms
+
+
+def format_time(ms: int) -> str:
+    ms = max(0, int(ms))
+    return f"{_hms(ms // 1000)},{ms % 1000:03d}"
+
+
+def parse_time(value: str) -> int:
+    m = TIME_RE.fullmatch(value.strip())
+    if not m:
+        raise ValueError(f"invalid SRT time: {value!r}")
+    h, mi, s, ms = map(int, m.groups())
+    return ((h * 60 + mi) * 60 + s) * 1000 + ms
+
+
+def _map_times(values: array, scale: float = 1.0, shift: int = 0) -> array:
+    """round(v * scale) + shift cho cả mảng, kẹp về >= 0."""
+    if _np is not None and len(values):
+        a = _np.frombuffer(values, dtype=_np.int64)
+        out = _np.rint(a * scale).astype(_np.int64) + shift if scale != 1.0 else a + shift
+        return array("q", _np.maximum(out, 0).astype(_np.int64).tobytes())
+    if scale == 1.0:
+        if shift >= 0:
+            return array("q", [v + shift for v in values])
+        return array("q", [max(0, v + shift) for v in values])
+    return array("q", [max(0, round(v * scale) + shift) for v in values])
+
+
+class SrtDocument:
+    __slots__ = ("ids", "starts", "ends", "text", "offsets", "_garbage")
+
+    def __init__(self, ids=None, starts=None, ends=None, text="", offsets=None):
+        self.ids = ids if ids is not None else array("q")
+        self.starts = starts if starts is not None else array("q")
+        self.ends = ends if ends is not None else array("q")
+        self.text = text
+        self.offsets = offsets if offsets is not None else array("q", [0])
+        self._garbage = []  # (vị trí, đoạn) không parse được – dùng cho validate()
+
+    # ───────── build ─────────
+    @classmethod
+    def parse(cls, raw: str, strict: bool = False) -> "SrtDocument":
+        """Parse SRT trong một lượt regex. strict=True raise SrtValidationError nếu file không hợp lệ."""
+        raw = raw.lstrip("\ufeff").replace("\r\n", "\n").replace("\r", "\n")
+        ids, starts, ends, offsets = array("q"), array("q"), array("q"), array("q", [0])
+        texts, garbage = [], []
+        total = 0
+        pos = 0
+        for m in BLOCK_RE.finditer(raw):
+            if raw[pos:m.start()].strip():
+                garbage.append((pos, raw[pos:m.start()].strip()))
+            pos = m.end()
+            g = m.groups()
+            ids.append(int(g[0]))
+            starts.append(_hms_ms(g[1]) + int(g[2]))
+            ends.append(_hms_ms(g[3]) + int(g[4]))
+            t = (g[5] or "").strip()
+            texts.append(t)
+            total += len(t)
+            offsets.append(total)
+        if raw[pos:].strip():
+            garbage.append((pos, raw[pos:].strip()))
+        doc = cls(ids, starts, ends, "".join(texts), offsets)
+        doc._garbage = garbage
+        if strict:
+            doc.validate(raise_on_error=True)
+        return doc
+
+    @classmethod
+    def load(cls, path: str, strict: bool = False) -> "SrtDocument":
+        with open(path, encoding="utf-8") as f:
+            return cls.parse(f.read(), strict=strict)
+
+    @classmethod
+    def from_cues(cls, cues) -> "SrtDocument":
+        doc = cls()
+        texts, total = [], 0
+        for c in cues:
+            doc.ids.append(int(c.index))
+            doc.starts.append(int(c.start))
+            doc.ends.append(int(c.end))
+            texts.append(c.text)
+            total += len(c.text)
+            doc.offsets.append(total)
+        doc.text = "".join(texts)
+        return doc
+
+    @classmethod
+    def concat(cls, docs, offsets_ms=None, renumber: bool = True) -> "SrtDocument":
+        """Nối nhiều document; docs[k] được dời thêm offsets_ms[k] mili-giây."""
+        offsets_ms = offsets_ms or [0] * len(docs)
+        out = cls()
+        texts, base = [], 0
+        for doc, off in zip(docs, offsets_ms):
+            out.ids.extend(doc.ids)
+            out.starts.extend(_map_times(doc.starts, shift=int(off)) if off else doc.starts)
+            out.ends.extend(_map_times(doc.ends, shift=int(off)) if off else doc.ends)
+            out.offsets.extend(array("q", [o + base for o in doc.offsets[1:]]))
+            texts.append(doc.text)
+            base += len(doc.text)
+        out.text = "".join(texts)
+        return out.renumbered() if renumber else out
+
+    def _derive(self, ids=None, starts=None, ends=None) -> "SrtDocument":
+        return SrtDocument(ids if ids is not None else self.ids,
+                           starts if starts is not None else self.starts,
+                           ends if ends is not None else self.ends,
+                           self.text, self.offsets)
+
+    # ───────── access ─────────
+    def __len__(self):
+        return len(self.starts)
+
+    def text_at(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def cue(self, i: int) -> Cue:
+        return Cue(self.ids[i], self.starts[i], self.ends[i], self.text_at(i))
+
+    def __iter__(self):
+        text, off = self.text, self.offsets
+        for i in range(len(self)):
+            yield Cue(self.ids[i], self.starts[i], self.ends[i], text[off[i]:off[i + 1]])
+
+    def texts(self):
+        text, off = self.text, self.offsets
+        return [text[off[i]:off[i + 1]] for i in range(len(self))]
+
+    @property
+    def duration_ms(self) -> int:
+        return max(self.ends) if len(self) else 0
+
+    # ───────── bulk operations (trả về document mới, text buffer dùng chung) ─────────
+    def shifted(self, ms: int) -> "SrtDocument":
+        return self._derive(starts=_map_times(self.starts, shift=ms), ends=_map_times(self.ends, shift=ms))
+
+    def scaled(self, factor: float) -> "SrtDocument":
+        """Nhân mọi mốc thời gian với `factor` (vd. audio atempo=0.8 ⇒ factor = 1 / 0.8)."""
+        return self._derive(starts=_map_times(self.starts, scale=factor),
+                            ends=_map_times(self.ends, scale=factor))
+
+    def clamped(self, max_ms: int) -> "SrtDocument":
+        """Kẹp mọi mốc thời gian vào [0, max_ms] (vd. timestamp whisper vượt quá cuối shard)."""
+        def clip(col):
+            return array("q", (min(max(v, 0), max_ms) for v in col))
+        return self._derive(starts=clip(self.starts), ends=clip(self.ends))
+
+    def renumbered(self, first: int = 1) -> "SrtDocument":
+        return self._derive(ids=array("q", range(first, first + len(self))))
+
+    def slice(self, i: int, j: int) -> "SrtDocument":
+        i, j, _ = slice(i, j).indices(len(self))
+        j = max(i, j)
+        base = self.offsets[i]
+        return SrtDocument(self.ids[i:j], self.starts[i:j], self.ends[i:j],
+                           self.text[base:self.offsets[j]],
+                           array("q", [o - base for o in self.offsets[i:j + 1]]))
+
+    def split_at(self, ms: int) -> tuple["SrtDocument", "SrtDocument"]:
+        """Tách theo thời gian: cue có start < ms sang trái, còn lại sang phải (phải được dời về 0)."""
+        lo, hi = 0, len(self)
+        while lo < hi:  # starts luôn tăng dần trong SRT hợp lệ ⇒ tìm nhị phân
+            mid = (lo + hi) // 2
+            if self.starts[mid] < ms:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self.slice(0, lo), self.slice(lo, len(self)).shifted(-ms)
+
+    def merged(self, group: int = 0, max_gap_ms: int | None = None, max_chars: int | None = None,
+               sep: str = " ") -> "SrtDocument":
+        """Gộp các cue liên tiếp thành một cue (vd. từ word-level thành câu/dòng).
+
+        Một nhóm kết thúc khi đủ `group` cue, khi khoảng lặng > max_gap_ms,
+        hoặc khi thêm cue kế tiếp sẽ vượt max_chars ký tự.
+        """
+        cues = []
+        cur_start = cur_end = None
+        parts = []
+        length = 0
+        for c in self:
+            if parts and ((group and len(parts) >= group)
+                          or (max_gap_ms is not None and c.start - cur_end > max_gap_ms)
+                          or (max_chars and length + len(sep) + len(c.text) > max_chars)):
+                cues.append(Cue(len(cues) + 1, cur_start, cur_end, sep.join(parts)))
+                parts, length = [], 0
+            if not parts:
+                cur_start = c.start
+                length = len(c.text)
+            else:
+                length += len(sep) + len(c.text)
+            parts.append(c.text)
+            cur_end = c.end
+        if parts:
+            cues.append(Cue(len(cues) + 1, cur_start, cur_end, sep.join(parts)))
+        return SrtDocument.from_cues(cues)
+
+    # ───────── validation ─────────
+    def validate(self, raise_on_error: bool = False, max_errors: int = 50) -> list[str]:
+        """Kiểm tra chặt: đánh số liên tục từ 1, start ≤ end, thời gian không lùi, text không rỗng."""
+        errors = [f"unparsable content at char {pos}: {snippet[:60]!r}" for pos, snippet in self._garbage]
+        prev_end = 0
+        for i in range(len(self)):
+            if len(errors) >= max_errors:
+                errors.append("… (more errors truncated)")
+                break
+            cue_id, start, end = self.ids[i], self.starts[i], self.ends[i]
+            if cue_id != i + 1:
+                errors.append(f"cue #{i + 1}: index is {cue_id}, expected {i + 1}")
+            if end < start:
+                errors.append(f"cue {cue_id}: end {format_time(end)} before start {format_time(start)}")
+            if start < prev_end:
+                errors.append(f"cue {cue_id}: starts at {format_time(start)}, overlapping previous cue "
+                              f"ending at {format_time(prev_end)}")
+            if self.offsets[i] == self.offsets[i + 1]:
+                errors.append(f"cue {cue_id}: empty text")
+            prev_end = max(prev_end, end)
+        if errors and raise_on_error:
+            raise SrtValidationError("invalid SRT:\n  " + "\n  ".join(errors))
+        return errors
+
+    # ───────── output ─────────
+    def serialize(self) -> str:
+        text, off = self.text, self.offsets
+        hms = _hms
+        return "\n\n".join(
+            f"{cue_id}\n{hms(s // 1000)},{s % 1000:03d} --> {hms(e // 1000)},{e % 1000:03d}\n{text[off[i]:off[i + 1]]}"
+            for i, (cue_id, s, e) in enumerate(zip(self.ids, self.starts, self.ends))
+        ) + "\n"
+
+    def save(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.serialize())
+        return path
+
+
+def parse_cues(raw: str) -> list[Cue]:
+    return list(SrtDocument.parse(raw))
+
+
+def format_cues(cues) -> str:
+    return SrtDocument.from_cues(cues).serialize()
@@ -0,0 +1,105 @@
+"""
+text_match.py
+So khớp chữ dùng chung cho các tool Python căn slide / nội dung với transcript.
+
+- normalize_tokens: port của normalizeText trong generate_timing_json_with_parser_v2.js
+  (lowercase, tách theo khoảng trắng / "-" / "—", bỏ ký tự ngoài [A-Za-z0-9_], đổi
+  "one".."thirty", "hundred" thành số) nhưng trả thẳng list token để chỉ chuẩn hoá một lần.
+- levenshtein: khoảng cách edit có chặn trên max_dist – bỏ qua prefix/suffix chung, chỉ
+  tính dải |i - j| <= max_dist và dừng sớm khi cả hàng đã vượt ngưỡng. Không cấp phát ma
+  trận, chỉ hai hàng.
+- similarity: 1 - distance / max(len), về 0 khi dưới min_sim (không tính tiếp).
+- word_spans: token của align_srt_to_content (lowercase, bỏ dấu câu / ký hiệu trong mỗi
+  cụm không có khoảng trắng) kèm bảng offset token → [start, end) trong chuỗi gốc, để cắt
+  lại đúng đoạn text gốc mà không phải chuẩn hoá lại.
+"""
+
+import re
+
+NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7",
+    "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12", "thirteen": "13",
+    "fourteen": "14", "fifteen": "15", "sixteen": "16", "seventeen": "17", "eighteen": "18",
+    "nineteen": "19", "twenty": "20", "thirty": "30", "hundred": "100",
+}
+
+_SPLIT_RE = re.compile(r"\s+|-|—")
+_STRIP_RE = re.compile(r"[^\w\s]", re.ASCII)  # \w của JS chỉ là ASCII
+_CHUNK_RE = re.compile(r"\S+")
+_PUNCT_RE = re.compile(r"[\W_]+")  # ≈ [\p{P}\p{S}] của bản JS, giữ chữ có dấu
+
+
+def normalize_tokens(text: str) -> list[str]:
+    """Token đã chuẩn hoá của text, bỏ token rỗng (vd. chỉ có dấu câu)."""
+    out = []
+    for word in _SPLIT_RE.split(text.lower()):
+        word = _STRIP_RE.sub("", word)
+        if word:
+            out.append(NUMBER_WORDS.get(word, word))
+    return out
+
+
+def word_spans(text: str) -> tuple[list[str], list[int], list[int]]:
+    """(tokens, starts, ends): mỗi cụm không khoảng trắng → một token đã chuẩn hoá cùng vị
+    trí [start, end) của cụm trong text gốc; cụm chỉ có dấu câu bị bỏ."""
+    tokens, starts, ends = [], [], []
+    for m in _CHUNK_RE.finditer(text):
+        token = _PUNCT_RE.sub("", m.group().lower())
+        if token:
+            tokens.append(token)
+            starts.append(m.start())
+            ends.append(m.end())
+    return tokens, starts, ends
+
+
+def levenshtein(a: str, b: str, max_dist: int | None = None) -> int:
+    """Khoảng cách Levenshtein; với max_dist, trả max_dist + 1 ngay khi chắc chắn vượt ngưỡng."""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    limit = len(a) if max_dist is None else max_dist
+    if len(a) - len(b) > limit:
+        return limit + 1
+    # bỏ prefix / suffix chung – phần lớn cặp từ gần giống chỉ khác vài ký tự
+    start = 0
+    while start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a, end_b = end_a - 1, end_b - 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not b:
+        return len(a) if len(a) <= limit else limit + 1
+
+    big = limit + 1
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        cur = [big] * (len(b) + 1)
+        cur[0] = i if i <= limit else big
+        row_min = cur[0]
+        for j in range(lo, hi + 1):
+            d = prev[j - 1] + (ca != b[j - 1])
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if cur[j - 1] + 1 < d:
+                d = cur[j - 1] + 1
+            cur[j] = d
+            if d < row_min:
+                row_min = d
+        if row_min > limit:
+            return big
+        prev = cur
+    return prev[-1] if prev[-1] <= limit else big
+
+
+def similarity(a: str, b: str, min_sim: float = 0.0) -> float:
+    """1 - levenshtein / max(len); 0.0 nếu dưới min_sim."""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    max_dist = int(longest * (1 - min_sim) + 1e-9)
+    d = levenshtein(a, b, max_dist)
+    return 0.0 if d > max_dist else 1 - d / longest
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+transcribe_worker.py
+Dịch vụ transcribe Whisper chạy lâu dài: mỗi tiến trình worker load model một lần rồi
+xử lý nhiều file, N tiến trình CPU song song. Output SRT giống hệt lệnh
+`whisper --output_format srt --word_timestamps True --max_words_per_line N`.
+
+Ba chế độ:
+  run     transcribe ngay một loạt file (pool N tiến trình, mỗi tiến trình load model 1 lần)
+  serve   worker sống lâu, nhận job từ hàng đợi thư mục (pending/ → running/ → done/)
+  submit  đẩy job vào hàng đợi của worker đang chạy, tuỳ chọn chờ kết quả (--wait)
+
+Usage:
+  python scripts/transcribe_worker.py run input/*.wav --model medium --language en \\
+      --max-words-per-line 1 --output-dir output --workers 2
+  python scripts/transcribe_worker.py serve --queue .cache/transcribe_queue --model medium --workers 2 &
+  python scripts/transcribe_worker.py submit --queue .cache/transcribe_queue input/a.wav input/b.wav --wait
+  touch .cache/transcribe_queue/STOP   # dừng worker
+
+Kết quả được cache theo PCM đã decode + tham số (transcript_cache.py): file đã transcribe
+ở lần chạy trước được copy lại ngay, không load model.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_cache import DiskCache
+from transcript_cache import DEFAULT_DIR as TRANSCRIPT_CACHE_DIR
+from transcript_cache import BEAM_SIZE, BEST_OF, open_transcript_cache, pcm_digest, restore, transcript_key
+
+DEFAULT_QUEUE = os.environ.get("TRANSCRIBE_QUEUE", ".cache/transcribe_queue")
+DEFAULT_WORKERS = int(os.environ.get("TRANSCRIBE_WORKERS", "1"))
+
+_model = None
+
+
+# ───────── worker ─────────
+def init_worker(model_name: str, threads: int):
+    """Chạy một lần trong mỗi tiến trình worker: giới hạn thread torch và load model."""
+    global _model
+    import torch
+    import whisper
+
+    torch.set_num_threads(max(1, threads))
+    _model = whisper.load_model(model_name, device="cpu")
+
+
+def transcribe_file(job: dict) -> dict:
+    """job: audio, output_dir, language, max_words_per_line, task, beam_size, best_of. Trả về kết quả + RTF."""
+    import whisper
+    from whisper.utils import get_writer
+
+    audio_path = job["audio"]
+    output_dir = job.get("output_dir") or "output"
+    os.makedirs(output_dir, exist_ok=True)
+
+    audio = whisper.load_audio(audio_path)
+    duration = len(audio) / whisper.audio.SAMPLE_RATE
+    t0 = time.monotonic()
+    result = _model.transcribe(audio, language=job.get("language") or None, task=job.get("task", "transcribe"),
+                               beam_size=job.get("beam_size", BEAM_SIZE), best_of=job.get("best_of", BEST_OF),
+                               word_timestamps=True, verbose=None, fp16=False)
+    writer = get_writer("srt", output_dir)
+    writer(result, audio_path, {"max_line_width": None, "max_line_count": None,
+                                "highlight_words": False,
+                                "max_words_per_line": job.get("max_words_per_line")})
+    elapsed = time.monotonic() - t0
+    stem = os.path.splitext(os.path.basename(audio_path))[0]
+    return {"audio": audio_path, "srt": os.path.join(output_dir, stem + ".srt"),
+            "duration": duration, "seconds": elapsed, "rtf": elapsed / duration if duration else 0.0}
+
+
+def report_result(result: dict):
+    if result.get("cached"):
+        print(f"♻️ {result['audio']} → {result['srt']} (cache)")
+    elif result.get("error"):
+        print(f"❌ {result['audio']}: {result['error']}")
+    else:
+        print(f"✅ {result['audio']} → {result['srt']} ({result['duration']:.0f}s audio, "
+              f"{result['seconds']:.1f}s, RTF {result['rtf']:.2f})")
+
+
+def safe_transcribe(job: dict) -> dict:
+    try:
+        return transcribe_file(job)
+    except Exception as e:
+        return {"audio": job["audio"], "error": f"{type(e).__name__}: {e}"}
+
+
+def make_jobs(files: list[str], args) -> list[dict]:
+    return [{"audio": f, "output_dir": args.output_dir, "language": args.language,
+             "max_words_per_line": args.max_words_per_line, "task": args.task,
+             "beam_size": args.beam_size, "best_of": args.best_of, "speed": args.speed} for f in files]
+
+
+def srt_path_for(job: dict) -> str:
+    stem = os.path.splitext(os.path.basename(job["audio"]))[0]
+    return os.path.join(job.get("output_dir") or "output", stem + ".srt")
+
+
+# ───────── cache ─────────
+def job_cache_key(job: dict, model_name: str) -> str:
+    return transcript_key(pcm_digest(job["audio"]), model_name, job.get("language"), job.get("speed"),
+                          job.get("max_words_per_line"), job.get("task", "transcribe"),
+                          job.get("beam_size", BEAM_SIZE), job.get("best_of", BEST_OF))
+
+
+def split_cached(jobs: list[dict], model_name: str, cache: DiskCache) -> tuple[list[dict], list[dict]]:
+    """Hash PCM song song (ffmpeg nhả GIL), trả về (job cần transcribe, kết quả đã hit)."""
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs)) or 1) as pool:
+        keys = list(pool.map(lambda j: job_cache_key(j, model_name), jobs))
+    misses, hits = [], []
+    for job, key in zip(jobs, keys):
+        job["cache_key"] = key
+        if restore(cache, key, srt_path_for(job)):
+            print(f"♻️ Cache hit: {job['audio']} → {srt_path_for(job)} (bỏ qua Whisper)")
+            hits.append({"audio": job["audio"], "srt": srt_path_for(job), "cached": True})
+        else:
+            print(f"🆕 Cache miss: {job['audio']}")
+            misses.append(job)
+    return misses, hits
+
+
+def store_result(cache: DiskCache, job: dict, result: dict, model_name: str):
+    if job.get("cache_key") and not result.get("error"):
+        cache.put_file(job["cache_key"], result["srt"], {"audio": os.path.basename(job["audio"]),
+                                                         "model": model_name, "rtf": result.get("rtf")})
+
+
+# ───────── run ─────────
+def run_batch(jobs: list[dict], model_name: str, workers: int, cache: DiskCache | None = None) -> list[dict]:
+    """Transcribe các job trên pool `workers` tiến trình; mỗi tiến trình load model 1 lần."""
+    hits = []
+    if cache:
+        jobs, hits = split_cached(jobs, model_name, cache)
+        if not jobs:
+            cache.report()
+            return hits
+    by_audio = {j["audio"]: j for j in jobs}
+    workers = max(1, min(workers, len(jobs)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # File dài trước để tiến trình cuối không phải ôm file lớn nhất một mình
+    jobs = sorted(jobs, key=lambda j: os.path.getsize(j["audio"]), reverse=True)
+    started = time.monotonic()
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(workers, initializer=init_worker, initargs=(model_name, threads)) as pool:
+        results = []
+        for result in pool.imap_unordered(safe_transcribe, jobs):
+            report_result(result)
+            if cache:
+                store_result(cache, by_audio[result["audio"]], result, model_name)
+            results.append(result)
+    elapsed = time.monotonic() - started
+    audio_total = sum(r.get("duration", 0) for r in results)
+    print(f"📊 {len(results)} file, {audio_total:.0f}s audio trong {elapsed:.1f}s "
+          f"(RTF tổng {elapsed / audio_total if audio_total else 0:.2f}, {workers} worker × {threads} thread, "
+          f"model {model_name})")
+    if cache:
+        cache.report()
+    return hits + results
+
+
+# ───────── serve / submit (hàng đợi thư mục) ─────────
+def _queue_dirs(queue: str) -> dict:
+    dirs = {name: os.path.join(queue, name) for name in ("pending", "running", "done")}
+    for d in dirs.values():
+        os.makedirs(d, exist_ok=True)
+    return dirs
+
+
+def _write_json(path: str, data: dict):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _claim(dirs: dict) -> tuple[str, dict] | None:
+    """Lấy job cũ nhất; os.rename là atomic nên nhiều worker không nhận trùng job."""
+    for name in sorted(n for n in os.listdir(dirs["pending"]) if n.endswith(".json")):
+        running = os.path.join(dirs["running"], name)
+        try:
+            os.rename(os.path.join(dirs["pending"], name), running)
+        except FileNotFoundError:
+            continue  # worker khác đã nhận
+        with open(running, encoding="utf-8") as f:
+            return running, json.load(f)
+    return None
+
+
+def serve_loop(queue: str, model_name: str, threads: int, idle_timeout: float, cache_dir: str | None = None):
+    dirs = _queue_dirs(queue)
+    cache = open_transcript_cache(cache_dir) if cache_dir else None
+    init_worker(model_name, threads)
+    print(f"🟢 Worker {os.getpid()} sẵn sàng (model {model_name}), hàng đợi {queue}")
+    idle_since = time.monotonic()
+    while not os.path.exists(os.path.join(queue, "STOP")):
+        claimed = _claim(dirs)
+        if claimed is None:
+            if idle_timeout and time.monotonic() - idle_since > idle_timeout:
+                break
+            time.sleep(0.5)
+            continue
+        running, job = claimed
+        if cache and not split_cached([job], model_name, cache)[0]:
+            result = {"audio": job["audio"], "srt": srt_path_for(job), "cached": True, "id": job["id"]}
+        else:
+            result = {**safe_transcribe(job), "id": job["id"]}
+            if cache:
+                store_result(cache, job, result, model_name)
+        report_result(result)
+        _write_json(os.path.join(dirs["done"], os.path.basename(running)), result)
+        os.remove(running)
+        idle_since = time.monotonic()
+    print(f"⏹ Worker {os.getpid()} dừng.")
+
+
+def serve(queue: str, model_name: str, workers: int, idle_timeout: float, cache_dir: str | None = None):
+    _queue_dirs(queue)
+    stop = os.path.join(queue, "STOP")
+    if os.path.exists(stop):
+        os.remove(stop)
+    threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=serve_loop, args=(queue, model_name, threads, idle_timeout, cache_dir))
+             for _ in range(max(1, workers))]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+def submit(queue: str, jobs: list[dict], wait: bool, timeout: float) -> list[dict]:
+    dirs = _queue_dirs(queue)
+    ids = []
+    for job in jobs:
+        job_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        _write_json(os.path.join(dirs["pending"], job_id + ".json"),
+                    {**job, "id": job_id, "audio": os.path.abspath(job["audio"]),
+                     "output_dir": os.path.abspath(job["output_dir"])})
+        ids.append(job_id)
+        print(f"📨 Đã gửi job {job_id}: {job['audio']}")
+    if not wait:
+        return []
+    deadline = time.monotonic() + timeout if timeout else None
+    results = {}
+    while len(results) < len(ids):
+        for job_id in ids:
+            done = os.path.join(dirs["done"], job_id + ".json")
+            if job_id not in results and os.path.exists(done):
+                with open(done, encoding="utf-8") as f:
+                    results[job_id] = json.load(f)
+                report_result(results[job_id])
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError(f"Hết thời gian chờ: {len(ids) - len(results)} job chưa xong")
+        time.sleep(0.5)
+    return [results[i] for i in ids]
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--model", default=os.environ.get("WHISPER_MODEL", "medium"))
+    common.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Parallel CPU worker processes (each loads the model once).")
+    common.add_argument("--cache-dir", default=None, help="Transcript cache directory (default .cache/transcripts).")
+    common.add_argument("--no-cache", action="store_true")
+
+    job_opts = argparse.ArgumentParser(add_help=False)
+    job_opts.add_argument("files", nargs="+")
+    job_opts.add_argument("--language", default=None, help="Default: auto-detect (like the whisper CLI).")
+    job_opts.add_argument("--max-words-per-line", type=int, default=None)
+    job_opts.add_argument("--task", default="transcribe", choices=["transcribe", "translate"])
+    job_opts.add_argument("--beam-size", type=int, default=BEAM_SIZE, help="Default 5, like the whisper CLI.")
+    job_opts.add_argument("--best-of", type=int, default=BEST_OF, help="Default 5, like the whisper CLI.")
+    job_opts.add_argument("--output-dir", default="output")
+    job_opts.add_argument("--speed", default=None, help="atempo speed already applied to the audio (cache key only).")
+
+    parser = argparse.ArgumentParser(description="Long-lived Whisper transcription worker.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("run", parents=[common, job_opts], help="Transcribe files now with a worker pool.")
+    p_serve = sub.add_parser("serve", parents=[common], help="Run workers on a directory job queue.")
+    p_serve.add_argument("--queue", default=DEFAULT_QUEUE)
+    p_serve.add_argument("--idle-timeout", type=float, default=0, help="Exit after N idle seconds (0 = never).")
+    p_submit = sub.add_parser("submit", parents=[job_opts], help="Queue files for a running worker.")
+    p_submit.add_argument("--queue", default=DEFAULT_QUEUE)
+    p_submit.add_argument("--wait", action="store_true")
+    p_submit.add_argument("--timeout", type=float, default=0)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.queue, args.model, args.workers, args.idle_timeout,
+              None if args.no_cache else (args.cache_dir or TRANSCRIPT_CACHE_DIR))
+        return
+
+    missing = [f for f in args.files if not os.path.exists(f)]
+    if missing:
+        print(f"❌ Không tìm thấy file: {', '.join(missing)}")
+        sys.exit(1)
+    jobs = make_jobs(args.files, args)
+    if args.command == "run":
+        cache = None if args.no_cache else open_transcript_cache(args.cache_dir)
+        results = run_batch(jobs, args.model, args.workers, cache)
+    else:
+        results = submit(args.queue, jobs, args.wait, args.timeout)
+    if any(r.get("error") for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
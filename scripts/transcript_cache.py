@@ -0,0 +1,67 @@
+"""
+transcript_cache.py
+Cache kết quả Whisper trên đĩa, dùng chung cho transcribe_worker.py và audio_shard.py.
+
+Key = sha256(PCM đã decode 16 kHz mono s16le, model, language, speed, max_words_per_line,
+task, beam_size, best_of, …), nên cùng một audio được encode lại (zip khác, mp3 khác
+bitrate) vẫn hit; payload là file SRT. Hit thì bỏ qua hoàn toàn việc load model.
+
+Env:
+  TRANSCRIPT_CACHE_DIR     thư mục cache (mặc định .cache/transcripts)
+  TRANSCRIPT_CACHE_MAX_MB  dung lượng tối đa trước khi evict LRU (mặc định 512)
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+
+from disk_cache import DiskCache, make_key
+
+DEFAULT_DIR = os.environ.get("TRANSCRIPT_CACHE_DIR", ".cache/transcripts")
+DEFAULT_MAX_MB = int(os.environ.get("TRANSCRIPT_CACHE_MAX_MB", "512"))
+# Mặc định của lệnh `whisper` CLI; model.transcribe() không truyền gì thì giải mã greedy
+BEAM_SIZE = 5
+BEST_OF = 5
+
+
+def pcm_digest(path: str, sample_rate: int = 16000) -> str:
+    """sha256 của PCM mà whisper.load_audio nhìn thấy, đọc stream từ ffmpeg (không giữ cả file)."""
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1",
+           "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-"]
+    h = hashlib.sha256()
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as proc:
+        for block in iter(lambda: proc.stdout.read(1 << 20), b""):
+            h.update(block)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return h.hexdigest()
+
+
+def pcm_array_digest(pcm) -> str:
+    """Cùng digest với pcm_digest cho mảng float32 = int16 / 32768 (phép nhân ngược là chính xác)."""
+    return hashlib.sha256((pcm * 32768).astype("<i2").tobytes()).hexdigest()
+
+
+def transcript_key(digest: str, model: str, language: str | None = None, speed: float | str | None = None,
+                   max_words_per_line: int | None = None, task: str = "transcribe",
+                   beam_size: int = BEAM_SIZE, best_of: int = BEST_OF, **extra) -> str:
+    speed = None if speed in (None, "") else float(speed)
+    return make_key("transcript-v2", digest, model, language or None, speed, max_words_per_line, task,
+                    beam_size, best_of, sorted(extra.items()))
+
+
+def restore(cache: DiskCache, key: str, dest: str) -> bool:
+    """Copy SRT đã cache ra dest; trả về True nếu hit."""
+    found = cache.get(key)
+    if not found:
+        return False
+    if os.path.dirname(dest):
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+    shutil.copyfile(found[0], dest)
+    return True
+
+
+def open_transcript_cache(path: str | None = None, max_mb: int | None = None) -> DiskCache:
+    max_mb = DEFAULT_MAX_MB if max_mb is None else max_mb
+    return DiskCache(path or DEFAULT_DIR, max_mb * 1024 * 1024, name="Transcript cache")
@@ -1,24 +1,46 @@
 #!/usr/bin/env python3
 """
 translate_srt.py
-Updated: includes stricter prompt (returns only SRT in a code block) and SRT validation.
+Updated: includes stricter prompt (returns only SRT in a code block) and SRT validation
+(input and every translated window are checked with srt_model.SrtDocument).
 Usage:
   python scripts/translate_srt.py --input path/to/input.zh.srt --language "English" --output path/to/output.en.srt
+  python scripts/translate_srt.py --input input/raw_cn.srt --language "English, Vietnamese, Japanese" \
+      --output-dir output --summary output/summary.json
 Requires:
   pip install google-genai
 Set your GEMINI_API_KEY as a repo secret / environment variable.
 
 Behavior:
-- This version uses a non-streaming call to the Gemini API.
-- It waits for the full translation to be generated before processing.
+- The SRT is parsed into cues and split into fixed-size cue windows (--window).
+  Windows are translated concurrently (--workers) with a few preceding cues as
+  read-only context (--overlap), so no single request has to produce the whole file.
+- Every window response must return exactly the same indices and timecodes;
+  windows that fail validation (or the API call) are re-requested, up to --rounds times.
+- --window 0 sends the whole transcript as a single window. It goes through the same
+  validation and re-request rounds; the old unvalidated single-request path is gone.
+- A local translation memory (--memory, SQLite) is consulted first: cues already
+  translated for the same language + model are reused and only unseen cues are sent.
+- --language accepts a comma-separated list. All languages run concurrently in one
+  process, sharing one client, one request rate limit (--rpm) and one global cap on
+  in-flight requests (--workers). One .srt is written per language, plus an optional
+  JSON summary (--summary) of successes and failures. Exit code is 1 if any language failed.
 """
 
 import os
 import re
+import sys
+import json
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google import genai
 from google.genai import types
 
+from rate_limiter import TokenBucket, call_with_retry
+from srt_model import SrtDocument, format_cues, format_time
+from translation_memory import DEFAULT_DB, TranslationMemory, normalize_source
+
 # Biến regex để tìm code block đã được loại bỏ vì prompt yêu cầu không dùng markdown
 # Tuy nhiên, hàm extract_code_fence vẫn được giữ lại để phòng trường hợp model vẫn trả về markdown
 CODE_FENCE_RE = re.compile(r'```(?:srt\n)?(.*?)```', re.DOTALL)
@@ -42,71 +64,194 @@ def save_raw_debug(path, raw_text):
         f.write(raw_text)
     return raw_path
 
-def build_prompt(transcript, target_language):
-    prompt = f"""
+def build_window_prompt(window_cues, context_cues, target_language):
+    context = format_cues(context_cues) if context_cues else "(none – this is the start of the transcript)"
+    return f"""
 Your task is to act as an automated SRT file translation service.
-You will be provided with an SRT transcript in Chinese. You must translate the text content into {target_language}.
+You will be provided with one section of an SRT transcript in Chinese. You must translate the text content into {target_language}.
 
 **CRITICAL RULES:**
-1.  **RAW OUTPUT ONLY:** Your entire response, from the very first character to the very last, MUST be the raw content of the translated .srt file.
+1.  **RAW OUTPUT ONLY:** Your entire response, from the very first character to the very last, MUST be the raw content of the translated .srt section.
 2.  **NO EXTRA TEXT:** DO NOT include any explanations, introductory sentences, closing remarks, apologies, or any text whatsoever that is not part of the translated SRT data.
 3.  **NO MARKDOWN:** DO NOT wrap your response in ```srt or any other markdown code blocks.
-4.  **PRESERVE STRUCTURE:** You MUST preserve the original index numbers and timecodes exactly as they appear in the input. Only translate the subtitle text itself.
-5.  **TRANSLATE ALL:** Translate all text segments completely into {target_language}.
-
-**Input SRT Transcript:**
-{transcript}
-"""
-    return prompt
+4.  **PRESERVE STRUCTURE:** You MUST output exactly {len(window_cues)} subtitle blocks, with the original index numbers and timecodes exactly as they appear in the section to translate. Only translate the subtitle text itself.
+5.  **CONTEXT IS READ-ONLY:** The preceding context is only there to keep the translation consistent. DO NOT translate or output it.
+6.  **TRANSLATE ALL:** Translate all text segments of the section completely into {target_language}.
 
-# --- SỬA LỖI VÀ TĂNG TÍNH AN TOÀN CHO HÀM NÀY ---
-def translate_srt_with_gemini(api_key, model, input_srt_text, target_language, thinking_budget=-1):
-    client = genai.Client(api_key=api_key)
+**Preceding context (do not output):**
+{context}
 
-    prompt = build_prompt(input_srt_text, target_language)
+**SRT section to translate:**
+{format_cues(window_cues)}
+"""
 
+def generate_text(client, model, prompt, thinking_budget=-1):
+    """Một lần gọi Gemini non-streaming, trả về response.text (raise RuntimeError nếu rỗng / bị chặn)."""
     contents = [
         types.Content(
             role="user",
             parts=[types.Part.from_text(text=prompt)]
         )
     ]
-
     generate_content_config = types.GenerateContentConfig(
         thinking_config=types.ThinkingConfig(
             thinking_budget=thinking_budget,
         ),
     )
+    response = client.models.generate_content(
+        model=model,
+        contents=contents,
+        config=generate_content_config,
+    )
+    if response.prompt_feedback and response.prompt_feedback.block_reason:
+        raise RuntimeError(f"API call failed: Content was blocked due to {response.prompt_feedback.block_reason.name}")
+    try:
+        return response.text
+    except ValueError:
+        raise RuntimeError(f"API call succeeded but returned no content. Feedback: {response.prompt_feedback}")
+
+def validate_window(expected, raw_text):
+    """Parse phản hồi của một window, kiểm tra index + timecode khớp 1-1 với input."""
+    got = list(SrtDocument.parse(extract_code_fence(raw_text or "")))
+    if len(got) != len(expected):
+        raise ValueError(f"expected {len(expected)} cues, got {len(got)}")
+    for exp, cue in zip(expected, got):
+        if cue.index != exp.index or cue.start != exp.start or cue.end != exp.end:
+            raise ValueError(f"cue {exp.index} mismatch: got '{cue.index} / "
+                             f"{format_time(cue.start)} --> {format_time(cue.end)}'")
+    return [exp._replace(text=cue.text) for exp, cue in zip(expected, got)]
+
+def translate_cues(client, model, cues, target_language, window=40, overlap=3, workers=4,
+                   rounds=3, thinking_budget=-1, pool=None, limiter=None, memory=None, label=""):
+    """Dịch list Cue theo từng window song song; chỉ gửi lại các window lỗi.
+
+    pool / limiter: executor và TokenBucket dùng chung (nhiều ngôn ngữ cùng lúc);
+    nếu pool=None sẽ tạo một ThreadPool riêng với `workers` luồng.
+    memory: TranslationMemory – cue đã từng dịch được lấy thẳng từ memory, chỉ
+    các cue chưa gặp mới được gửi lên Gemini (và được lưu lại sau khi dịch xong).
+    Trả về list Cue đã dịch (cùng thứ tự). Raise RuntimeError nếu sau `rounds`
+    lượt vẫn còn window lỗi.
+    """
+    known = memory.lookup_many([c.text for c in cues], target_language, model) if memory else {}
+    translated = {}
+    todo = []
+    for i, c in enumerate(cues):
+        hit = known.get(normalize_source(c.text)) if c.text.strip() else None
+        if hit is not None:
+            translated[i] = c._replace(text=hit)
+        else:
+            todo.append(i)
+    if memory:
+        memory.record(target_language, len(cues) - len(todo), len(todo))
+        print(f"{label}{len(cues) - len(todo)}/{len(cues)} cues served from translation memory")
+
+    window = window if window > 0 else max(1, len(todo))
+    windows = [todo[start:start + window] for start in range(0, len(todo), window)]
+    pending = list(range(len(windows)))
+    errors = {}
 
+    def run(w):
+        idx = windows[w]
+        chunk = [cues[i] for i in idx]
+        context = cues[max(0, idx[0] - overlap):idx[0]]
+        prompt = build_window_prompt(chunk, context, target_language)
+        raw = call_with_retry(generate_text, client, model, prompt, thinking_budget,
+                              retries=2, limiter=limiter, label=f"{label}window {w + 1}/{len(windows)}")
+        return validate_window(chunk, raw)
+
+    own_pool = pool is None and bool(windows)
+    if own_pool:
+        pool = ThreadPoolExecutor(max_workers=max(1, workers))
     try:
-        response = client.models.generate_content(
-            model=model,
-            contents=contents,
-            config=generate_content_config,
-        )
+        for attempt in range(1, rounds + 1):
+            if not pending:
+                break
+            print(f"{label}round {attempt}: translating {len(pending)}/{len(windows)} windows "
+                  f"({window} cues each)")
+            failed = []
+            futures = {pool.submit(run, w): w for w in pending}
+            for fut in as_completed(futures):
+                w = futures[fut]
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    errors[w] = str(e)
+                    print(f"⚠️  {label}window {w + 1} failed: {e}")
+                    failed.append(w)
+                    continue
+                translated.update(zip(windows[w], result))
+                if memory:
+                    memory.store_many([(cues[i].text, t.text) for i, t in zip(windows[w], result)],
+                                      target_language, model)
+            pending = sorted(failed)
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    if pending:
+        detail = "; ".join(f"window {w + 1} (cues {cues[windows[w][0]].index}-{cues[windows[w][-1]].index}): {errors[w]}"
+                           for w in pending)
+        raise RuntimeError(f"{len(pending)}/{len(windows)} windows failed after {rounds} rounds: {detail}")
+    return [translated[i] for i in range(len(cues))]
 
-        # --- THAY ĐỔI QUAN TRỌNG BẮT ĐẦU TỪ ĐÂY ---
+def load_cues(input_srt_text, strict=False):
+    """Parse + validate SRT đầu vào. strict=True: raise nếu có lỗi, ngược lại chỉ cảnh báo."""
+    doc = SrtDocument.parse(input_srt_text)
+    problems = doc.validate()
+    if problems:
+        print(f"⚠️  Input SRT validation found {len(problems)} problem(s):")
+        for p in problems[:10]:
+            print(f"   - {p}")
+        if strict:
+            raise RuntimeError("Input SRT failed strict validation.")
+    if not len(doc):
+        raise RuntimeError("Input SRT has no valid cues.")
+    return list(doc)
 
-        # 1. Kiểm tra xem phản hồi có bị chặn hay không
-        if response.prompt_feedback and response.prompt_feedback.block_reason:
-            raise RuntimeError(f"API call failed: Content was blocked due to {response.prompt_feedback.block_reason.name}")
+def translate_languages(api_key, model, input_srt_text, languages, output_paths, window=40, overlap=3,
+                        workers=4, rounds=3, rpm=0, thinking_budget=-1, memory=None, strict=False):
+    """Dịch một SRT sang nhiều ngôn ngữ cùng lúc trong một process.
 
-        # 2. Lấy văn bản một cách an toàn
-        # Dùng try-except để bắt trường hợp response không có thuộc tính 'text'
+    Mọi ngôn ngữ dùng chung client, TokenBucket và một ThreadPool `workers` luồng
+    (giới hạn tổng số request đang chạy). Ngôn ngữ lỗi không ảnh hưởng ngôn ngữ khác.
+    Trả về list kết quả (dict) theo thứ tự `languages`.
+    """
+    client = genai.Client(api_key=api_key)
+    cues = load_cues(input_srt_text, strict=strict)
+    limiter = TokenBucket(rpm, burst=workers) if rpm > 0 else None
+
+    def run_language(lang):
+        started = time.monotonic()
+        result = {"language": lang, "output": None, "cues": len(cues)}
         try:
-            full_text = response.text
-        except ValueError:
-            # Lỗi này xảy ra khi response.candidates trống (ví dụ do bị lọc an toàn)
-            # Chúng ta sẽ coi đây là lỗi và cung cấp thông tin gỡ lỗi
-            raise RuntimeError(f"API call succeeded but returned no content. Feedback: {response.prompt_feedback}")
-
-    except Exception as e:
-        # Bắt tất cả các lỗi khác (bao gồm cả ServerError 500)
-        raise RuntimeError(f"Error when calling Gemini API: {e}")
-
-    # Xử lý văn bản như cũ
-    clean = extract_code_fence(full_text)
-    return full_text, clean
+            translated = translate_cues(client, model, cues, lang, window=window, overlap=overlap,
+                                        rounds=rounds, thinking_budget=thinking_budget,
+                                        pool=request_pool, limiter=limiter, memory=memory,
+                                        label=f"[{lang}] ")
+            result["output"] = write_srt_file(output_paths[lang], format_cues(translated))
+            result["status"] = "success"
+            print(f"✅ [{lang}] wrote {result['output']}")
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+            print(f"❌ [{lang}] translation failed: {e}")
+        result["seconds"] = round(time.monotonic() - started, 1)
+        if memory:
+            result.update(memory.run_stats().get(lang, {}))
+        return result
+
+    # Luồng theo ngôn ngữ chỉ điều phối/chờ; request thật chạy trên request_pool
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as request_pool, \
+            ThreadPoolExecutor(max_workers=max(1, len(languages))) as language_pool:
+        return list(language_pool.map(run_language, languages))
+
+def default_output_path(input_path, language, output_dir=None):
+    base, ext = os.path.splitext(input_path)
+    if output_dir:
+        base = os.path.join(output_dir, os.path.basename(base))
+    safe_lang = language.replace(' ', '_')
+    return f"{base}.{safe_lang}{ext}"
+
 # --- CÁC HÀM KHÁC GIỮ NGUYÊN ---
 def read_srt(path):
     with open(path, 'r', encoding='utf-8') as f:
@@ -115,38 +260,85 @@ def read_srt(path):
 def main():
     parser = argparse.ArgumentParser(description="Translate Chinese SRT to another language using Gemini API.")
     parser.add_argument("--input", "-i", required=True, help="Path to input .srt (Chinese).")
-    parser.add_argument("--language", "-l", required=True, help="Target language (e.g. English).")
-    parser.add_argument("--output", "-o", required=False, help="Path to output .srt. If omitted adds .{lang}.srt")
+    parser.add_argument("--language", "-l", required=True,
+                        help="Target language, or a comma-separated list (e.g. 'English, Vietnamese').")
+    parser.add_argument("--output", "-o", required=False,
+                        help="Path to output .srt (single language only). If omitted adds .{lang}.srt")
+    parser.add_argument("--output-dir", help="Directory for <base>.<Language>.srt outputs (default: next to input).")
+    parser.add_argument("--summary", help="Write a JSON summary of successes/failures to this path.")
     parser.add_argument("--model", "-m", default="gemini-2.5-pro", help="Gemini model to use.")
     parser.add_argument("--thinking-budget", type=int, default=-1, help="Thinking budget (-1 for dynamic).")
+    parser.add_argument("--window", type=int, default=40, help="Cues per request (0 = whole file in one validated request).")
+    parser.add_argument("--overlap", type=int, default=3, help="Preceding cues sent as read-only context.")
+    parser.add_argument("--workers", type=int, default=4, help="Max concurrent requests (across all languages).")
+    parser.add_argument("--rounds", type=int, default=3, help="Max rounds for re-requesting failed windows.")
+    parser.add_argument("--rpm", type=float, default=0, help="Max requests per minute (0 = unlimited).")
+    parser.add_argument("--memory", default=DEFAULT_DB, help="Translation memory SQLite file.")
+    parser.add_argument("--strict", action="store_true", help="Fail if the input SRT does not pass validation.")
+    parser.add_argument("--no-memory", action="store_true", help="Do not read/write the translation memory.")
     args = parser.parse_args()
 
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY environment variable not set. Add it to GitHub Secrets or env.")
 
+    languages = [l.strip() for l in args.language.split(',') if l.strip()]
+    if not languages:
+        raise RuntimeError("No target language given.")
+    if args.output and len(languages) > 1:
+        raise RuntimeError("--output only works with a single language; use --output-dir instead.")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    output_paths = {lang: args.output or default_output_path(args.input, lang, args.output_dir)
+                    for lang in languages}
+
     input_text = read_srt(args.input)
 
-    print(f"Translating {args.input} -> language: {args.language} using model {args.model} ...")
+    print(f"Translating {args.input} -> languages: {', '.join(languages)} using model {args.model} ...")
 
-    # Lệnh gọi hàm không thay đổi, nhưng hành vi bên trong đã thay đổi
-    full_text, translated_clean = translate_srt_with_gemini(
-        api_key=api_key,
-        model=args.model,
-        input_srt_text=input_text,
-        target_language=args.language,
-        thinking_budget=args.thinking_budget,
-    )
+    memory = None if args.no_memory else TranslationMemory(args.memory)
+    try:
+        results = translate_languages(
+            api_key=api_key,
+            model=args.model,
+            input_srt_text=input_text,
+            languages=languages,
+            output_paths=output_paths,
+            window=args.window,
+            overlap=args.overlap,
+            workers=args.workers,
+            rounds=args.rounds,
+            rpm=args.rpm,
+            thinking_budget=args.thinking_budget,
+            memory=memory,
+            strict=args.strict,
+        )
+        if memory:
+            memory.report()
+    finally:
+        # Luôn đóng (checkpoint WAL) kể cả khi lỗi, để các bản dịch đã lưu vào được cache
+        if memory:
+            memory.close()
 
-    out_path = args.output
-    if not out_path:
-        base, ext = os.path.splitext(args.input)
-        safe_lang = args.language.replace(' ', '_')
-        out_path = f"{base}.{safe_lang}{ext}"
+    succeeded = [r for r in results if r["status"] == "success"]
+    failed = [r for r in results if r["status"] != "success"]
+    summary = {
+        "input": args.input,
+        "model": args.model,
+        "total": len(results),
+        "successful_languages": [r["language"] for r in succeeded],
+        "failed_languages": [r["language"] for r in failed],
+        "files": [r["output"] for r in succeeded],
+        "results": results,
+    }
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"-> Wrote summary to: {args.summary}")
 
-    written = write_srt_file(out_path, translated_clean)
-    # Lệnh print này sẽ chỉ chạy sau khi đã dịch xong hoàn toàn
-    print(f"\n-> Wrote translated srt to: {written}")
+    print(f"\n-> {len(succeeded)}/{len(results)} languages translated.")
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+translation_memory.py
+Persistent translation memory (SQLite) used by translate_srt.py.
+
+Maps (normalized source cue text, target language, model) -> translated text, so
+recurring lines (intros, outros, re-runs after small edits) are never sent to
+Gemini twice.
+
+Usage:
+  python scripts/translation_memory.py stats  --db .cache/translation_memory.sqlite
+  python scripts/translation_memory.py export --db ... --file tm.json
+  python scripts/translation_memory.py import --db ... --file tm.json
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import unicodedata
+
+DEFAULT_DB = os.environ.get("TRANSLATION_MEMORY_DB", ".cache/translation_memory.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tm (
+    source      TEXT NOT NULL,
+    language    TEXT NOT NULL,
+    model       TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    last_used   REAL NOT NULL,
+    PRIMARY KEY (source, language, model)
+)
+"""
+
+def normalize_source(text):
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+
+def normalize_language(language):
+    return language.strip().lower()
+
+
+class TranslationMemory:
+    """Thread-safe wrapper around one SQLite connection."""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.served = {}   # language -> cues served from memory in this run
+        self.missed = {}   # language -> cues that had to be translated
+
+    def lookup_many(self, texts, language, model):
+        """Trả về dict {normalized source: translation} cho các text đã có trong memory."""
+        lang = normalize_language(language)
+        keys = sorted({normalize_source(t) for t in texts if t.strip()})
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT source, translation FROM tm WHERE language = ? AND model = ? AND source IN ({marks})",
+                    [lang, model, *batch]).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE tm SET hits = hits + 1, last_used = ? WHERE source = ? AND language = ? AND model = ?",
+                    [(now, s, lang, model) for s in found])
+                self._conn.commit()
+        return found
+
+    def store_many(self, pairs, language, model):
+        """pairs: iterable (source text, translation)."""
+        lang = normalize_language(language)
+        now = time.time()
+        rows = [(normalize_source(s), lang, model, t.strip(), now, now)
+                for s, t in pairs if s.strip() and t.strip()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO tm (source, language, model, translation, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, language, model) DO UPDATE SET "
+                "translation = excluded.translation, last_used = excluded.last_used",
+                rows)
+            self._conn.commit()
+        return len(rows)
+
+    def record(self, language, served, missed):
+        with self._lock:
+            self.served[language] = self.served.get(language, 0) + served
+            self.missed[language] = self.missed.get(language, 0) + missed
+
+    def run_stats(self):
+        return {lang: {"from_memory": self.served.get(lang, 0), "translated": self.missed.get(lang, 0)}
+                for lang in sorted(set(self.served) | set(self.missed))}
+
+    def report(self):
+        for lang, s in self.run_stats().items():
+            total = s["from_memory"] + s["translated"]
+            pct = 100 * s["from_memory"] / total if total else 0
+            print(f"🧠 [{lang}] translation memory: {s['from_memory']}/{total} cues served from memory ({pct:.0f}%), "
+                  f"{s['translated']} sent to Gemini")
+
+    def db_stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT language, model, COUNT(*), SUM(hits) FROM tm GROUP BY language, model ORDER BY language, model"
+            ).fetchall()
+        return [{"language": l, "model": m, "entries": n, "hits": h or 0} for l, m, n, h in rows]
+
+    def export_json(self, path):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, language, model, translation, hits FROM tm ORDER BY language, model, source"
+            ).fetchall()
+        entries = [dict(zip(("source", "language", "model", "translation", "hits"), r)) for r in rows]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        return len(entries)
+
+    def import_json(self, path):
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+        count = 0
+        groups = {}
+        for e in entries:
+            groups.setdefault((e["language"], e["model"]), []).append((e["source"], e["translation"]))
+        for (language, model), pairs in groups.items():
+            count += self.store_many(pairs, language, model)
+        return count
+
+    def close(self):
+        """Checkpoint WAL vào file .sqlite rồi đóng: cache CI chỉ lưu file .sqlite, không lưu -wal."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the SRT translation memory.")
+    parser.add_argument("command", choices=["stats", "export", "import"])
+    parser.add_argument("--db", default=DEFAULT_DB, help="Path to the SQLite database.")
+    parser.add_argument("--file", help="JSON file for export/import.")
+    args = parser.parse_args()
+
+    if args.command != "stats" and not args.file:
+        parser.error("--file is required for export/import")
+    tm = TranslationMemory(args.db)
+    try:
+        if args.command == "stats":
+            stats = tm.db_stats()
+            for s in stats:
+                print(f"{s['language']:<15} {s['model']:<25} {s['entries']:>7} entries {s['hits']:>8} hits")
+            if not stats:
+                print("Translation memory is empty.")
+        elif args.command == "export":
+            print(f"Exported {tm.export_json(args.file)} entries to {args.file}")
+        else:
+            print(f"Imported {tm.import_json(args.file)} entries from {args.file}")
+    finally:
+        tm.close()
+
+
+if __name__ == "__main__":
+    main()
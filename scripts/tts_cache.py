@@ -0,0 +1,38 @@
+"""
+tts_cache.py
+Cache audio Gemini TTS trên đĩa, dùng chung cho create_tts.py và gemini_tts_generate.py.
+
+Key = sha256(normalized text, voice / speaker map, temperature, model), payload là
+file audio đã ghi (WAV, hoặc định dạng Gemini trả về) kèm mime type / đuôi file
+trong metadata.
+
+Env:
+  TTS_CACHE_DIR     thư mục cache (mặc định .cache/tts)
+  TTS_CACHE_MAX_MB  dung lượng tối đa trước khi evict LRU (mặc định 2048)
+"""
+
+import os
+import re
+import unicodedata
+
+from disk_cache import DiskCache, make_key
+
+DEFAULT_DIR = os.environ.get("TTS_CACHE_DIR", ".cache/tts")
+DEFAULT_MAX_MB = int(os.environ.get("TTS_CACHE_MAX_MB", "2048"))
+
+
+def normalize_text(text: str) -> str:
+    """NFC + gộp khoảng trắng, để sửa xuống dòng/space thừa không làm mất cache."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def tts_cache_key(text: str, voice: str | dict[str, str],
+                  temperature: float | None, model: str) -> str:
+    if isinstance(voice, dict):
+        voice = sorted(voice.items())
+    return make_key("tts-v2", normalize_text(text), voice, temperature, model)
+
+
+def open_tts_cache(path: str | None = None, max_mb: int | None = None) -> DiskCache:
+    max_mb = DEFAULT_MAX_MB if max_mb is None else max_mb
+    return DiskCache(path or DEFAULT_DIR, max_mb * 1024 * 1024, name="TTS cache")
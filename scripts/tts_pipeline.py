@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+tts_pipeline.py
+Sinh TTS (gemini_tts_generate.py) và transcribe Whisper (transcribe_worker.py) chồng lên
+nhau thay vì chạy nối tiếp:
+
+- Pool Whisper được khởi động trước, nên model load trong lúc chunk TTS đầu đang sinh.
+- Chunk i vừa ghi xong output_{i}.wav là được đẩy sang worker transcribe ngay, trong khi
+  các chunk sau vẫn đang được Gemini sinh.
+- Xong hết: các WAV được nối thành một track bằng wav_join.py (không qua ffmpeg), SRT
+  từng chunk được dời theo offset trong index của nó (số frame cộng dồn từ header WAV,
+  không làm tròn tích luỹ) rồi ghép thành một transcript.
+
+Tổng thời gian ≈ max(TTS, transcribe) + phần transcribe của chunk cuối, thay vì tổng hai bước.
+
+Usage:
+  python scripts/tts_pipeline.py --chunks chunks.json --voice Aoede --workers 4 \\
+      --model medium --max-words-per-line 1 --output tts_full.wav --srt transcript.srt
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+
+from disk_cache import DiskCache
+from gemini_tts_generate import generate_multi_from_json
+from srt_model import SrtDocument
+from transcribe_worker import (init_worker, job_cache_key, report_result, safe_transcribe, srt_path_for,
+                               store_result)
+from transcript_cache import open_transcript_cache, restore
+from tts_cache import open_tts_cache
+from wav_join import join_wavs
+
+
+def merge_chunk_srts(srt_paths: list[str], index: dict) -> SrtDocument:
+    """Dời SRT từng chunk theo start_ms trong index của wav_join (cộng dồn từ header WAV)."""
+    chunks = index["chunks"]
+    docs = [SrtDocument.load(p).clamped(c["duration_ms"]) for p, c in zip(srt_paths, chunks)]
+    return SrtDocument.concat(docs, [c["start_ms"] for c in chunks])
+
+
+def tts_and_transcribe(chunks_json: str, voice: str, temp: float, model: str,
+                       output_wav: str = "tts_full.wav", output_srt: str = "transcript.srt",
+                       srt_dir: str = "output", language: str | None = None,
+                       max_words_per_line: int | None = None, tts_workers: int = 4,
+                       transcribe_workers: int = 2, rpm: float = 0, retries: int = 3,
+                       tts_cache: DiskCache | None = None,
+                       transcript_cache: DiskCache | None = None,
+                       index_path: str | None = None) -> dict:
+    t0 = time.monotonic()
+    workers = max(1, transcribe_workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    pending: dict[int, tuple[dict, object]] = {}
+
+    with mp.get_context("spawn").Pool(workers, initializer=init_worker, initargs=(model, threads)) as pool:
+        def on_done(i: int, fname: str):
+            job = {"audio": fname, "output_dir": srt_dir, "language": language,
+                   "max_words_per_line": max_words_per_line, "task": "transcribe"}
+            if transcript_cache:
+                job["cache_key"] = job_cache_key(job, model)
+                if restore(transcript_cache, job["cache_key"], srt_path_for(job)):
+                    pending[i] = (job, {"audio": fname, "srt": srt_path_for(job), "cached": True})
+                    return
+            print(f"🎧→✍️ Chunk #{i+1:02d} xong TTS sau {time.monotonic() - t0:.1f}s – chuyển sang Whisper")
+            pending[i] = (job, pool.apply_async(safe_transcribe, (job,)))
+
+        files = generate_multi_from_json(chunks_json, voice, temp, workers=tts_workers, rpm=rpm,
+                                         retries=retries, cache=tts_cache, on_done=on_done)
+        t_tts = time.monotonic() - t0
+        print(f"🗣 TTS xong {len(files)} chunk sau {t_tts:.1f}s – chờ các transcript còn lại…")
+        results = []
+        for i in range(len(files)):
+            job, pending_result = pending[i]
+            result = pending_result if isinstance(pending_result, dict) else pending_result.get()
+            report_result(result)
+            if transcript_cache and not result.get("cached"):
+                store_result(transcript_cache, job, result, model)
+            results.append(result)
+
+    failed = [r for r in results if r.get("error")]
+    if failed:
+        raise RuntimeError(f"❌ {len(failed)}/{len(results)} chunk transcribe thất bại: {failed[0]['error']}")
+    if transcript_cache:
+        transcript_cache.report()
+
+    index = join_wavs(files, output_wav, index_path)
+    doc = merge_chunk_srts([r["srt"] for r in results], index)
+    if os.path.dirname(output_srt):
+        os.makedirs(os.path.dirname(output_srt), exist_ok=True)
+    doc.save(output_srt)
+    elapsed = time.monotonic() - t0
+    print(f"🧵 {output_wav} ({index['duration_ms'] / 1000:.0f}s) + {output_srt} ({len(doc)} cue) – TTS {t_tts:.1f}s, "
+          f"tổng {elapsed:.1f}s")
+    return {"files": files, "wav": output_wav, "srt": output_srt, "tts_seconds": t_tts, "seconds": elapsed}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Gemini TTS with overlapped Whisper transcription")
+    p.add_argument("--voice", default="Zephyr", help="Voice name, e.g. Zephyr, Aoede…")
+    p.add_argument("--temp", type=float, default=1.0, help="Temperature (speed / style)")
+    p.add_argument("--chunks", default="chunks.json", help="JSON array of text chunks")
+    p.add_argument("--workers", type=int, default=4, help="Số chunk TTS chạy song song")
+    p.add_argument("--rpm", type=float, default=0, help="Giới hạn request/phút (0 = không giới hạn)")
+    p.add_argument("--retries", type=int, default=3, help="Số lần thử lại cho mỗi chunk")
+    p.add_argument("--model", default=os.environ.get("WHISPER_MODEL", "medium"))
+    p.add_argument("--language", default=None)
+    p.add_argument("--max-words-per-line", type=int, default=None)
+    p.add_argument("--transcribe-workers", type=int, default=int(os.environ.get("TRANSCRIBE_WORKERS", "2")))
+    p.add_argument("--output", default="tts_full.wav", help="WAV ghép từ mọi chunk")
+    p.add_argument("--srt", default="transcript.srt", help="SRT ghép từ mọi chunk")
+    p.add_argument("--index", default=None, help="JSON index offset/độ dài từng chunk (wav_join)")
+    p.add_argument("--srt-dir", default="output", help="Thư mục SRT của từng chunk")
+    p.add_argument("--no-cache", action="store_true", help="Không đọc/ghi TTS cache và transcript cache")
+    args = p.parse_args()
+
+    tts_and_transcribe(args.chunks, args.voice, args.temp, args.model, args.output, args.srt, args.srt_dir,
+                       args.language, args.max_words_per_line, args.workers, args.transcribe_workers,
+                       args.rpm, args.retries,
+                       tts_cache=None if args.no_cache else open_tts_cache(),
+                       transcript_cache=None if args.no_cache else open_transcript_cache(),
+                       index_path=args.index)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,206 @@
+"""
+upload_results_to_drive.py
+Upload các file trong UPLOAD_FILES lên folder FOLDER_URL: song song trên ThreadPool,
+tự gọi next_chunk() với chunk size tuỳ chỉnh và lưu resumable session URI + offset
+vào state file sau mỗi chunk, để lần chạy sau tiếp tục thay vì upload lại từ đầu.
+
+Env:
+  FOLDER_URL            link folder Google Drive
+  UPLOAD_FILES          danh sách file, cách nhau bởi khoảng trắng
+  UPLOAD_WORKERS        số file upload song song (mặc định 4)
+  UPLOAD_CHUNK_MB       kích thước mỗi chunk (mặc định 16 MB, bội số của 256 KB)
+  UPLOAD_STATE_FILE     nơi lưu session đang dở (mặc định .cache/drive_uploads.json)
+
+Khi tiếp tục (hoặc khi next_chunk() lỗi giữa chừng), offset server đã nhận được hỏi trực
+tiếp bằng PUT rỗng "Content-Range: bytes */<size>" rồi gán vào resumable_progress – không
+dựa vào trạng thái nội bộ của googleapiclient.
+
+State file chỉ có ích khi chạy local: workflow CI không lưu / khôi phục nó, và file kết quả
+được sinh lại mỗi lần chạy (mtime mới ⇒ key mới), nên trong CI mỗi lần chạy upload từ đầu.
+"""
+
+import json
 import os
-import re
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 
-# Lấy folder ID từ URL
-folder_url = os.environ["FOLDER_URL"]
-match = re.search(r"/folders/([a-zA-Z0-9_-]+)", folder_url)
-if not match:
-    print("❌ Không thể lấy folder_id từ FOLDER_URL.")
-    exit(1)
-folder_id = match.group(1)
-print(f"📂 Folder ID: {folder_id}")
-
-# Xác thực
-creds = Credentials(
-    None,
-    refresh_token=os.environ["GG_REFRESH_TOKEN"],
-    token_uri="https://oauth2.googleapis.com/token",
-    client_id=os.environ["YT_CLIENT_ID"],
-    client_secret=os.environ["YT_CLIENT_SECRET"]
-)
-drive = build("drive", "v3", credentials=creds)
-
-# Lấy danh sách file từ biến môi trường
-file_list_str = os.environ.get("UPLOAD_FILES", "")
-if not file_list_str:
-    print("⚠️ Không có file nào được chỉ định để upload (UPLOAD_FILES rỗng).")
-    exit(0)
-
-file_names = file_list_str.split()
-for file_name in file_names:
-    if not os.path.exists(file_name):
-        print(f"⚠️ File không tồn tại: {file_name}")
-        continue
-
-    file_metadata = {
-        "name": os.path.basename(file_name),
-        "parents": [folder_id]
-    }
-    media = MediaFileUpload(file_name, resumable=True)
-    uploaded = drive.files().create(
-        body=file_metadata,
+from drive_utils import ThreadLocalHttp, build_drive, folder_id_from_url, get_credentials
+
+WORKERS = int(os.environ.get("UPLOAD_WORKERS", "4"))
+CHUNK_MB = int(os.environ.get("UPLOAD_CHUNK_MB", "16"))
+RESYNC_ATTEMPTS = 3  # số lần hỏi lại offset server sau khi next_chunk() lỗi
+STATE_FILE = os.environ.get("UPLOAD_STATE_FILE", ".cache/drive_uploads.json")
+
+
+class UploadState:
+    """Session resumable theo (folder, đường dẫn, size, mtime), ghi ra JSON sau mỗi thay đổi."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._sessions = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._sessions = {}
+
+    @staticmethod
+    def key(folder_id: str, file_name: str) -> str:
+        st = os.stat(file_name)
+        return f"{folder_id}:{os.path.abspath(file_name)}:{st.st_size}:{int(st.st_mtime)}"
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            return self._sessions.get(key)
+
+    def set(self, key: str, session: dict | None):
+        with self._lock:
+            if session is None:
+                self._sessions.pop(key, None)
+            else:
+                self._sessions[key] = session
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self._sessions, f, indent=2)
+            os.replace(self.path + ".tmp", self.path)
+
+
+class SessionExpired(Exception):
+    pass
+
+
+def query_offset(http, uri: str, size: int) -> tuple[int, dict | None]:
+    """Hỏi server một session resumable đã nhận bao nhiêu byte.
+
+    Trả về (offset, None) nếu còn dở, (size, metadata file) nếu upload đã xong;
+    raise SessionExpired nếu session không còn (404/410).
+    """
+    resp, content = http.request(uri, method="PUT", body=b"",
+                                 headers={"Content-Length": "0", "Content-Range": f"bytes */{size}"})
+    if resp.status in (200, 201):
+        return size, json.loads(content)
+    if resp.status in (404, 410):
+        raise SessionExpired(uri)
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=uri)
+    # Range: bytes=0-<byte cuối đã nhận>; không có header ⇒ chưa nhận byte nào
+    received = resp.get("range")
+    return (int(received.rsplit("-", 1)[1]) + 1 if received else 0), None
+
+
+def upload_one(drive, http, folder_id: str, file_name: str, state: UploadState, chunk_size: int) -> dict:
+    key = UploadState.key(folder_id, file_name)
+    size = os.path.getsize(file_name)
+    media = MediaFileUpload(file_name, chunksize=chunk_size, resumable=True)
+    request = drive.files().create(
+        body={"name": os.path.basename(file_name), "parents": [folder_id]},
         media_body=media,
         fields="id"
-    ).execute()
-    print(f"✅ Đã upload: {file_name} (ID: {uploaded.get('id')})")
+    )
+    request.http = http
+
+    def resync(uri: str) -> dict | None:
+        """Đặt request tiếp tục từ offset server đã nhận; trả về response nếu server đã nhận đủ."""
+        offset, done = query_offset(http, uri, size)
+        request.resumable_uri = uri
+        request.resumable_progress = offset
+        return done
+
+    t0 = time.monotonic()
+    response = None
+    resumed_from = 0
+    session = state.get(key)
+    if session:
+        try:
+            response = resync(session["uri"])
+            resumed_from = request.resumable_progress
+            print(f"↪️ Tiếp tục upload {file_name} từ {resumed_from / 1e6:.1f} MB")
+        except SessionExpired:
+            # Session hết hạn (≈1 tuần) → bắt đầu session mới từ đầu
+            print(f"⚠️ Session upload cũ của {file_name} đã hết hạn, upload lại từ đầu.")
+            state.set(key, None)
+
+    failures = 0
+    while response is None:
+        try:
+            status, response = request.next_chunk(num_retries=3)
+        except Exception as e:
+            # Chunk lỗi: không biết server đã nhận tới đâu ⇒ tự hỏi lại offset rồi gửi tiếp
+            failures += 1
+            if not request.resumable_uri or failures > RESYNC_ATTEMPTS:
+                raise
+            print(f"⚠️ Chunk của {file_name} lỗi ({e}), hỏi lại offset đã nhận ({failures}/{RESYNC_ATTEMPTS})")
+            try:
+                response = resync(request.resumable_uri)
+            except SessionExpired:
+                state.set(key, None)
+                raise
+            continue
+        failures = 0
+        if status:
+            state.set(key, {"uri": request.resumable_uri, "offset": status.resumable_progress})
+    state.set(key, None)
+
+    elapsed = max(time.monotonic() - t0, 1e-6)
+    sent = size - resumed_from
+    print(f"✅ Đã upload: {file_name} (ID: {response.get('id')}) – "
+          f"{size / 1e6:.1f} MB trong {elapsed:.1f}s ({sent / 1e6 / elapsed:.1f} MB/s)")
+    return {"file": file_name, "id": response.get("id"), "bytes": sent, "seconds": elapsed}
+
+
+def main():
+    # Lấy danh sách file từ biến môi trường
+    file_list_str = os.environ.get("UPLOAD_FILES", "")
+    if not file_list_str:
+        print("⚠️ Không có file nào được chỉ định để upload (UPLOAD_FILES rỗng).")
+        sys.exit(0)
+
+    folder_id = folder_id_from_url(os.environ["FOLDER_URL"])
+    print(f"📂 Folder ID: {folder_id}")
+
+    file_names = []
+    for file_name in dict.fromkeys(file_list_str.split()):
+        if not os.path.exists(file_name):
+            print(f"⚠️ File không tồn tại: {file_name}")
+            continue
+        file_names.append(file_name)
+    if not file_names:
+        return
+
+    creds = get_credentials()
+    drive = build_drive(creds)
+    https = ThreadLocalHttp(creds)
+    state = UploadState(STATE_FILE)
+    chunk_size = CHUNK_MB * 1024 * 1024
+
+    # File lớn nhất đi trước để tổng thời gian ≈ thời gian upload file lớn nhất
+    file_names.sort(key=os.path.getsize, reverse=True)
+    started = time.monotonic()
+    results, failed = [], []
+    with ThreadPoolExecutor(max_workers=max(1, WORKERS)) as pool:
+        futures = {pool.submit(lambda f=f: upload_one(drive, https.get(), folder_id, f, state, chunk_size)): f
+                   for f in file_names}
+        for fut in as_completed(futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                print(f"❌ Lỗi khi upload {futures[fut]}: {e}")
+                failed.append(futures[fut])
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    total = sum(r["bytes"] for r in results)
+    print(f"📊 Đã upload {len(results)}/{len(file_names)} file, {total / 1e6:.1f} MB trong {elapsed:.1f}s "
+          f"({total / 1e6 / elapsed:.1f} MB/s, {WORKERS} luồng, chunk {CHUNK_MB} MB)")
+    if failed:
+        print(f"❌ Upload thất bại: {', '.join(failed)} – chạy lại để tiếp tục từ state {STATE_FILE}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+wav_join.py
+Nối các file WAV PCM cùng định dạng (vd. output_{idx}.wav của TTS theo chunk) mà không
+decode/re-mux qua ffmpeg:
+
+- Đọc header từng file (wav_writer.read_wav_info), kiểm tra cùng rate / bits / channels.
+- Ghi một header RIFF đúng kích thước ngay từ đầu, rồi copy phần data của từng file
+  bằng os.copy_file_range (kernel copy, reflink trên btrfs/xfs) → os.sendfile → read/write
+  với buffer cố định. Không giữ audio trong RAM; thời gian chỉ phụ thuộc băng thông đĩa.
+- Ghi kèm index JSON: start/duration (ms và frame) của từng chunk trong file ghép, để
+  code căn thời gian phía sau (SRT, slide) dùng thẳng.
+
+Usage:
+  python scripts/wav_join.py $(ls output_*.wav | sort -V) --output tts_full.wav --index tts_full.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from wav_writer import WAV_HEADER_SIZE, read_wav_info, wav_header
+
+MAX_DATA_SIZE = 0xFFFFFFFF - (WAV_HEADER_SIZE - 8)  # giới hạn 32-bit của RIFF
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, count: int, buffer_size: int = 1 << 20):
+    """Copy count byte từ src (tại offset) vào vị trí hiện tại của dst."""
+    for copy in (_copy_file_range, _sendfile):
+        done = copy(src_fd, dst_fd, offset, count)
+        offset, count = offset + done, count - done
+        if not count:
+            return
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    while count:
+        n = os.preadv(src_fd, [view[:min(buffer_size, count)]], offset)
+        if not n:
+            raise OSError(f"Hết file sớm khi copy (còn {count} byte)")
+        os.write(dst_fd, view[:n])
+        offset, count = offset + n, count - n
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    if not hasattr(os, "copy_file_range"):
+        return 0
+    done = 0
+    try:
+        while done < count:
+            n = os.copy_file_range(src_fd, dst_fd, count - done, offset_src=offset + done)
+            if not n:
+                break
+            done += n
+    except OSError:
+        if done:
+            raise
+        # EXDEV/ENOSYS/EINVAL… ngay từ đầu → để cách tiếp theo copy
+    return done
+
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    if not hasattr(os, "sendfile"):
+        return 0
+    done = 0
+    try:
+        while done < count:
+            n = os.sendfile(dst_fd, src_fd, offset + done, count - done)
+            if not n:
+                break
+            done += n
+    except OSError:
+        if done:
+            raise
+        # EXDEV/ENOSYS/EINVAL… ngay từ đầu → để cách tiếp theo copy
+    return done
+
+
+def build_index(paths: list[str], infos: list[dict]) -> dict:
+    rate, bits, channels = infos[0]["rate"], infos[0]["bits"], infos[0]["channels"]
+    chunks, frames, data_offset = [], 0, WAV_HEADER_SIZE
+    for i, (path, info) in enumerate(zip(paths, infos)):
+        chunks.append({
+            "index": i,
+            "file": path,
+            "start_ms": frames * 1000 // rate,
+            "duration_ms": info["frames"] * 1000 // rate,
+            "start_frame": frames,
+            "frames": info["frames"],
+            "data_offset": data_offset,
+        })
+        frames += info["frames"]
+        data_offset += info["data_size"]
+    return {"rate": rate, "bits": bits, "channels": channels, "frames": frames,
+            "duration_ms": frames * 1000 // rate, "chunks": chunks}
+
+
+def join_wavs(paths: list[str], output: str, index_path: str | None = None) -> dict:
+    """Nối các WAV thành output; trả về (và tuỳ chọn ghi ra index_path) index các chunk."""
+    if not paths:
+        raise ValueError("Không có file WAV nào để nối")
+    t0 = time.monotonic()
+    infos = [read_wav_info(p) for p in paths]
+    fmt = (infos[0]["rate"], infos[0]["bits"], infos[0]["channels"])
+    for path, info in zip(paths, infos):
+        if (info["rate"], info["bits"], info["channels"]) != fmt:
+            raise ValueError(f"{path}: định dạng {info['rate']} Hz/{info['bits']} bit/{info['channels']} kênh "
+                             f"khác file đầu ({fmt[0]} Hz/{fmt[1]} bit/{fmt[2]} kênh)")
+        if info["data_size"] % (info["channels"] * info["bits"] // 8):
+            raise ValueError(f"{path}: data không chia hết cho block align")
+    total = sum(i["data_size"] for i in infos)
+    if total > MAX_DATA_SIZE:
+        raise ValueError(f"Tổng data {total} byte vượt giới hạn 4 GB của WAV")
+
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    tmp = output + ".part"
+    try:
+        with open(tmp, "wb") as out:
+            out.write(wav_header(total, *fmt))
+            out.flush()
+            for path, info in zip(paths, infos):
+                with open(path, "rb") as src:
+                    _copy_range(src.fileno(), out.fileno(), info["data_offset"], info["data_size"])
+        os.replace(tmp, output)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    index = {"output": output, **build_index(paths, infos)}
+    if index_path:
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+    elapsed = time.monotonic() - t0
+    print(f"🔗 Đã nối {len(paths)} WAV → {output} ({total / 2**20:.1f} MB, "
+          f"{index['duration_ms'] / 1000:.0f}s audio) trong {elapsed:.2f}s "
+          f"({total / 2**20 / max(elapsed, 1e-6):.0f} MB/s)")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Join same-format PCM WAV files without re-encoding.")
+    parser.add_argument("inputs", nargs="+", help="WAV files, in playback order.")
+    parser.add_argument("--output", "-o", required=True)
+    parser.add_argument("--index", help="Write a JSON index of chunk offsets/durations here.")
+    args = parser.parse_args()
+
+    try:
+        join_wavs(args.inputs, args.output, args.index)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
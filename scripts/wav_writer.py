@@ -0,0 +1,155 @@
+"""
+wav_writer.py
+Ghi audio Gemini TTS ra đĩa theo kiểu streaming (dùng chung cho create_tts.py và gemini_tts_generate.py).
+
+StreamingWavWriter giữ chỗ 44 byte header RIFF, ghi thẳng từng chunk PCM xuống file
+ngay khi nhận được, rồi vá lại RIFF size / data size lúc close(). Bộ nhớ dùng
+không phụ thuộc độ dài audio.
+"""
+
+import mimetypes
+import os
+import struct
+
+WAV_HEADER_SIZE = 44
+
+
+def parse_audio_mime_type(mime_type: str) -> dict[str, int]:
+    """Lấy bits_per_sample / rate từ mime kiểu 'audio/L16;codec=pcm;rate=24000'."""
+    params = {"bits_per_sample": 16, "rate": 24000}  # Giá trị mặc định
+    for param in (mime_type or "").split(";"):
+        param = param.strip()
+        if param.lower().startswith("rate="):
+            try:
+                params["rate"] = int(param.split("=", 1)[1])
+            except (ValueError, IndexError):
+                pass
+        elif param.startswith("audio/L"):
+            try:
+                params["bits_per_sample"] = int(param.split("L", 1)[1])
+            except (ValueError, IndexError):
+                pass
+    return params
+
+
+def wav_header(data_size: int, sample_rate: int, bits_per_sample: int = 16,
+               num_channels: int = 1) -> bytes:
+    block_align = num_channels * bits_per_sample // 8
+    byte_rate = sample_rate * block_align
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, num_channels, sample_rate,
+        byte_rate, block_align, bits_per_sample,
+        b"data", data_size
+    )
+
+
+def is_raw_pcm(mime_type: str | None) -> bool:
+    """True nếu Gemini trả PCM thô (cần gói WAV), False nếu đã là wav/mp3/ogg…"""
+    ext = mimetypes.guess_extension(mime_type or "")
+    return not (ext and ext != ".raw" and not ext.startswith(".bin"))
+
+
+class _PartialFile:
+    """Ghi vào <path>.part, rename sang <path> khi close(); abort() xoá file dở."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.bytes_written = 0
+        self._tmp = path + ".part"
+        self._f = open(self._tmp, "wb")
+
+    def write(self, data: bytes):
+        self._f.write(data)
+        self.bytes_written += len(data)
+
+    def _finish(self):
+        pass
+
+    def close(self) -> str:
+        if self._f.closed:
+            return self.path
+        self._finish()
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        return self.path
+
+    def abort(self):
+        if not self._f.closed:
+            self._f.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+
+class StreamingWavWriter(_PartialFile):
+    def __init__(self, path: str, sample_rate: int = 24000, bits_per_sample: int = 16,
+                 num_channels: int = 1):
+        super().__init__(path)
+        self.mime_type = "audio/wav"
+        self.sample_rate = sample_rate
+        self.bits_per_sample = bits_per_sample
+        self.num_channels = num_channels
+        # Header tạm với size = 0, sẽ được vá lại khi close()
+        self._f.write(wav_header(0, sample_rate, bits_per_sample, num_channels))
+        self._f.flush()
+
+    def _finish(self):
+        self._f.seek(4)
+        self._f.write(struct.pack("<I", 36 + self.bytes_written))
+        self._f.seek(40)
+        self._f.write(struct.pack("<I", self.bytes_written))
+
+
+class RawAudioWriter(_PartialFile):
+    def __init__(self, path: str, mime_type: str):
+        super().__init__(path)
+        self.mime_type = mime_type
+
+
+def open_audio_writer(output_name: str, mime_type: str | None):
+    """Chọn writer theo mime của chunk đầu tiên: PCM → <name>.wav, còn lại giữ nguyên đuôi."""
+    if is_raw_pcm(mime_type):
+        params = parse_audio_mime_type(mime_type or "audio/L16;rate=24000")
+        return StreamingWavWriter(f"{output_name}.wav", params["rate"], params["bits_per_sample"])
+    return RawAudioWriter(f"{output_name}{mimetypes.guess_extension(mime_type)}", mime_type)
+
+
+def read_wav_info(path: str) -> dict:
+    """Đọc chunk fmt/data của file WAV PCM: rate, bits, channels, vị trí & kích thước data."""
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path}: không phải file WAV")
+        info = {}
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                raise ValueError(f"{path}: thiếu chunk data")
+            cid, size = struct.unpack("<4sI", head)
+            if cid == b"fmt ":
+                fmt, channels, rate, _, _, bits = struct.unpack("<HHIIHH", f.read(16))
+                if fmt != 1:
+                    raise ValueError(f"{path}: chỉ hỗ trợ PCM (format {fmt})")
+                info.update(rate=rate, bits=bits, channels=channels)
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif cid == b"data":
+                if not info:
+                    raise ValueError(f"{path}: chunk data nằm trước fmt")
+                # Header streaming chưa được vá (size 0) ⇒ data chạy tới hết file
+                available = os.fstat(f.fileno()).st_size - f.tell()
+                info.update(data_offset=f.tell(), data_size=min(size, available) if size else available)
+                info["frames"] = info["data_size"] // (info["channels"] * info["bits"] // 8)
+                return info
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+